@@ -0,0 +1,136 @@
+"""
+JWT authentication with a cached token lookup.
+
+``CachedJWTAuthentication`` behaves like simplejwt's ``JWTAuthentication``,
+but remembers every token it has validated together with its user. A
+repeated token then costs neither a signature check nor a query on the user
+table. Entries live for at most ``JWT_AUTH_CACHE_TTL`` seconds (never past
+the token's own expiry) and are dropped as soon as the user is saved or
+deleted in this process. Saving a user covers deactivation and password
+changes; other processes notice the change once the TTL runs out.
+
+With ``JWT_CLAIMS_ONLY_READS`` enabled, safe (read-only) requests are
+authenticated from the token's claims alone and never touch the database.
+"""
+import threading
+import time
+from collections import OrderedDict
+from django.conf import settings
+from django.db.models.signals import post_delete, post_save
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.utils import get_md5_hash_password
+
+
+class TokenCache:
+    """Bounded, thread-safe LRU mapping raw tokens to ``(user, validated_token)``."""
+
+    def __init__(self, max_size=10000):
+        self.max_size = max_size
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self._keys_by_user = {}
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, user_id, value = entry
+            if expires_at <= time.time():
+                self._remove(key)
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, user_id, value, expires_at):
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (expires_at, user_id, value)
+            self._keys_by_user.setdefault(user_id, set()).add(key)
+            while len(self._entries) > self.max_size:
+                self._remove(next(iter(self._entries)))
+
+    def invalidate_user(self, user_id):
+        with self._lock:
+            for key in self._keys_by_user.pop(user_id, ()):
+                self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._keys_by_user.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _remove(self, key):
+        _, user_id, _ = self._entries.pop(key)
+        keys = self._keys_by_user.get(user_id)
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._keys_by_user[user_id]
+
+
+token_cache = TokenCache(getattr(settings, 'JWT_AUTH_CACHE_SIZE', 10000))
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """``JWTAuthentication`` backed by ``token_cache``; see the module docstring."""
+
+    def authenticate(self, request):
+        header = self.get_header(request)
+        if header is None:
+            return None
+        raw_token = self.get_raw_token(header)
+        if raw_token is None:
+            return None
+
+        claims_only = self.use_claims_only(request)
+        cached = self.get_cached(raw_token, claims_only)
+        if cached is not None:
+            return cached
+        validated_token = self.get_validated_token(raw_token)
+        user = self.get_token_user(validated_token) if claims_only else self.get_user(validated_token)
+        return self.remember(raw_token, claims_only, user, validated_token)
+
+    def use_claims_only(self, request):
+        return getattr(settings, 'JWT_CLAIMS_ONLY_READS', False) and request.method in SAFE_METHODS
+
+    def get_token_user(self, validated_token):
+        return api_settings.TOKEN_USER_CLASS(validated_token)
+
+    def check_user(self, user, validated_token):
+        """The checks ``get_user`` applies to a user it has loaded."""
+        if not user.is_active:
+            raise AuthenticationFailed('User is inactive', code='user_inactive')
+        if api_settings.CHECK_REVOKE_TOKEN and (
+            validated_token.get(api_settings.REVOKE_TOKEN_CLAIM) != get_md5_hash_password(user.password)
+        ):
+            raise AuthenticationFailed("The user's password has been changed.", code='password_changed')
+
+    def get_cached(self, raw_token, claims_only):
+        return token_cache.get((raw_token, claims_only))
+
+    def remember(self, raw_token, claims_only, user, validated_token):
+        ttl = getattr(settings, 'JWT_AUTH_CACHE_TTL', 60)
+        result = (user, validated_token)
+        if ttl > 0:
+            expires_at = min(time.time() + ttl, validated_token['exp'])
+            token_cache.set((raw_token, claims_only), validated_token[api_settings.USER_ID_CLAIM], result, expires_at)
+        return result
+
+
+def invalidate_cached_user(sender, instance, update_fields=None, **kwargs):
+    # Recording a login does not change whether the user may authenticate.
+    if update_fields is not None and set(update_fields) <= {'last_login'}:
+        return
+    token_cache.invalidate_user(getattr(instance, api_settings.USER_ID_FIELD))
+
+
+post_save.connect(invalidate_cached_user, sender=settings.AUTH_USER_MODEL)
+post_delete.connect(invalidate_cached_user, sender=settings.AUTH_USER_MODEL)
@@ -0,0 +1,49 @@
+"""
+SQLite backend with per-connection setup.
+
+Django's own SQLite backend, plus two ``OPTIONS`` backported from Django 5.1
+so the settings keep working unchanged on the stock backend after upgrading:
+
+- ``init_command``: ``;``-separated SQL (typically ``PRAGMA`` statements) run
+  on every new connection.
+- ``transaction_mode``: ``'DEFERRED'``, ``'IMMEDIATE'`` or ``'EXCLUSIVE'``,
+  how ``atomic()`` blocks begin their transaction.
+
+A deferred transaction only takes the write lock at its first write. If
+another connection is already writing by then, SQLite gives up at once with
+"database is locked" instead of waiting ``busy_timeout`` (waiting could
+deadlock). Immediate transactions take the write lock when they begin, so
+concurrent writers queue up instead.
+"""
+from django.core.exceptions import ImproperlyConfigured
+from django.db.backends.sqlite3 import base
+
+TRANSACTION_MODES = ('DEFERRED', 'EXCLUSIVE', 'IMMEDIATE')
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+
+    def get_connection_params(self):
+        kwargs = super().get_connection_params()
+        init_command = kwargs.pop('init_command', '')
+        self.init_commands = [command.strip() for command in init_command.split(';') if command.strip()]
+        transaction_mode = kwargs.pop('transaction_mode', None)
+        if transaction_mode is not None and transaction_mode.upper() not in TRANSACTION_MODES:
+            raise ImproperlyConfigured(
+                f"settings.DATABASES['{self.alias}']['OPTIONS']['transaction_mode'] must be one of "
+                f"{', '.join(TRANSACTION_MODES)}."
+            )
+        self.transaction_mode = transaction_mode.upper() if transaction_mode else None
+        return kwargs
+
+    def get_new_connection(self, conn_params):
+        conn = super().get_new_connection(conn_params)
+        for command in self.init_commands:
+            conn.execute(command)
+        return conn
+
+    def _start_transaction_under_autocommit(self):
+        if self.transaction_mode is None:
+            self.cursor().execute('BEGIN')
+        else:
+            self.cursor().execute(f'BEGIN {self.transaction_mode}')
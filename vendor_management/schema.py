@@ -0,0 +1,97 @@
+"""
+Pre-generated OpenAPI schema.
+
+Generating the schema walks every route and its ``swagger_auto_schema``
+decorators, so it is done once, by the ``generate_openapi_schema`` command,
+into ``OPENAPI_SCHEMA_PATH``, which is committed with the code.
+
+``openapi_schema`` serves that file. ``/openapi.json`` redirects to
+``/openapi.<digest>.json``, named after a hash of the content, which browsers
+and proxies may cache for a year: a new schema gets a new URL. The Swagger UI
+and ReDoc pages load the schema through the same redirect.
+
+``generate_openapi_schema --check`` fails when the file no longer matches the
+code; the test suite runs it.
+"""
+import functools
+import hashlib
+from django.conf import settings
+from django.shortcuts import redirect
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.views.decorators.http import require_GET
+from drf_yasg import openapi
+from drf_yasg.codecs import OpenAPICodecJson, OpenAPICodecYaml
+from drf_yasg.generators import OpenAPISchemaGenerator
+from drf_yasg.views import get_schema_view
+from rest_framework import permissions
+
+API_INFO = openapi.Info(
+    title="Vendor Management System API",
+    default_version='v1',
+    description="API documentation for the Vendor Management System",
+    contact=openapi.Contact(email="musaddiq.jbs@gmail.com"),
+)
+
+JSON = 'json'
+YAML = 'yaml'
+FORMATS = (JSON, YAML)
+# Seconds a schema fetched by its digest URL may be reused without asking.
+IMMUTABLE_MAX_AGE = 365 * 24 * 60 * 60
+
+schema_view = get_schema_view(
+    API_INFO,
+    public=True,
+    permission_classes=(permissions.AllowAny,),
+    authentication_classes=[],
+)
+
+
+def generate_schema(output_format=JSON):
+    """Generate the schema from the code; returns the encoded document as bytes."""
+    schema = OpenAPISchemaGenerator(API_INFO).get_schema(request=None, public=True)
+    if output_format == JSON:
+        return OpenAPICodecJson(validators=[], pretty=True).encode(schema) + b'\n'
+    return OpenAPICodecYaml(validators=[]).encode(schema)
+
+
+@functools.lru_cache(maxsize=None)
+def load_schema():
+    """
+    Return ``(content, digest)`` of the schema file, read once per process.
+
+    Without the file (e.g. in development before the first
+    ``generate_openapi_schema``), the schema is generated instead.
+    """
+    try:
+        with open(settings.OPENAPI_SCHEMA_PATH, 'rb') as fh:
+            content = fh.read()
+    except FileNotFoundError:
+        content = generate_schema()
+    return content, hashlib.sha256(content).hexdigest()[:16]
+
+
+@require_GET
+def openapi_schema(request, digest=None):
+    content, current = load_schema()
+    if digest != current:
+        # The stable URL, or a schema this process no longer has.
+        response = redirect('openapi-schema-digest', digest=current)
+        patch_cache_control(response, no_cache=True)
+        return response
+    etag = f'"{current}"'
+    response = HttpResponse(content, content_type='application/json')
+    response['ETag'] = etag
+    patch_cache_control(response, public=True, max_age=IMMUTABLE_MAX_AGE, immutable=True)
+    return get_conditional_response(request, etag=etag, response=response)
+
+
+def docs_view(renderer):
+    """The drf_yasg ``renderer`` page, with its schema requests sent to the pre-generated file."""
+    ui_view = schema_view.with_ui(renderer, cache_timeout=0)
+
+    def view(request, *args, **kwargs):
+        if 'format' in request.GET:
+            return redirect('openapi-schema')
+        return ui_view(request, *args, **kwargs)
+    return view
@@ -10,7 +10,10 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.0/ref/settings/
 """
 
+import os
+from datetime import timedelta
 from pathlib import Path
+from django.core.exceptions import ImproperlyConfigured
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -38,12 +41,14 @@ INSTALLED_APPS = [
     'django.contrib.messages',
     'django.contrib.staticfiles',
     'rest_framework',
+    'django_filters',
     'vendors.apps.VendorsConfig',
     'rest_framework_simplejwt',
     'drf_yasg',
 ]
 
 MIDDLEWARE = [
+    'vendors.middleware.RequestMetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -53,6 +58,35 @@ MIDDLEWARE = [
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
+# What this process serves, from the VMS_ROLE environment variable: 'full'
+# (the API, the admin and the API docs) or 'api' (only the JWT-authenticated
+# API and /metrics/). API workers leave out the admin, sessions, messages,
+# static files, templates and drf_yasg, so they start faster. Run migrations
+# and serve the admin and docs from a 'full' process.
+VMS_ROLE = os.environ.get('VMS_ROLE', 'full')
+if VMS_ROLE not in ('full', 'api'):
+    raise ImproperlyConfigured(f"VMS_ROLE must be 'full' or 'api', not {VMS_ROLE!r}.")
+
+if VMS_ROLE == 'api':
+    INSTALLED_APPS = [
+        app for app in INSTALLED_APPS
+        if app not in (
+            'django.contrib.admin', 'django.contrib.sessions', 'django.contrib.messages',
+            'django.contrib.staticfiles', 'drf_yasg',
+        )
+    ]
+    # JWT-authenticated API views need neither sessions nor CSRF protection.
+    MIDDLEWARE = [
+        middleware for middleware in MIDDLEWARE
+        if middleware not in (
+            'django.contrib.sessions.middleware.SessionMiddleware',
+            'django.middleware.csrf.CsrfViewMiddleware',
+            'django.contrib.auth.middleware.AuthenticationMiddleware',
+            'django.contrib.messages.middleware.MessageMiddleware',
+            'django.middleware.clickjacking.XFrameOptionsMiddleware',
+        )
+    ]
+
 ROOT_URLCONF = 'vendor_management.urls'
 
 TEMPLATES = [
@@ -71,19 +105,97 @@ TEMPLATES = [
     },
 ]
 
+if VMS_ROLE == 'api':
+    # Responses are JSON only; nothing renders templates.
+    TEMPLATES = []
+
 WSGI_APPLICATION = 'vendor_management.wsgi.application'
 
 
 # Database
 # https://docs.djangoproject.com/en/5.0/ref/settings/#databases
 
+# vendor_management.db_backend is Django's SQLite backend plus the
+# 'init_command' and 'transaction_mode' options of Django 5.1. Every new
+# connection switches to WAL (readers no longer block the writer and vice
+# versa) with synchronous=NORMAL (durable up to the last checkpoint on power
+# loss, safe against corruption), a 64 MiB page cache, 256 MiB of memory-mapped
+# I/O and a 5 s wait for locks. Immediate transactions make concurrent writers
+# wait for that lock rather than fail with "database is locked".
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
+        'ENGINE': 'vendor_management.db_backend',
         'NAME': BASE_DIR / 'db.sqlite3',
+        # Keep connections open across requests for up to 10 minutes, and
+        # check that a reused connection still works before handing it out.
+        'CONN_MAX_AGE': 600,
+        'CONN_HEALTH_CHECKS': True,
+        'OPTIONS': {
+            'transaction_mode': 'IMMEDIATE',
+            'init_command': (
+                'PRAGMA journal_mode=WAL;'
+                'PRAGMA synchronous=NORMAL;'
+                'PRAGMA cache_size=-65536;'
+                'PRAGMA mmap_size=268435456;'
+                'PRAGMA busy_timeout=5000;'
+                'PRAGMA temp_store=MEMORY;'
+            ),
+        },
+    }
+}
+
+
+# Cache
+# https://docs.djangoproject.com/en/5.0/topics/cache/
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'vendor-management',
     }
 }
 
+# Seconds a cached vendor performance payload may live; entries are also
+# invalidated whenever the vendor or one of its purchase orders changes.
+VENDOR_PERFORMANCE_CACHE_TIMEOUT = 300
+
+# Limits for /api/vendors/performance/: vendor ids per request, and vendors per
+# grouped metrics query.
+VENDOR_PERFORMANCE_BATCH_MAX_IDS = 1000
+VENDOR_PERFORMANCE_BATCH_CHUNK_SIZE = 500
+
+# How purchase order writes reach vendor metrics: 'sync' (apply the change
+# inside the write), 'on_commit' (recompute each touched vendor once after the
+# transaction commits) or 'background' (queue the vendor for the
+# run_metric_worker command).
+VENDOR_METRICS_MODE = 'sync'
+
+# Limits for POST /api/purchase_orders/bulk/ and its acknowledge/complete variants.
+PURCHASE_ORDER_BULK_MAX_ROWS = 10000
+PURCHASE_ORDER_BULK_CHUNK_SIZE = 500
+
+# How long performance snapshots of each granularity are kept before
+# snapshot_vendor_performance rolls them up (hourly -> daily -> monthly).
+VENDOR_HISTORY_RETENTION = {
+    'hour': timedelta(days=2),
+    'day': timedelta(days=90),
+}
+
+# Requests slower than this many milliseconds are logged to the
+# 'vendors.slow_requests' logger together with their slowest SQL statements.
+# None disables the slow-request log.
+SLOW_REQUEST_THRESHOLD_MS = None
+
+# Validated JWTs and their users are cached per process for this many seconds
+# (0 disables the cache), up to JWT_AUTH_CACHE_SIZE tokens. Saving or deleting
+# a user drops its entries in the current process immediately.
+JWT_AUTH_CACHE_TTL = 60
+JWT_AUTH_CACHE_SIZE = 10000
+
+# Authenticate read-only requests from the token's claims alone, without
+# loading the user. A deactivated user keeps read access until the token expires.
+JWT_CLAIMS_ONLY_READS = False
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.0/ref/settings/#auth-password-validators
@@ -129,12 +241,20 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'vendor_management.authentication.CachedJWTAuthentication',
     ],
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',
     ],
+    'DEFAULT_PAGINATION_CLASS': 'vendors.pagination.IdCursorPagination',
+    'PAGE_SIZE': 100,
+    'DEFAULT_FILTER_BACKENDS': [
+        'django_filters.rest_framework.DjangoFilterBackend',
+    ],
 }
+if VMS_ROLE == 'api':
+    # The browsable API needs templates and static files.
+    REST_FRAMEWORK['DEFAULT_RENDERER_CLASSES'] = ['rest_framework.renderers.JSONRenderer']
 
 SWAGGER_SETTINGS = {
     'SECURITY_DEFINITIONS': {
@@ -148,4 +268,15 @@ SWAGGER_SETTINGS = {
     },
     'SECURITY_REQUIREMENTS': [{'Bearer': []}],
     'DEFAULT_AUTO_SCHEMA_CLASS': 'vendor_management.swagger_auth.SwaggerAutoSchemaWithJWT',
-}
\ No newline at end of file
+    # The docs pages load the pre-generated schema (see vendor_management.schema).
+    'SPEC_URL': 'openapi-schema',
+}
+
+REDOC_SETTINGS = {
+    'SPEC_URL': 'openapi-schema',
+}
+
+# The OpenAPI schema served at /openapi.json, written by the
+# generate_openapi_schema command. Regenerate it whenever the API changes;
+# the test suite fails while it is out of date.
+OPENAPI_SCHEMA_PATH = BASE_DIR / 'vendor_management' / 'openapi.json'
\ No newline at end of file
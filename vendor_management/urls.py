@@ -14,32 +14,28 @@ Including another URLconf
     1. Import the include() function: from django.urls import include, path
     2. Add a URL to urlpatterns:  path('blog/', include('blog.urls'))
 """
-from django.contrib import admin
+from django.conf import settings
 from django.urls import path, include
 from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
-from drf_yasg import openapi
-from drf_yasg.views import get_schema_view
-from rest_framework import permissions
-
-schema_view = get_schema_view(
-    openapi.Info(
-        title="Vendor Management System API",
-        default_version='v1',
-        description="API documentation for the Vendor Management System",
-        contact=openapi.Contact(email="musaddiq.jbs@gmail.com"),
-    ),
-    public=True,
-    permission_classes=(permissions.AllowAny,),
-    authentication_classes=[],
-)
-
+from vendors.views import prometheus_metrics
 
 
 urlpatterns = [
-    path('admin/', admin.site.urls),
     path('api/', include('vendors.urls')),
     path('api/token/', TokenObtainPairView.as_view(), name='token_obtain_pair'),
     path('api/token/refresh/', TokenRefreshView.as_view(), name='token_refresh'),
-    path('swagger/', schema_view.with_ui('swagger', cache_timeout=0), name='schema-swagger-ui'),
-    path('redoc/', schema_view.with_ui('redoc', cache_timeout=0), name='schema-redoc'),
+    path('metrics/', prometheus_metrics, name='prometheus-metrics'),
 ]
+
+# API workers (VMS_ROLE=api) serve neither the admin nor the API docs.
+if settings.VMS_ROLE == 'full':
+    from django.contrib import admin
+    from . import schema
+
+    urlpatterns += [
+        path('admin/', admin.site.urls),
+        path('openapi.json', schema.openapi_schema, name='openapi-schema'),
+        path('openapi.<slug:digest>.json', schema.openapi_schema, name='openapi-schema-digest'),
+        path('swagger/', schema.docs_view('swagger'), name='schema-swagger-ui'),
+        path('redoc/', schema.docs_view('redoc'), name='schema-redoc'),
+    ]
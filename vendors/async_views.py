@@ -0,0 +1,154 @@
+"""
+Async read endpoints.
+
+DRF views are synchronous, so under ASGI each request to them holds a worker
+thread for its whole duration. The views here are native ``async def`` Django
+views built on the async ORM and cache APIs, mounted under ``/api/async/``.
+They return the same payloads, accept the same filters, ``fields`` and
+cursors, and use the same cached JWT authentication as their DRF counterparts.
+"""
+import functools
+from django.contrib.auth import get_user_model
+from django.http import Http404, JsonResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+from django.views.decorators.http import require_GET
+from django_filters.utils import translate_validation
+from rest_framework.exceptions import APIException, AuthenticationFailed, NotAuthenticated
+from rest_framework.request import Request
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+from vendor_management.authentication import CachedJWTAuthentication
+from .filters import VendorFilter, PurchaseOrderFilter
+from .models import Vendor, PurchaseOrder
+from .fast_serializers import ValuesSerializer
+from .pagination import IdCursorPagination
+from .serializers import VendorSerializer, PurchaseOrderSerializer, PerformanceQuerySerializer
+from . import cache as performance_cache
+from . import projection
+
+_jwt = CachedJWTAuthentication()
+
+
+async def authenticate(request):
+    """Async equivalent of ``CachedJWTAuthentication.authenticate``; returns the user or ``None``."""
+    header = _jwt.get_header(request)
+    raw_token = _jwt.get_raw_token(header) if header is not None else None
+    if raw_token is None:
+        return None
+    claims_only = _jwt.use_claims_only(request)
+    cached = _jwt.get_cached(raw_token, claims_only)
+    if cached is not None:
+        return cached[0]
+    token = _jwt.get_validated_token(raw_token)
+    if claims_only:
+        user = _jwt.get_token_user(token)
+    else:
+        try:
+            user_id = token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken('Token contained no recognizable user identification')
+        try:
+            user = await get_user_model().objects.aget(**{api_settings.USER_ID_FIELD: user_id})
+        except get_user_model().DoesNotExist:
+            raise AuthenticationFailed('User not found', code='user_not_found')
+        _jwt.check_user(user, token)
+    return _jwt.remember(raw_token, claims_only, user, token)[0]
+
+
+def async_api_view(view):
+    """
+    Require a valid JWT and turn DRF exceptions raised by ``view`` into JSON
+    error responses, like ``api_view`` does for sync views.
+    """
+    @require_GET
+    @functools.wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        try:
+            request.user = await authenticate(request)
+            if request.user is None:
+                raise NotAuthenticated()
+            return await view(request, *args, **kwargs)
+        except Http404:
+            return JsonResponse({'detail': 'Not found.'}, status=404)
+        except APIException as exc:
+            detail = exc.detail if isinstance(exc.detail, (dict, list)) else {'detail': exc.detail}
+            response = JsonResponse(detail, status=exc.status_code, safe=False)
+            if isinstance(exc, (NotAuthenticated, AuthenticationFailed)):
+                response['WWW-Authenticate'] = _jwt.authenticate_header(request)
+            return response
+    return wrapper
+
+
+async def paginated_list(request, queryset, serializer_class, filterset_class):
+    """
+    Filter, paginate and serialize ``queryset`` like ``ValuesListMixin.list``.
+
+    Pages are read and their cursors encoded by ``IdCursorPagination``, so
+    cursors can be passed between the sync and async endpoints.
+    """
+    filterset = filterset_class(request.GET, queryset=queryset, request=request)
+    if not filterset.is_valid():
+        raise translate_validation(filterset.errors)
+    fields = projection.parse_fields(request.GET.get('fields'), serializer_class)
+    serializer = ValuesSerializer(serializer_class, fields=fields)
+    # The cursor is taken from the id column, whether or not it is output.
+    queryset = filterset.qs.values(*{'id', *serializer.columns})
+
+    paginator = IdCursorPagination()
+    page_queryset = paginator.get_page_queryset(queryset, Request(request))
+    page = paginator.set_page([row async for row in page_queryset])
+    return JsonResponse({
+        'next': paginator.get_next_link(),
+        'previous': paginator.get_previous_link(),
+        'results': serializer.serialize(page),
+    })
+
+
+async def detail(request, queryset, serializer_class, pk):
+    fields = projection.parse_fields(request.GET.get('fields'), serializer_class)
+    try:
+        instance = await projection.project(queryset, fields).aget(pk=pk)
+    except queryset.model.DoesNotExist:
+        raise Http404
+    return JsonResponse(serializer_class(instance, fields=fields).data)
+
+
+@async_api_view
+async def vendor_list(request):
+    """Async ``GET /api/vendors/``."""
+    return await paginated_list(request, Vendor.objects.all(), VendorSerializer, VendorFilter)
+
+
+@async_api_view
+async def vendor_detail(request, pk):
+    """Async ``GET /api/vendors/{id}/``."""
+    return await detail(request, Vendor.objects.all(), VendorSerializer, pk)
+
+
+@async_api_view
+async def purchase_order_list(request):
+    """Async ``GET /api/purchase_orders/``."""
+    return await paginated_list(request, PurchaseOrder.objects.all(), PurchaseOrderSerializer, PurchaseOrderFilter)
+
+
+@async_api_view
+async def purchase_order_detail(request, pk):
+    """Async ``GET /api/purchase_orders/{id}/``."""
+    return await detail(request, PurchaseOrder.objects.all(), PurchaseOrderSerializer, pk)
+
+
+@async_api_view
+async def vendor_performance(request, vendor_id):
+    """Async ``GET /api/vendors/{vendor_id}/performance/``, sharing its cache and ETags."""
+    query = PerformanceQuerySerializer(data=request.GET)
+    query.is_valid(raise_exception=True)
+    entry = await performance_cache.aget_vendor_performance(vendor_id, query.validated_data.get('window'))
+    if entry is None:
+        raise Http404
+    response = JsonResponse(entry['data'])
+    response['ETag'] = entry['etag']
+    response['Last-Modified'] = http_date(entry['last_modified'])
+    return get_conditional_response(
+        request, etag=entry['etag'], last_modified=entry['last_modified'], response=response,
+    )
@@ -0,0 +1,515 @@
+"""
+Benchmark harness.
+
+Drives the real URL routes through Django's test client against whatever data
+is in the database (see the ``generate_synthetic_data`` command) and reports
+latency percentiles, queries per request and throughput per scenario. With
+``concurrency`` above one, requests are issued concurrently through
+``AsyncClient``, which serves them through Django's ASGI request handler, so
+sync and async views can be compared under the same load. Results are plain
+dicts so they can be written as JSON and compared between runs.
+
+``benchmark_database_concurrency`` measures the database layer on its own:
+concurrent readers and writers against scratch SQLite files, once with the
+stock backend's defaults and once with the configured ``DATABASES`` options.
+
+``benchmark_startup`` measures cold starts of fresh worker processes in each
+``VMS_ROLE``: import time (``python -X importtime``) and the time until the
+first request is answered.
+"""
+import asyncio
+import json
+import math
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from asgiref.sync import async_to_sync, sync_to_async
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.db import DEFAULT_DB_ALIAS, OperationalError, connection
+from django.db.utils import ConnectionHandler
+from django.test import AsyncClient, Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework_simplejwt.tokens import RefreshToken
+from .fast_serializers import ValuesSerializer
+from .models import Vendor, PurchaseOrder
+from .serializers import VendorSerializer, PurchaseOrderSerializer
+from . import cache as performance_cache
+
+BENCHMARK_USERNAME = 'benchmark'
+# p95 latency budgets for searching 100k vendors: one vendor by name and code,
+# and a short prefix matching most of them.
+SEARCH_TARGET_P95_MS = 50
+SEARCH_PREFIX_TARGET_P95_MS = 250
+SCORECARD_VENDORS = 200
+# Rows in the scratch table of benchmark_database_concurrency, spread over
+# this many vendors.
+DATABASE_BENCHMARK_ROWS = 10000
+DATABASE_BENCHMARK_VENDORS = 100
+
+
+class Scenario:
+    """
+    One request to time. ``before`` runs untimed ahead of every request.
+    ``request`` returns a coroutine when given an ``AsyncClient``.
+    ``target_p95_ms`` is an optional latency budget (see ``missed_targets``).
+    """
+
+    def __init__(self, name, method, path, data=None, before=None, target_p95_ms=None):
+        self.name = name
+        self.method = method
+        self.path = path
+        self.data = data
+        self.before = before
+        self.target_p95_ms = target_p95_ms
+
+    def request(self, client, iteration, headers=None):
+        data = self.data(iteration) if callable(self.data) else self.data
+        if self.method == 'get':
+            return client.get(self.path, data, headers=headers)
+        return getattr(client, self.method)(
+            self.path, json.dumps(data), content_type='application/json', headers=headers,
+        )
+
+
+def default_scenarios():
+    """Scenarios covering the list, detail, metric-write and performance paths."""
+    vendor = (
+        Vendor.objects.filter(metric_aggregate__total_count__gt=0)
+        .order_by('-metric_aggregate__total_count', 'id').first()
+    )
+    if vendor is None:
+        return []
+    po = PurchaseOrder.objects.filter(vendor=vendor, status='completed').order_by('id').first()
+    performance_url = reverse('vendor-performance', args=[vendor.id])
+    # A scorecard page's worth of vendors.
+    scorecard_ids = list(Vendor.objects.order_by('id').values_list('id', flat=True)[:SCORECARD_VENDORS])
+    async_performance_url = reverse('async-vendor-performance', args=[vendor.id])
+    scenarios = [
+        Scenario('vendor_list', 'get', reverse('vendor-list')),
+        Scenario('vendor_detail', 'get', reverse('vendor-detail', args=[vendor.id])),
+        Scenario('purchase_order_list', 'get', reverse('purchaseorder-list')),
+        Scenario('purchase_order_list_by_vendor', 'get', reverse('purchaseorder-list'),
+                 {'vendor': vendor.id, 'status': 'completed'}),
+        Scenario('vendor_performance_cached', 'get', performance_url),
+        Scenario('vendor_performance_uncached', 'get', performance_url,
+                 before=lambda: performance_cache.invalidate_vendor_performance(vendor.id)),
+        Scenario('vendor_performance_window_uncached', 'get', performance_url, {'window': '90d'},
+                 before=lambda: performance_cache.invalidate_vendor_performance(vendor.id)),
+        Scenario('vendor_performance_batch_uncached', 'post', reverse('vendor-performance-batch'),
+                 {'ids': scorecard_ids},
+                 before=lambda: performance_cache.invalidate_vendor_performance(*scorecard_ids)),
+        # Budgets hold at 100k vendors (generate_synthetic_data --vendors 100000).
+        Scenario('vendor_search', 'get', reverse('vendor-search'), {'q': f'{vendor.name} {vendor.vendor_code}'},
+                 target_p95_ms=SEARCH_TARGET_P95_MS),
+        Scenario('vendor_search_prefix', 'get', reverse('vendor-search'), {'q': vendor.name[:3], 'page_size': 20},
+                 target_p95_ms=SEARCH_PREFIX_TARGET_P95_MS),
+        Scenario('vendor_list_async', 'get', reverse('async-vendor-list')),
+        Scenario('vendor_detail_async', 'get', reverse('async-vendor-detail', args=[vendor.id])),
+        Scenario('purchase_order_list_async', 'get', reverse('async-purchaseorder-list')),
+        Scenario('purchase_order_list_by_vendor_async', 'get', reverse('async-purchaseorder-list'),
+                 {'vendor': vendor.id, 'status': 'completed'}),
+        Scenario('vendor_performance_cached_async', 'get', async_performance_url),
+        Scenario('vendor_performance_uncached_async', 'get', async_performance_url,
+                 before=lambda: performance_cache.invalidate_vendor_performance(vendor.id)),
+    ]
+    if po is not None:
+        # Alternating the rating forces a real metric update on every request.
+        scenarios.append(Scenario(
+            'purchase_order_rate', 'patch', reverse('purchaseorder-detail', args=[po.id]),
+            lambda iteration: {'quality_rating': 4.0 if iteration % 2 else 3.0},
+        ))
+    return scenarios
+
+
+def auth_headers():
+    """Request headers authenticating as the benchmark user with a real JWT."""
+    user, created = User.objects.get_or_create(username=BENCHMARK_USERNAME)
+    if created:
+        user.set_unusable_password()
+        user.save()
+    return {'Authorization': f'Bearer {RefreshToken.for_user(user).access_token}'}
+
+
+def percentile(values, pct):
+    """Nearest-rank percentile of ``values``."""
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    return ordered[max(0, math.ceil(pct / 100 * len(ordered)) - 1)]
+
+
+def run_scenario(client, scenario, iterations=100, warmup=5, headers=None):
+    for iteration in range(warmup):
+        if scenario.before:
+            scenario.before()
+        scenario.request(client, iteration, headers)
+
+    timings = []
+    queries = 0
+    statuses = set()
+    for iteration in range(iterations):
+        if scenario.before:
+            scenario.before()
+        with CaptureQueriesContext(connection) as context:
+            start = time.perf_counter()
+            response = scenario.request(client, iteration, headers)
+            timings.append((time.perf_counter() - start) * 1000)
+        queries += len(context.captured_queries)
+        statuses.add(response.status_code)
+    return summarize(scenario, timings, queries, statuses, sum(timings) / 1000, concurrency=1)
+
+
+async def arun_scenario(client, scenario, iterations=100, warmup=5, concurrency=10, headers=None):
+    """Like ``run_scenario``, with up to ``concurrency`` requests in flight."""
+    before = sync_to_async(scenario.before) if scenario.before else None
+    for iteration in range(warmup):
+        if before:
+            await before()
+        await scenario.request(client, iteration, headers)
+
+    timings = []
+    statuses = set()
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def timed_request(iteration):
+        async with semaphore:
+            if before:
+                await before()
+            start = time.perf_counter()
+            response = await scenario.request(client, iteration, headers)
+            timings.append((time.perf_counter() - start) * 1000)
+            statuses.add(response.status_code)
+
+    # Thread-sensitive ORM calls all run on the thread that entered
+    # async_to_sync, so the capture is only touched from that thread too.
+    context = CaptureQueriesContext(connection)
+    await sync_to_async(context.__enter__)()
+    try:
+        start = time.perf_counter()
+        await asyncio.gather(*(timed_request(iteration) for iteration in range(iterations)))
+        elapsed = time.perf_counter() - start
+    finally:
+        await sync_to_async(context.__exit__)(None, None, None)
+    queries = await sync_to_async(len)(context)
+    return summarize(scenario, timings, queries, statuses, elapsed, concurrency)
+
+
+def summarize(scenario, timings, queries, statuses, elapsed, concurrency):
+    iterations = len(timings)
+    return {
+        'target_p95_ms': scenario.target_p95_ms,
+        'method': scenario.method.upper(),
+        'path': scenario.path,
+        'iterations': iterations,
+        'concurrency': concurrency,
+        'status_codes': sorted(statuses),
+        'p50_ms': round(percentile(timings, 50), 3),
+        'p95_ms': round(percentile(timings, 95), 3),
+        'p99_ms': round(percentile(timings, 99), 3),
+        'mean_ms': round(sum(timings) / iterations, 3) if iterations else 0.0,
+        'queries_per_request': round(queries / iterations, 2) if iterations else 0.0,
+        'throughput_rps': round(iterations / elapsed, 1) if elapsed else 0.0,
+    }
+
+
+def run_benchmarks(scenarios, iterations=100, warmup=5, concurrency=1):
+    """
+    Run each scenario in turn; returns ``{scenario_name: result}``.
+
+    With ``concurrency`` above one the requests go through an ``AsyncClient``.
+    """
+    headers = auth_headers()
+    if concurrency > 1:
+        client = AsyncClient()
+
+        async def run_all():
+            return {
+                scenario.name: await arun_scenario(client, scenario, iterations, warmup, concurrency, headers)
+                for scenario in scenarios
+            }
+        return async_to_sync(run_all)()
+    client = Client()
+    return {scenario.name: run_scenario(client, scenario, iterations, warmup, headers) for scenario in scenarios}
+
+
+def benchmark_serializers(rows=5000, repeat=3):
+    """
+    Compare rows serialized per second by the ``ModelSerializer`` and the
+    ``ValuesSerializer`` fast path, from query to output, on up to ``rows``
+    rows of each model. Each figure is the best of ``repeat`` runs.
+    """
+    results = {}
+    for serializer_class in (VendorSerializer, PurchaseOrderSerializer):
+        queryset = serializer_class.Meta.model.objects.order_by('id')[:rows]
+        values_serializer = ValuesSerializer(serializer_class)
+        timings = {'model_serializer': [], 'values_serializer': []}
+        count = 0
+        for _ in range(repeat):
+            start = time.perf_counter()
+            count = len(serializer_class(queryset, many=True).data)
+            timings['model_serializer'].append(time.perf_counter() - start)
+            start = time.perf_counter()
+            values_serializer.serialize(queryset.values(*values_serializer.columns))
+            timings['values_serializer'].append(time.perf_counter() - start)
+        best = {name: min(values) for name, values in timings.items()}
+        results[serializer_class.__name__] = {
+            'rows': count,
+            **{f'{name}_rows_per_second': round(count / seconds, 1) for name, seconds in best.items()},
+            'speedup': round(best['model_serializer'] / best['values_serializer'], 2),
+        }
+    return results
+
+
+def missed_targets(results):
+    """List the scenarios of ``results`` whose p95 latency exceeds their target."""
+    return [
+        f'{name}: p95 {result["p95_ms"]}ms exceeds the {result["target_p95_ms"]}ms target'
+        for name, result in results.items()
+        if result.get('target_p95_ms') is not None and result['p95_ms'] > result['target_p95_ms']
+    ]
+
+
+def compare_results(results, baseline, threshold=0.2):
+    """
+    List regressions of ``results`` against ``baseline``.
+
+    A scenario regresses when its p95 latency grows by more than ``threshold``
+    (a fraction) or when it makes more queries per request than before.
+    Scenarios missing from either side are ignored.
+    """
+    regressions = []
+    for name, result in results.items():
+        previous = baseline.get(name)
+        if previous is None:
+            continue
+        if result['p95_ms'] > previous['p95_ms'] * (1 + threshold):
+            regressions.append(f'{name}: p95 {previous["p95_ms"]}ms -> {result["p95_ms"]}ms')
+        if result['queries_per_request'] > previous['queries_per_request']:
+            regressions.append(
+                f'{name}: queries/request {previous["queries_per_request"]} -> {result["queries_per_request"]}'
+            )
+    return regressions
+
+
+def database_profiles():
+    """The stock SQLite backend with its defaults, and the configured default database."""
+    configured = settings.DATABASES[DEFAULT_DB_ALIAS]
+    return {
+        'defaults': {'ENGINE': 'django.db.backends.sqlite3'},
+        'configured': {'ENGINE': configured['ENGINE'], 'OPTIONS': configured.get('OPTIONS', {})},
+    }
+
+
+@contextmanager
+def _transaction(conn):
+    """What an outermost ``atomic()`` block does, for a connection outside ``django.db.connections``."""
+    conn.set_autocommit(False, force_begin_transaction_with_broken_autocommit=True)
+    try:
+        yield
+        conn.commit()
+    except BaseException:
+        conn.rollback()
+        raise
+    finally:
+        conn.set_autocommit(True)
+
+
+def _read(conn, iteration):
+    with conn.cursor() as cursor:
+        cursor.execute(
+            'SELECT COUNT(*), SUM(total) FROM benchmark_counter WHERE vendor_id = %s',
+            [iteration % DATABASE_BENCHMARK_VENDORS],
+        )
+        cursor.fetchone()
+
+
+def _write(conn, iteration):
+    # Read, then write in one transaction, like applying a metric delta.
+    pk = iteration * 7919 % DATABASE_BENCHMARK_ROWS + 1
+    with _transaction(conn), conn.cursor() as cursor:
+        cursor.execute('SELECT total FROM benchmark_counter WHERE id = %s', [pk])
+        (total,) = cursor.fetchone()
+        cursor.execute('UPDATE benchmark_counter SET total = %s WHERE id = %s', [total + 1, pk])
+
+
+def _prepare_database(conn):
+    with _transaction(conn), conn.cursor() as cursor:
+        cursor.execute(
+            'CREATE TABLE benchmark_counter (id INTEGER PRIMARY KEY, vendor_id INTEGER NOT NULL, '
+            'total INTEGER NOT NULL, payload TEXT NOT NULL)'
+        )
+        cursor.execute('CREATE INDEX benchmark_counter_vendor ON benchmark_counter (vendor_id)')
+        cursor.executemany(
+            'INSERT INTO benchmark_counter (id, vendor_id, total, payload) VALUES (%s, %s, 0, %s)',
+            [(pk, pk % DATABASE_BENCHMARK_VENDORS, 'x' * 200) for pk in range(1, DATABASE_BENCHMARK_ROWS + 1)],
+        )
+    with conn.cursor() as cursor:
+        cursor.execute('PRAGMA journal_mode')
+        return cursor.fetchone()[0]
+
+
+def _run_worker(handler, work, offset, deadline, totals, lock):
+    # ConnectionHandler connections are per thread, so each worker has its own.
+    conn = handler[DEFAULT_DB_ALIAS]
+    done = errors = 0
+    try:
+        while time.perf_counter() < deadline:
+            try:
+                work(conn, offset + done + errors)
+            except OperationalError:
+                # "database is locked"
+                errors += 1
+            else:
+                done += 1
+    finally:
+        conn.close()
+    with lock:
+        totals[work.__name__] += done
+        totals['errors'] += errors
+
+
+def benchmark_database_concurrency(readers=4, writers=4, duration=2.0, profiles=None):
+    """
+    Run ``readers`` and ``writers`` threads for ``duration`` seconds against a
+    fresh SQLite file per profile of ``profiles`` (default:
+    ``database_profiles()``), and report reads and writes per second and the
+    operations that failed with "database is locked".
+
+    Readers aggregate one vendor's rows; writers read a row and update it in
+    one transaction.
+    """
+    profiles = profiles or database_profiles()
+    results = {}
+    with tempfile.TemporaryDirectory() as directory:
+        for name, profile in profiles.items():
+            handler = ConnectionHandler({
+                DEFAULT_DB_ALIAS: {**profile, 'NAME': os.path.join(directory, f'{name}.sqlite3')},
+            })
+            conn = handler[DEFAULT_DB_ALIAS]
+            journal_mode = _prepare_database(conn)
+            conn.close()
+
+            totals = {'_read': 0, '_write': 0, 'errors': 0}
+            lock = threading.Lock()
+            deadline = time.perf_counter() + duration
+            threads = [
+                threading.Thread(target=_run_worker, args=(handler, work, index * 1000003, deadline, totals, lock))
+                for index, work in enumerate([_read] * readers + [_write] * writers)
+            ]
+            start = time.perf_counter()
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            elapsed = time.perf_counter() - start
+            results[name] = {
+                'engine': profile['ENGINE'],
+                'journal_mode': journal_mode,
+                'readers': readers,
+                'writers': writers,
+                'reads_per_second': round(totals['_read'] / elapsed, 1),
+                'writes_per_second': round(totals['_write'] / elapsed, 1),
+                'lock_errors': totals['errors'],
+            }
+    return results
+
+
+# Modules that API workers should not need; benchmark_startup reports which a
+# cold start loaded.
+STARTUP_WATCHED_MODULES = (
+    'drf_yasg', 'django.contrib.admin', 'django.contrib.sessions', 'django.contrib.messages',
+    'django.contrib.staticfiles', 'rest_framework.templatetags',
+)
+# Run in a fresh interpreter: load the WSGI application, then answer one request.
+STARTUP_SCRIPT = """
+import io, json, os, sys, time
+start = time.perf_counter()
+from django.core.wsgi import get_wsgi_application
+application = get_wsgi_application()
+ready = time.perf_counter()
+path, _, query = os.environ['VMS_STARTUP_PATH'].partition('?')
+environ = {
+    'REQUEST_METHOD': 'GET', 'PATH_INFO': path, 'QUERY_STRING': query, 'SERVER_NAME': 'localhost',
+    'SERVER_PORT': '80', 'SERVER_PROTOCOL': 'HTTP/1.1', 'wsgi.url_scheme': 'http',
+    'wsgi.input': io.BytesIO(), 'wsgi.errors': sys.stderr, **json.loads(os.environ['VMS_STARTUP_HEADERS']),
+}
+statuses = []
+response = application(environ, lambda status, headers, exc_info=None: statuses.append(status))
+b''.join(response)
+response.close()
+done = time.perf_counter()
+print(json.dumps({
+    'setup_ms': (ready - start) * 1000,
+    'first_response_ms': (done - start) * 1000,
+    'status_code': int(statuses[0].split()[0]),
+    'modules': len(sys.modules),
+    'loaded': [name for name in json.loads(os.environ['VMS_STARTUP_WATCHED']) if name in sys.modules],
+}))
+"""
+
+
+def _run_startup(role, path, headers, importtime=False):
+    env = {
+        **os.environ,
+        'DJANGO_SETTINGS_MODULE': settings.SETTINGS_MODULE,
+        'VMS_ROLE': role,
+        'VMS_STARTUP_PATH': path,
+        'VMS_STARTUP_HEADERS': json.dumps({
+            'HTTP_' + name.upper().replace('-', '_'): value for name, value in headers.items()
+        }),
+        'VMS_STARTUP_WATCHED': json.dumps(STARTUP_WATCHED_MODULES),
+    }
+    command = [sys.executable, *(['-X', 'importtime'] if importtime else []), '-c', STARTUP_SCRIPT]
+    start = time.perf_counter()
+    process = subprocess.run(command, env=env, cwd=settings.BASE_DIR, capture_output=True, text=True, check=True)
+    wall_ms = (time.perf_counter() - start) * 1000
+    return wall_ms, json.loads(process.stdout.splitlines()[-1]), process.stderr
+
+
+def import_time_ms(importtime_output):
+    """Total of the ``self`` column of ``python -X importtime`` output, in milliseconds."""
+    total = 0
+    for line in importtime_output.splitlines():
+        if line.startswith('import time:'):
+            field = line.split(':', 1)[1].split('|')[0].strip()
+            if field.isdigit():
+                total += int(field)
+    return total / 1000
+
+
+def benchmark_startup(roles=('full', 'api'), repeat=5, path=None, headers=None):
+    """
+    Start ``repeat`` fresh worker processes per ``VMS_ROLE`` in ``roles``, each
+    loading the WSGI application and answering one ``GET path`` (default: the
+    vendor list, authenticated as the benchmark user). Reports the median
+    process wall time, application setup time and time to first response,
+    plus the import time and modules of one extra run under
+    ``python -X importtime``.
+    """
+    if path is None:
+        path = reverse('vendor-list') + '?page_size=1'
+        headers = auth_headers() if headers is None else headers
+    headers = headers or {}
+    results = {}
+    for role in roles:
+        runs = [_run_startup(role, path, headers) for _ in range(repeat)]
+        _, profiled, importtime_output = _run_startup(role, path, headers, importtime=True)
+        results[role] = {
+            'path': path,
+            'repeat': repeat,
+            'status_codes': sorted({run['status_code'] for _, run, _ in runs}),
+            'wall_ms': round(statistics.median(wall_ms for wall_ms, _, _ in runs), 1),
+            'setup_ms': round(statistics.median(run['setup_ms'] for _, run, _ in runs), 1),
+            'first_response_ms': round(statistics.median(run['first_response_ms'] for _, run, _ in runs), 1),
+            'import_ms': round(import_time_ms(importtime_output), 1),
+            'modules': profiled['modules'],
+            'loaded': profiled['loaded'],
+        }
+    return results
@@ -0,0 +1,146 @@
+"""
+Bulk purchase order operations.
+
+Rows are written with ``bulk_create`` (or status changes with one ``UPDATE``
+per vendor) and vendor metrics are recomputed once per affected vendor
+afterwards, rather than once per row through the ``post_save`` handlers.
+Created orders get their line items written with them.
+"""
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from .models import PurchaseOrder
+from .serializers import PurchaseOrderSerializer
+from . import cache as performance_cache
+from . import jobs
+from . import lines
+
+
+# Reported for a row the database rejected after validation; the database's
+# own message names tables and columns and is not sent to clients.
+CONFLICT_ERROR = 'Could not be created: it conflicts with existing purchase orders.'
+
+
+def chunked(items, size):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def ingest_purchase_orders(rows, chunk_size=None):
+    """
+    Validate and create purchase orders from a list of dicts, ``chunk_size``
+    rows at a time.
+
+    Returns ``(created, errors)``: ``created`` is a list of ``(index, po)``
+    pairs and ``errors`` maps row indexes to validation errors. Invalid rows
+    are skipped without affecting the rest of the batch; a payload that is not
+    a list (or is too long) raises ``ValidationError``.
+    """
+    chunk_size = chunk_size or getattr(settings, 'PURCHASE_ORDER_BULK_CHUNK_SIZE', 500)
+    serializer = PurchaseOrderSerializer(
+        data=rows, many=True, max_length=getattr(settings, 'PURCHASE_ORDER_BULK_MAX_ROWS', 10000),
+        context={'chunk_size': chunk_size},
+    )
+    serializer.is_valid(raise_exception=True)
+    errors = dict(serializer.row_errors)
+    created = []
+
+    with transaction.atomic():
+        for chunk in chunked(serializer.validated_data, chunk_size):
+            created.extend(_create_chunk(chunk, errors))
+        vendor_ids = {po.vendor_id for _, po in created}
+        jobs.recompute_vendors(vendor_ids)
+    performance_cache.invalidate_vendor_performance(*vendor_ids)
+    return created, errors
+
+
+def _create_chunk(chunk, errors):
+    try:
+        with transaction.atomic():
+            orders = PurchaseOrder.objects.bulk_create([PurchaseOrder(**data) for _, data in chunk])
+            lines.sync_lines(orders, replace=False)
+        return [(index, po) for (index, _), po in zip(chunk, orders)]
+    except IntegrityError:
+        pass
+    # Something in the chunk violated a constraint (e.g. a po_number created
+    # concurrently); retry row by row so only the offending rows are rejected.
+    created = []
+    for index, data in chunk:
+        try:
+            with transaction.atomic():
+                po, = PurchaseOrder.objects.bulk_create([PurchaseOrder(**data)])
+                lines.sync_lines([po], replace=False)
+        except IntegrityError:
+            errors[index] = {'non_field_errors': [CONFLICT_ERROR]}
+        else:
+            created.append((index, po))
+    return created
+
+
+# Outcomes reported per reference by transition_purchase_orders.
+UPDATED = 'updated'
+NOT_FOUND = 'not_found'
+INVALID_TRANSITION = 'invalid_transition'
+
+
+def transition_purchase_orders(new_status, ids=(), po_numbers=(), chunk_size=None):
+    """
+    Move the purchase orders referenced by ``ids`` and ``po_numbers`` to ``new_status``.
+
+    Orders allowed to make the transition (see ``PurchaseOrder.TRANSITIONS``)
+    are changed with one ``UPDATE`` per vendor; acknowledging also records the
+    acknowledgment date. Vendors whose metrics the transition affects are then
+    recomputed once each. Returns one result dict per reference, in order, with
+    ``result`` set to ``updated``, ``not_found``, ``already_<status>`` or
+    ``invalid_transition``.
+    """
+    chunk_size = chunk_size or getattr(settings, 'PURCHASE_ORDER_BULK_CHUNK_SIZE', 500)
+    sources = [old for old, new in PurchaseOrder.TRANSITIONS if new == new_status]
+    values = {'status': new_status}
+    if new_status == PurchaseOrder.ACKNOWLEDGED:
+        values['acknowledgment_date'] = timezone.now()
+
+    with transaction.atomic():
+        rows = {}
+        for lookup, references in (('pk__in', ids), ('po_number__in', po_numbers)):
+            for chunk in chunked(list(references), chunk_size):
+                orders = PurchaseOrder.objects.select_for_update().filter(**{lookup: chunk})
+                rows.update((row['id'], row) for row in orders.values('id', 'po_number', 'vendor_id', 'status'))
+
+        outcomes = {}
+        updates = {}
+        for pk, row in rows.items():
+            if row['status'] == new_status:
+                outcomes[pk] = f'already_{new_status}'
+            elif row['status'] in sources:
+                outcomes[pk] = UPDATED
+                updates.setdefault(row['vendor_id'], []).append(pk)
+            else:
+                outcomes[pk] = INVALID_TRANSITION
+        for vendor_ids in updates.values():
+            for chunk in chunked(vendor_ids, chunk_size):
+                PurchaseOrder.objects.filter(pk__in=chunk, status__in=sources).update(**values)
+
+        affected = {
+            rows[pk]['vendor_id'] for pks in updates.values() for pk in pks
+            if PurchaseOrder.TRANSITIONS[(rows[pk]['status'], new_status)]
+        }
+        jobs.recompute_vendors(affected)
+    performance_cache.invalidate_vendor_performance(*affected)
+
+    by_number = {row['po_number']: row for row in rows.values()}
+    results = []
+    for field, references, found in (('id', ids, rows), ('po_number', po_numbers, by_number)):
+        for reference in references:
+            row = found.get(reference)
+            if row is None:
+                results.append({field: reference, 'result': NOT_FOUND})
+                continue
+            outcome = outcomes[row['id']]
+            results.append({
+                'id': row['id'],
+                'po_number': row['po_number'],
+                'result': outcome,
+                'status': new_status if outcome == UPDATED else row['status'],
+            })
+    return results
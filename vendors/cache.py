@@ -0,0 +1,177 @@
+"""
+Read-through cache for vendor performance payloads.
+
+Entries are keyed by vendor and time window and dropped by the
+``PurchaseOrder``/``Vendor`` signal handlers whenever a write could change the
+vendor's metrics. Windowed entries also expire when the day changes. Each entry
+carries an ETag and a Last-Modified timestamp so that polling clients can be
+answered with a 304 straight from the cache.
+"""
+import hashlib
+import json
+import time
+from django.conf import settings
+from django.core.cache import caches
+from django.utils import timezone
+from . import metrics
+
+PERFORMANCE_KEY = 'vendor-performance:{vendor_id}'
+STATS_KEY = 'vendor-performance-stats:{name}'
+
+
+def get_cache():
+    return caches[getattr(settings, 'VENDOR_PERFORMANCE_CACHE', 'default')]
+
+
+def performance_key(vendor_id, window=None):
+    key = PERFORMANCE_KEY.format(vendor_id=vendor_id)
+    return f'{key}:{window}' if window else key
+
+
+def _is_current(entry, window):
+    # A window moves with the calendar, so its entry is only good for the day it was computed.
+    return window is None or entry['day'] == timezone.localdate().isoformat()
+
+
+def _make_entry(data, window):
+    entry = {'data': data, 'etag': make_etag(data), 'last_modified': int(time.time())}
+    if window is not None:
+        entry['day'] = timezone.localdate().isoformat()
+    return entry
+
+
+def make_etag(data):
+    digest = hashlib.sha1(json.dumps(data, sort_keys=True).encode()).hexdigest()
+    return f'"{digest}"'
+
+
+def get_vendor_performance(vendor_id, window=None):
+    """
+    Return the cached performance entry for a vendor, computing it on a miss.
+
+    ``window`` is one of ``metrics.WINDOWS`` (default: lifetime metrics). The
+    entry is a dict with ``data``, ``etag`` and ``last_modified`` (a Unix
+    timestamp). Returns ``None`` if the vendor does not exist.
+    """
+    cache = get_cache()
+    entry = cache.get(performance_key(vendor_id, window))
+    if entry is not None and _is_current(entry, window):
+        _increment('hits')
+        return entry
+    _increment('misses')
+    if window is None:
+        data = metrics.compute_vendor_metrics(vendor_id)
+    else:
+        data = metrics.compute_window_metrics(vendor_id, metrics.WINDOWS[window])
+    if data is None:
+        return None
+    entry = _make_entry(data, window)
+    cache.set(performance_key(vendor_id, window), entry, getattr(settings, 'VENDOR_PERFORMANCE_CACHE_TIMEOUT', 300))
+    return entry
+
+
+async def aget_vendor_performance(vendor_id, window=None):
+    """Async version of ``get_vendor_performance``."""
+    cache = get_cache()
+    entry = await cache.aget(performance_key(vendor_id, window))
+    if entry is not None and _is_current(entry, window):
+        await _aincrement('hits')
+        return entry
+    await _aincrement('misses')
+    if window is None:
+        data = await metrics.acompute_vendor_metrics(vendor_id)
+    else:
+        data = await metrics.acompute_window_metrics(vendor_id, metrics.WINDOWS[window])
+    if data is None:
+        return None
+    entry = _make_entry(data, window)
+    await cache.aset(
+        performance_key(vendor_id, window), entry, getattr(settings, 'VENDOR_PERFORMANCE_CACHE_TIMEOUT', 300),
+    )
+    return entry
+
+
+def get_many_vendor_performance(vendor_ids, window=None, chunk_size=None):
+    """
+    Batch version of ``get_vendor_performance``.
+
+    Returns ``{vendor_id: entry}`` for the vendors of ``vendor_ids`` that
+    exist. Cached entries are read with one ``get_many``; the rest are computed
+    with one grouped query per ``chunk_size`` vendors and cached with one
+    ``set_many``.
+    """
+    chunk_size = chunk_size or getattr(settings, 'VENDOR_PERFORMANCE_BATCH_CHUNK_SIZE', 500)
+    cache = get_cache()
+    vendor_ids = list(dict.fromkeys(vendor_ids))
+    keys = {vendor_id: performance_key(vendor_id, window) for vendor_id in vendor_ids}
+    cached = cache.get_many(list(keys.values()))
+    entries = {}
+    for vendor_id, key in keys.items():
+        entry = cached.get(key)
+        if entry is not None and _is_current(entry, window):
+            entries[vendor_id] = entry
+    missing = [vendor_id for vendor_id in vendor_ids if vendor_id not in entries]
+    if entries:
+        _increment('hits', len(entries))
+    if missing:
+        _increment('misses', len(missing))
+
+    days = metrics.WINDOWS[window] if window is not None else None
+    computed = {}
+    for start in range(0, len(missing), chunk_size):
+        for vendor_id, data in metrics.compute_many_vendor_metrics(missing[start:start + chunk_size], days).items():
+            computed[vendor_id] = _make_entry(data, window)
+    if computed:
+        cache.set_many(
+            {keys[vendor_id]: entry for vendor_id, entry in computed.items()},
+            getattr(settings, 'VENDOR_PERFORMANCE_CACHE_TIMEOUT', 300),
+        )
+    entries.update(computed)
+    return {vendor_id: entries[vendor_id] for vendor_id in vendor_ids if vendor_id in entries}
+
+
+def invalidate_vendor_performance(*vendor_ids):
+    get_cache().delete_many([
+        performance_key(vendor_id, window)
+        for vendor_id in vendor_ids if vendor_id is not None
+        for window in (None, *metrics.WINDOWS)
+    ])
+
+
+def _increment(name, delta=1):
+    cache = get_cache()
+    key = STATS_KEY.format(name=name)
+    # add() is a no-op when the counter already exists, so concurrent first
+    # increments cannot reset each other.
+    cache.add(key, 0, None)
+    try:
+        cache.incr(key, delta)
+    except ValueError:
+        cache.set(key, delta, None)
+
+
+async def _aincrement(name):
+    cache = get_cache()
+    key = STATS_KEY.format(name=name)
+    await cache.aadd(key, 0, None)
+    try:
+        await cache.aincr(key)
+    except ValueError:
+        await cache.aset(key, 1, None)
+
+
+def cache_stats():
+    cache = get_cache()
+    counts = cache.get_many([STATS_KEY.format(name=name) for name in ('hits', 'misses')])
+    hits = counts.get(STATS_KEY.format(name='hits'), 0)
+    misses = counts.get(STATS_KEY.format(name='misses'), 0)
+    lookups = hits + misses
+    return {
+        'hits': hits,
+        'misses': misses,
+        'hit_rate': hits / lookups if lookups else 0,
+    }
+
+
+def reset_cache_stats():
+    get_cache().delete_many([STATS_KEY.format(name=name) for name in ('hits', 'misses')])
@@ -0,0 +1,33 @@
+"""
+API documentation annotations, loaded only where the docs are served.
+
+``swagger_auto_schema`` and ``openapi`` are drf_yasg's when ``drf_yasg`` is
+installed, as the schema generator and the docs pages need them. API workers
+(``VMS_ROLE=api``) leave it out; there the decorator returns the view
+unchanged and ``openapi`` builds nothing, so drf_yasg is never imported.
+"""
+from django.conf import settings
+
+
+class _Stub:
+    """Stands in for ``drf_yasg.openapi``: any attribute or call returns the stub."""
+
+    def __getattr__(self, name):
+        return self
+
+    def __call__(self, *args, **kwargs):
+        return self
+
+
+def _swagger_auto_schema(*args, **kwargs):
+    def decorator(view):
+        return view
+    return decorator
+
+
+if 'drf_yasg' in settings.INSTALLED_APPS:
+    from drf_yasg import openapi
+    from drf_yasg.utils import swagger_auto_schema
+else:
+    openapi = _Stub()
+    swagger_auto_schema = _swagger_auto_schema
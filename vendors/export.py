@@ -0,0 +1,105 @@
+"""
+Streaming exports.
+
+Rows are read with ``values().iterator()``, formatted by a
+``ValuesSerializer`` and encoded as they are read, so memory use does not
+depend on the number of rows exported. Output is buffered into chunks of
+roughly ``EXPORT_BUFFER_SIZE`` bytes before it is handed to the response,
+and optionally gzip-compressed on the fly.
+"""
+import csv
+import json
+import zlib
+
+CSV = 'csv'
+NDJSON = 'ndjson'
+CONTENT_TYPES = {
+    CSV: 'text/csv; charset=utf-8',
+    NDJSON: 'application/x-ndjson',
+}
+
+EXPORT_BUFFER_SIZE = 64 * 1024
+DEFAULT_CHUNK_SIZE = 2000
+
+
+class _LineBuffer:
+    """File-like object that hands back whatever ``csv.writer`` writes to it."""
+
+    def write(self, value):
+        return value
+
+
+def _csv_value(value):
+    if isinstance(value, (list, dict)):
+        return json.dumps(value)
+    if value is None:
+        return ''
+    return value
+
+
+def csv_lines(names, rows):
+    writer = csv.writer(_LineBuffer())
+    yield writer.writerow(names)
+    for row in rows:
+        yield writer.writerow([_csv_value(value) for value in row.values()])
+
+
+def ndjson_lines(rows):
+    for row in rows:
+        yield json.dumps(row) + '\n'
+
+
+def buffered(lines, size=EXPORT_BUFFER_SIZE):
+    """Join text lines into UTF-8 chunks of about ``size`` bytes."""
+    parts = []
+    length = 0
+    for line in lines:
+        parts.append(line)
+        length += len(line)
+        if length >= size:
+            yield ''.join(parts).encode()
+            parts = []
+            length = 0
+    if parts:
+        yield ''.join(parts).encode()
+
+
+def gzipped(chunks):
+    compressor = zlib.compressobj(wbits=16 + zlib.MAX_WBITS)
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def accepts_gzip(accept_encoding):
+    """
+    Whether an ``Accept-Encoding`` header value allows gzip: listed, or
+    covered by ``*``, with a non-zero q-value (``gzip;q=0`` refuses it).
+    """
+    qualities = {}
+    for entry in accept_encoding.split(','):
+        coding, *params = [part.strip() for part in entry.split(';')]
+        quality = 1.0
+        for param in params:
+            name, _, value = param.partition('=')
+            if name.strip().lower() == 'q':
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        qualities[coding.lower()] = quality
+    for coding in ('gzip', 'x-gzip', '*'):
+        if coding in qualities:
+            return qualities[coding] > 0
+    return False
+
+
+def export_queryset(queryset, serializer, output=CSV, gzip=False, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Return an iterator of encoded chunks of ``queryset`` as formatted by ``serializer``."""
+    values = queryset.values(*serializer.columns).iterator(chunk_size=chunk_size)
+    rows = serializer.iter_serialize(values)
+    lines = csv_lines(serializer.names, rows) if output == CSV else ndjson_lines(rows)
+    chunks = buffered(lines)
+    return gzipped(chunks) if gzip else chunks
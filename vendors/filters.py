@@ -0,0 +1,22 @@
+from django_filters import rest_framework as filters
+from .models import Vendor, PurchaseOrder
+
+
+class VendorFilter(filters.FilterSet):
+    name = filters.CharFilter(lookup_expr='icontains')
+
+    class Meta:
+        model = Vendor
+        fields = ['vendor_code', 'name']
+
+
+class PurchaseOrderFilter(filters.FilterSet):
+    # Filter on the raw column so the vendor does not have to be looked up.
+    vendor = filters.NumberFilter(field_name='vendor_id')
+    order_date = filters.DateTimeFromToRangeFilter()
+    delivery_date = filters.DateTimeFromToRangeFilter()
+    issue_date = filters.DateTimeFromToRangeFilter()
+
+    class Meta:
+        model = PurchaseOrder
+        fields = ['vendor', 'status', 'order_date', 'delivery_date', 'issue_date']
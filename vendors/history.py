@@ -0,0 +1,92 @@
+"""
+Historical performance snapshots.
+
+``snapshot_vendor_performance`` records every vendor's current metrics in a
+single ``bulk_create``. ``compact_history`` keeps the table bounded by rolling
+old rows up into coarser ones: hourly rows into daily averages, and daily
+rows into monthly averages.
+"""
+from datetime import timedelta
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Avg
+from django.db.models.functions import TruncDay, TruncMonth
+from django.utils import timezone
+from .models import Vendor, HistoricalPerformance
+
+METRIC_FIELDS = (
+    'on_time_delivery_rate',
+    'quality_rating_avg',
+    'average_response_time',
+    'fulfillment_rate',
+)
+
+# Each granularity rolls up into the next coarser one.
+ROLLUPS = {
+    HistoricalPerformance.HOURLY: (HistoricalPerformance.DAILY, TruncDay),
+    HistoricalPerformance.DAILY: (HistoricalPerformance.MONTHLY, TruncMonth),
+}
+
+DEFAULT_RETENTION = {
+    HistoricalPerformance.HOURLY: timedelta(days=2),
+    HistoricalPerformance.DAILY: timedelta(days=90),
+}
+
+
+def snapshot_vendor_performance(granularity=HistoricalPerformance.HOURLY, now=None):
+    """Record the current metrics of every vendor; returns the number of rows written."""
+    now = now or timezone.now()
+    snapshots = [
+        HistoricalPerformance(vendor_id=row.pop('pk'), date=now, granularity=granularity, **row)
+        for row in Vendor.objects.values('pk', *METRIC_FIELDS).iterator()
+    ]
+    HistoricalPerformance.objects.bulk_create(snapshots)
+    return len(snapshots)
+
+
+def compact_history(now=None, retention=None):
+    """
+    Roll rows older than their retention period up into the next granularity.
+
+    Only whole periods are compacted (the cutoff is truncated to the start of
+    the target period), so a period is always rolled up in one go. Returns a
+    ``{granularity: rows_removed}`` mapping.
+    """
+    now = now or timezone.now()
+    retention = retention or getattr(settings, 'VENDOR_HISTORY_RETENTION', DEFAULT_RETENTION)
+    removed = {}
+    for granularity, (target, trunc) in ROLLUPS.items():
+        if granularity not in retention:
+            continue
+        cutoff = _truncate(now - retention[granularity], target)
+        removed[granularity] = _rollup(granularity, target, trunc, cutoff)
+    return removed
+
+
+def _truncate(moment, granularity):
+    moment = timezone.localtime(moment).replace(minute=0, second=0, microsecond=0)
+    if granularity in (HistoricalPerformance.DAILY, HistoricalPerformance.MONTHLY):
+        moment = moment.replace(hour=0)
+    if granularity == HistoricalPerformance.MONTHLY:
+        moment = moment.replace(day=1)
+    return moment
+
+
+def _rollup(granularity, target, trunc, cutoff):
+    old_rows = HistoricalPerformance.objects.filter(granularity=granularity, date__lt=cutoff)
+    with transaction.atomic():
+        periods = (
+            old_rows.annotate(period=trunc('date'))
+            .values('vendor_id', 'period')
+            .annotate(**{field: Avg(field) for field in METRIC_FIELDS})
+            .order_by()
+        )
+        HistoricalPerformance.objects.bulk_create(
+            HistoricalPerformance(
+                vendor_id=row['vendor_id'], date=row['period'], granularity=target,
+                **{field: row[field] for field in METRIC_FIELDS},
+            )
+            for row in periods
+        )
+        removed, _ = old_rows.delete()
+    return removed
@@ -0,0 +1,109 @@
+"""
+In-process request instrumentation.
+
+Observations are kept in fixed-bucket histograms, one per metric and label
+set, so memory stays bounded however many requests are served. Each process
+keeps its own histograms; ``render_prometheus`` exposes them in the
+Prometheus text format.
+"""
+import threading
+import time
+from contextlib import contextmanager
+
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+QUERY_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 250)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+# Label sets beyond this many per metric are folded into one overflow series.
+MAX_SERIES = 500
+OVERFLOW_LABELS = (('overflow', 'true'),)
+
+METRICS = {
+    'vms_request_duration_seconds': ('Total time spent handling a request.', DURATION_BUCKETS),
+    'vms_request_sql_duration_seconds': ('Time spent in SQL while handling a request.', DURATION_BUCKETS),
+    'vms_request_queries': ('Number of SQL queries made by a request.', QUERY_BUCKETS),
+    'vms_response_size_bytes': ('Size of the response body.', SIZE_BUCKETS),
+    'vms_signal_duration_seconds': ('Time spent in a signal handler.', DURATION_BUCKETS),
+}
+
+
+class Histogram:
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value):
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+                break
+        self.count += 1
+        self.sum += value
+
+    def cumulative_counts(self):
+        total = 0
+        for bound, count in zip(self.buckets, self.counts):
+            total += count
+            yield bound, total
+
+
+_lock = threading.Lock()
+_series = {name: {} for name in METRICS}
+
+
+def observe(name, value, **labels):
+    key = tuple(sorted(labels.items()))
+    with _lock:
+        series = _series[name]
+        if key not in series and len(series) >= MAX_SERIES:
+            key = OVERFLOW_LABELS
+        if key not in series:
+            series[key] = Histogram(METRICS[name][1])
+        series[key].observe(value)
+
+
+@contextmanager
+def observe_signal(handler):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe('vms_signal_duration_seconds', time.perf_counter() - start, handler=handler)
+
+
+def reset():
+    with _lock:
+        for series in _series.values():
+            series.clear()
+
+
+def _format_labels(labels, **extra):
+    items = list(labels) + list(extra.items())
+    if not items:
+        return ''
+    escaped = (
+        (key, str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n'))
+        for key, value in items
+    )
+    return '{' + ','.join(f'{key}="{value}"' for key, value in escaped) + '}'
+
+
+def _format_number(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def render_prometheus():
+    lines = []
+    with _lock:
+        for name, (help_text, _) in METRICS.items():
+            lines.append(f'# HELP {name} {help_text}')
+            lines.append(f'# TYPE {name} histogram')
+            for labels, histogram in sorted(_series[name].items()):
+                for bound, total in histogram.cumulative_counts():
+                    lines.append(f'{name}_bucket{_format_labels(labels, le=_format_number(bound))} {total}')
+                lines.append(f'{name}_bucket{_format_labels(labels, le="+Inf")} {histogram.count}')
+                lines.append(f'{name}_sum{_format_labels(labels)} {_format_number(histogram.sum)}')
+                lines.append(f'{name}_count{_format_labels(labels)} {histogram.count}')
+    return '\n'.join(lines) + '\n'
@@ -0,0 +1,129 @@
+"""
+Scheduling of vendor metric recomputation.
+
+``VENDOR_METRICS_MODE`` selects how a purchase order change reaches the
+vendor's metrics:
+
+- ``sync``: apply the change's counter delta immediately, inside the write.
+- ``on_commit``: recompute each affected vendor once, after the surrounding
+  transaction commits.
+- ``background``: enqueue a ``MetricRecomputeJob`` row for each affected
+  vendor and let the ``run_metric_worker`` command process the queue.
+"""
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.db import transaction
+from django.db.models import Count, Min
+from django.utils import timezone
+from .models import MetricRecomputeJob
+from . import metrics
+
+SYNC = 'sync'
+ON_COMMIT = 'on_commit'
+BACKGROUND = 'background'
+MODES = (SYNC, ON_COMMIT, BACKGROUND)
+
+
+def get_mode():
+    mode = getattr(settings, 'VENDOR_METRICS_MODE', SYNC)
+    if mode not in MODES:
+        raise ImproperlyConfigured(f'VENDOR_METRICS_MODE must be one of {", ".join(MODES)}, not {mode!r}.')
+    return mode
+
+
+def dispatch_po_change(old_state, new_state):
+    """Propagate a purchase order change to vendor metrics according to the mode."""
+    if not metrics.change_scope(old_state, new_state):
+        return
+    if get_mode() == SYNC:
+        metrics.apply_po_change(old_state, new_state)
+    else:
+        recompute_vendors(metrics.bucket_deltas(old_state, new_state))
+
+
+def recompute_vendors(vendor_ids):
+    """Recompute the given vendors' metrics from scratch according to the mode."""
+    vendor_ids = set(vendor_ids)
+    if not vendor_ids:
+        return
+    mode = get_mode()
+    if mode == BACKGROUND:
+        enqueue(vendor_ids)
+    elif mode == ON_COMMIT:
+        pending = _pending_recompute()
+        if pending is None:
+            pending = PendingRecompute()
+            pending.vendor_ids.update(vendor_ids)
+            transaction.on_commit(pending)
+        else:
+            pending.vendor_ids.update(vendor_ids)
+    else:
+        metrics.rebuild_aggregates(vendor_ids)
+
+
+class PendingRecompute:
+    """
+    The vendors touched by the current transaction, recomputed once when it
+    commits. It exists only as the transaction's on-commit callback, so a
+    rollback discards it together with the callback.
+    """
+    def __init__(self):
+        self.vendor_ids = set()
+        self.done = False
+
+    def __call__(self):
+        self.done = True
+        metrics.rebuild_aggregates(self.vendor_ids)
+
+
+def _pending_recompute():
+    """The ``PendingRecompute`` scheduled in the current transaction and not yet run, if any."""
+    # A commit clears the callbacks before running them, but callbacks run by
+    # TestCase.captureOnCommitCallbacks stay listed.
+    for _, callback, _ in transaction.get_connection().run_on_commit:
+        if isinstance(callback, PendingRecompute) and not callback.done:
+            return callback
+    return None
+
+
+def enqueue(vendor_ids):
+    for vendor_id in vendor_ids:
+        MetricRecomputeJob.objects.get_or_create(vendor_id=vendor_id)
+
+
+def process_jobs(batch_size=100):
+    """
+    Claim and process up to ``batch_size`` of the oldest jobs.
+
+    A job is deleted before its vendor is recomputed, so a write that lands
+    during the recompute enqueues a fresh job rather than being lost. The
+    recompute also drops the vendors' cached performance, which reads made
+    while the jobs were queued may have filled from the old counters. Returns
+    the number of vendors recomputed.
+    """
+    vendor_ids = list(
+        MetricRecomputeJob.objects.order_by('enqueued_at').values_list('vendor_id', flat=True)[:batch_size]
+    )
+    claimed = []
+    for vendor_id in vendor_ids:
+        deleted, _ = MetricRecomputeJob.objects.filter(vendor_id=vendor_id).delete()
+        if deleted:
+            claimed.append(vendor_id)
+    if claimed:
+        try:
+            metrics.rebuild_aggregates(claimed)
+        except Exception:
+            enqueue(claimed)
+            raise
+    return len(claimed)
+
+
+def queue_status():
+    stats = MetricRecomputeJob.objects.aggregate(depth=Count('pk'), oldest=Min('enqueued_at'))
+    oldest = stats['oldest']
+    return {
+        'mode': get_mode(),
+        'depth': stats['depth'],
+        'oldest_enqueued_at': oldest,
+        'lag_seconds': (timezone.now() - oldest).total_seconds() if oldest else 0,
+    }
@@ -0,0 +1,145 @@
+"""
+Purchase order line items.
+
+``PurchaseOrder.items`` stays the source of truth. ``PurchaseOrderLine``
+holds one row per entry, so item-level volumes are answered with ``GROUP BY``
+on an indexed table. An order's lines are rewritten whenever its ``items`` or
+vendor change (the ``post_save`` handler) and written right after
+``bulk_create`` on the bulk paths; ``backfill_lines`` rebuilds them from the
+orders.
+
+An entry becomes a line when it is an object with a non-empty string
+``name``; a missing or non-integer ``quantity`` counts as 0.
+"""
+from django.db import transaction
+from django.db.models import Count, Sum
+from .models import PurchaseOrder, PurchaseOrderLine
+
+# Fields of PurchaseOrder its lines are built from, as update_fields may name them.
+LINE_SOURCE_FIELDS = ('items', 'vendor', 'vendor_id')
+NAME_MAX_LENGTH = PurchaseOrderLine._meta.get_field('name').max_length
+DEFAULT_CHUNK_SIZE = 2000
+
+
+def affects_lines(update_fields):
+    return any(field in LINE_SOURCE_FIELDS for field in update_fields)
+
+
+def parse_items(items):
+    """Return ``(name, quantity)`` for each entry of ``items`` that names an item."""
+    if not isinstance(items, list):
+        return []
+    parsed = []
+    for item in items:
+        if not isinstance(item, dict):
+            continue
+        name = item.get('name')
+        if not isinstance(name, str) or not name.strip():
+            continue
+        quantity = item.get('quantity')
+        if isinstance(quantity, bool) or not isinstance(quantity, int):
+            quantity = 0
+        parsed.append((name.strip()[:NAME_MAX_LENGTH], quantity))
+    return parsed
+
+
+def build_lines(po):
+    return [
+        PurchaseOrderLine(purchase_order_id=po.pk, position=position, vendor_id=po.vendor_id, name=name,
+                          quantity=quantity)
+        for position, (name, quantity) in enumerate(parse_items(po.items))
+    ]
+
+
+def sync_lines(orders, replace=True):
+    """
+    Write the lines of ``orders`` (saved purchase orders with ``items`` and
+    ``vendor_id`` loaded). With ``replace``, their existing lines are deleted
+    first; pass ``False`` for orders that were just created.
+    """
+    orders = list(orders)
+    if replace and orders:
+        PurchaseOrderLine.objects.filter(purchase_order_id__in=[po.pk for po in orders]).delete()
+    lines = [line for po in orders for line in build_lines(po)]
+    if lines:
+        PurchaseOrderLine.objects.bulk_create(lines, batch_size=DEFAULT_CHUNK_SIZE)
+    return len(lines)
+
+
+def _orders(vendor_ids=None):
+    orders = PurchaseOrder.objects.only('id', 'vendor_id', 'items').order_by('pk')
+    if vendor_ids is not None:
+        orders = orders.filter(vendor_id__in=vendor_ids)
+    return orders
+
+
+def _chunks(orders, chunk_size):
+    chunk = []
+    for po in orders.iterator(chunk_size=chunk_size):
+        chunk.append(po)
+        if len(chunk) >= chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def backfill_lines(vendor_ids=None, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Rewrite the lines of every order of ``vendor_ids`` (default: all orders),
+    ``chunk_size`` orders per transaction. Returns the number of lines written.
+    """
+    written = 0
+    orders = _orders(vendor_ids)
+    # Ids first, so rewriting lines never races the cursor over the orders.
+    pks = list(orders.values_list('pk', flat=True))
+    for start in range(0, len(pks), chunk_size):
+        with transaction.atomic():
+            written += sync_lines(orders.filter(pk__in=pks[start:start + chunk_size]))
+    return written
+
+
+def find_line_drift(vendor_ids=None, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Compare stored lines with the orders' ``items``. Returns the ids of the
+    orders whose lines are missing, stale or out of order.
+    """
+    drifted = []
+    for chunk in _chunks(_orders(vendor_ids), chunk_size):
+        stored = {}
+        rows = (
+            PurchaseOrderLine.objects.filter(purchase_order_id__in=[po.pk for po in chunk])
+            .order_by('purchase_order_id', 'position')
+            .values_list('purchase_order_id', 'vendor_id', 'name', 'quantity')
+        )
+        for po_id, vendor_id, name, quantity in rows:
+            stored.setdefault(po_id, []).append((vendor_id, name, quantity))
+        for po in chunk:
+            expected = [(po.vendor_id, name, quantity) for name, quantity in parse_items(po.items)]
+            if stored.get(po.pk, []) != expected:
+                drifted.append(po.pk)
+    return drifted
+
+
+def item_volumes(vendor_id, name=None, status=None, start=None, end=None, limit=None):
+    """
+    Units and orders per item name for one vendor, largest volume first.
+
+    ``status`` limits the orders counted to one status; ``start`` and ``end``
+    to those with a delivery date in that range.
+    """
+    lines = PurchaseOrderLine.objects.filter(vendor_id=vendor_id)
+    if name is not None:
+        lines = lines.filter(name=name)
+    if status is not None:
+        lines = lines.filter(purchase_order__status=status)
+    if start is not None:
+        lines = lines.filter(purchase_order__delivery_date__gte=start)
+    if end is not None:
+        lines = lines.filter(purchase_order__delivery_date__lte=end)
+    volumes = (
+        lines.values('name')
+        .annotate(quantity=Sum('quantity'), order_count=Count('purchase_order_id', distinct=True))
+        .order_by('-quantity', 'name')
+    )
+    return list(volumes[:limit] if limit is not None else volumes)
@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand, CommandError
+from vendors import metrics
+
+
+class Command(BaseCommand):
+    help = (
+        'Build the daily vendor metric buckets behind windowed performance metrics from the '
+        'existing purchase orders, or check them for drift.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--vendor', type=int, action='append', dest='vendor_ids',
+                            help='Only process this vendor ID (may be repeated).')
+        parser.add_argument('--check', action='store_true',
+                            help='Report drift without writing; exit with an error if any is found.')
+
+    def handle(self, *args, vendor_ids=None, check=False, **options):
+        if check:
+            drift = metrics.find_bucket_drift(vendor_ids)
+            for vendor_id, day, field, stored, expected in drift:
+                self.stdout.write(f'Vendor {vendor_id} on {day}: {field} is {stored}, expected {expected}')
+            if drift:
+                vendors = len({vendor_id for vendor_id, *_ in drift})
+                raise CommandError(f'Metric buckets drifted for {vendors} vendor(s).')
+            self.stdout.write(self.style.SUCCESS('Metric buckets are consistent.'))
+            return
+
+        created = metrics.rebuild_buckets(vendor_ids)
+        self.stdout.write(self.style.SUCCESS(f'Wrote {created} metric bucket(s).'))
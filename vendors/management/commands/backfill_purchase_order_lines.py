@@ -0,0 +1,32 @@
+from django.core.management.base import BaseCommand, CommandError
+from vendors import lines
+
+
+class Command(BaseCommand):
+    help = (
+        'Build the purchase order line table behind item-level analytics from the items of the '
+        'existing purchase orders, or check it for drift.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--vendor', type=int, action='append', dest='vendor_ids',
+                            help='Only process the orders of this vendor ID (may be repeated).')
+        parser.add_argument('--chunk-size', type=int, default=lines.DEFAULT_CHUNK_SIZE,
+                            help=f'Orders per transaction (default: {lines.DEFAULT_CHUNK_SIZE}).')
+        parser.add_argument('--check', action='store_true',
+                            help='Report drift without writing; exit with an error if any is found.')
+
+    def handle(self, *args, vendor_ids=None, chunk_size, check=False, **options):
+        if chunk_size < 1:
+            raise CommandError('--chunk-size must be at least 1.')
+        if check:
+            drift = lines.find_line_drift(vendor_ids, chunk_size)
+            for po_id in drift:
+                self.stdout.write(f'Purchase order {po_id}: lines do not match its items')
+            if drift:
+                raise CommandError(f'Lines drifted for {len(drift)} purchase order(s).')
+            self.stdout.write(self.style.SUCCESS('Purchase order lines are consistent.'))
+            return
+
+        written = lines.backfill_lines(vendor_ids, chunk_size)
+        self.stdout.write(self.style.SUCCESS(f'Wrote {written} purchase order line(s).'))
@@ -0,0 +1,27 @@
+import json
+from django.core.management.base import BaseCommand
+from vendors import benchmarks
+
+
+class Command(BaseCommand):
+    help = (
+        'Compare concurrent read/write throughput of the stock SQLite backend with its defaults and of the '
+        'configured DATABASES options, on scratch database files. Does not touch the project database.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--readers', type=int, default=4, help='Reader threads (default: 4).')
+        parser.add_argument('--writers', type=int, default=4, help='Writer threads (default: 4).')
+        parser.add_argument('--duration', type=float, default=5.0, help='Seconds per profile (default: 5).')
+        parser.add_argument('--output', help='Write the results as JSON to this file.')
+
+    def handle(self, *args, readers, writers, duration, output, **options):
+        results = benchmarks.benchmark_database_concurrency(readers, writers, duration)
+        for name, result in results.items():
+            self.stdout.write(
+                f'{name:12} journal={result["journal_mode"]:8} reads={result["reads_per_second"]}/s '
+                f'writes={result["writes_per_second"]}/s lock_errors={result["lock_errors"]}'
+            )
+        if output:
+            with open(output, 'w') as fh:
+                json.dump(results, fh, indent=2)
@@ -0,0 +1,32 @@
+import json
+from django.core.management.base import BaseCommand, CommandError
+from vendors import benchmarks
+
+
+class Command(BaseCommand):
+    help = (
+        'Measure cold starts of fresh worker processes per VMS_ROLE: time to load the application '
+        'and answer a first request, and import time under python -X importtime.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--role', action='append', dest='roles', choices=['full', 'api'],
+                            help='Only measure this role (may be repeated; default: full and api).')
+        parser.add_argument('--repeat', type=int, default=5, help='Processes started per role (default: 5).')
+        parser.add_argument('--path', help='Path of the first request (default: the vendor list, authenticated).')
+        parser.add_argument('--output', help='Write the results as JSON to this file.')
+
+    def handle(self, *args, roles, repeat, path, output, **options):
+        if repeat < 1:
+            raise CommandError('--repeat must be at least 1.')
+        results = benchmarks.benchmark_startup(roles or ('full', 'api'), repeat, path)
+        for role, result in results.items():
+            self.stdout.write(
+                f'{role:5} wall={result["wall_ms"]}ms setup={result["setup_ms"]}ms '
+                f'first_response={result["first_response_ms"]}ms imports={result["import_ms"]}ms '
+                f'modules={result["modules"]} status={result["status_codes"]} '
+                f'loaded={",".join(result["loaded"]) or "-"}'
+            )
+        if output:
+            with open(output, 'w') as fh:
+                json.dump(results, fh, indent=2)
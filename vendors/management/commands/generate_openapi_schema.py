@@ -0,0 +1,52 @@
+import difflib
+import os
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from vendor_management import schema
+
+MAX_DIFF_LINES = 40
+
+
+class Command(BaseCommand):
+    help = (
+        'Generate the OpenAPI schema served at /openapi.json from the code, or check that the '
+        'generated file is up to date.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--output', help='File to write or check (default: settings.OPENAPI_SCHEMA_PATH).')
+        parser.add_argument('--format', choices=schema.FORMATS,
+                            help='json or yaml (default: from the file extension, else json).')
+        parser.add_argument('--check', action='store_true',
+                            help='Compare the file with the code without writing; exit with an error if they differ.')
+
+    def handle(self, *args, output=None, format=None, check=False, **options):
+        output = output or settings.OPENAPI_SCHEMA_PATH
+        if format is None:
+            format = schema.YAML if str(output).endswith(('.yaml', '.yml')) else schema.JSON
+        content = schema.generate_schema(format)
+
+        if check:
+            try:
+                with open(output, 'rb') as fh:
+                    current = fh.read()
+            except FileNotFoundError:
+                raise CommandError(f'{output} does not exist; run generate_openapi_schema.')
+            if current != content:
+                diff = list(difflib.unified_diff(
+                    current.decode().splitlines(), content.decode().splitlines(),
+                    f'{output} (committed)', f'{output} (generated)', lineterm='',
+                ))
+                self.stdout.write('\n'.join(diff[:MAX_DIFF_LINES]))
+                if len(diff) > MAX_DIFF_LINES:
+                    self.stdout.write(f'... {len(diff) - MAX_DIFF_LINES} more line(s)')
+                raise CommandError(f'{output} is out of date; run generate_openapi_schema.')
+            self.stdout.write(self.style.SUCCESS(f'{output} is up to date.'))
+            return
+
+        directory = os.path.dirname(output)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(output, 'wb') as fh:
+            fh.write(content)
+        self.stdout.write(self.style.SUCCESS(f'Wrote the OpenAPI schema to {output} ({len(content)} bytes).'))
@@ -0,0 +1,125 @@
+import itertools
+import random
+from datetime import timedelta
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.utils import timezone
+from vendors import lines, metrics
+from vendors.models import Vendor, PurchaseOrder
+
+# (status, weight) — roughly what a live procurement system looks like.
+STATUS_MIX = [
+    ('completed', 60),
+    ('acknowledged', 15),
+    ('pending', 20),
+    ('canceled', 5),
+]
+CATALOG_SIZE = 500
+# Orders take this many days from issue to planned delivery.
+LEAD_TIME_DAYS = (1, 60)
+
+
+class Command(BaseCommand):
+    help = (
+        'Generate a deterministic synthetic dataset of vendors and purchase orders for '
+        'benchmarking. Vendor sizes follow a Zipf-like distribution, so a few vendors '
+        'own most of the orders, and issue dates are spread over the past --days days.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--vendors', type=int, default=100, help='Number of vendors (default: 100).')
+        parser.add_argument('--orders', type=int, default=10000, help='Number of purchase orders (default: 10000).')
+        parser.add_argument('--seed', type=int, default=0, help='Random seed (default: 0).')
+        parser.add_argument('--skew', type=float, default=1.1,
+                            help='Zipf exponent for vendor sizes; 0 spreads orders evenly (default: 1.1).')
+        parser.add_argument('--days', type=int, default=730,
+                            help='Spread issue dates over this many past days (default: 730).')
+        parser.add_argument('--batch-size', type=int, default=2000, help='Rows per INSERT (default: 2000).')
+        parser.add_argument('--clear', action='store_true',
+                            help='Delete previously generated synthetic vendors (and their orders) first.')
+
+    def handle(self, *args, vendors, orders, seed, skew, days, batch_size, clear, **options):
+        if vendors < 1 or orders < 0:
+            raise CommandError('--vendors must be at least 1 and --orders must not be negative.')
+        if days < 1:
+            raise CommandError('--days must be at least 1.')
+        prefix = f'SYN{seed}-'
+        if clear:
+            Vendor.objects.filter(vendor_code__startswith=prefix).delete()
+        elif Vendor.objects.filter(vendor_code__startswith=prefix).exists():
+            raise CommandError(f'Synthetic data for seed {seed} already exists; pass --clear to replace it.')
+
+        rng = random.Random(seed)
+        now = timezone.now()
+        with transaction.atomic():
+            vendor_objs = Vendor.objects.bulk_create(
+                [
+                    Vendor(
+                        name=f'Synthetic Vendor {i}', vendor_code=f'{prefix}{i:06}',
+                        contact_details=f'vendor{i}@example.com', address=f'{i} Synthetic Street',
+                    )
+                    for i in range(vendors)
+                ],
+                batch_size=batch_size,
+            )
+            # Per-vendor traits: how good the vendor is and how fast it responds.
+            quality = [rng.uniform(2.5, 5.0) for _ in vendor_objs]
+            response_hours = [rng.uniform(1, 72) for _ in vendor_objs]
+            vendor_weights = list(itertools.accumulate(1 / (rank + 1) ** skew for rank in range(vendors)))
+            statuses, status_weights = zip(*STATUS_MIX)
+            status_weights = list(itertools.accumulate(status_weights))
+
+            batch = []
+            issue_dates = []
+            for i in range(orders):
+                index = rng.choices(range(vendors), cum_weights=vendor_weights)[0]
+                issue_date = now - timedelta(seconds=rng.uniform(0, days * 24 * 60 * 60))
+                batch.append(self.make_order(
+                    rng, now, issue_date, f'{prefix}PO{i:09}', vendor_objs[index], quality[index],
+                    response_hours[index], rng.choices(statuses, cum_weights=status_weights)[0],
+                ))
+                issue_dates.append(issue_date)
+                if len(batch) >= batch_size:
+                    self.write_orders(batch, issue_dates)
+                    batch, issue_dates = [], []
+            self.write_orders(batch, issue_dates)
+            # Buckets are keyed by issue day, so rebuild only after backdating.
+            metrics.rebuild_aggregates([vendor.pk for vendor in vendor_objs])
+
+        self.stdout.write(self.style.SUCCESS(f'Generated {vendors} vendor(s) and {orders} purchase order(s).'))
+
+    def write_orders(self, batch, issue_dates):
+        orders = PurchaseOrder.objects.bulk_create(batch)
+        # issue_date and order_date are auto_now_add, so bulk_create stamps
+        # every order with the current time; backdate them with one prepared
+        # UPDATE (bulk_update's CASE expressions cost more than the inserts).
+        quote = connection.ops.quote_name
+        with connection.cursor() as cursor:
+            cursor.executemany(
+                f'UPDATE {quote(PurchaseOrder._meta.db_table)} SET {quote("issue_date")} = %s, '
+                f'{quote("order_date")} = %s WHERE {quote("id")} = %s',
+                [
+                    (value, value, order.pk)
+                    for order, value in zip(orders, map(connection.ops.adapt_datetimefield_value, issue_dates))
+                ],
+            )
+        for order, issue_date in zip(orders, issue_dates):
+            order.issue_date = order.order_date = issue_date
+        lines.sync_lines(orders, replace=False)
+
+    def make_order(self, rng, now, issue_date, po_number, vendor, quality, response_hours, status):
+        items = [
+            {'name': f'ITEM-{rng.randrange(CATALOG_SIZE):04}', 'quantity': rng.randint(1, 50)}
+            for _ in range(rng.randint(1, 5))
+        ]
+        order = PurchaseOrder(
+            po_number=po_number, vendor=vendor, delivery_date=issue_date + timedelta(days=rng.randint(*LEAD_TIME_DAYS)),
+            items=items, quantity=sum(item['quantity'] for item in items), status=status,
+        )
+        if status in ('acknowledged', 'completed'):
+            order.acknowledgment_date = min(now, issue_date + timedelta(hours=rng.expovariate(1 / response_hours)))
+        if status == 'completed':
+            if rng.random() < 0.8:
+                order.quality_rating = round(min(5.0, max(0.0, rng.gauss(quality, 0.5))), 1)
+            order.fulfilled_without_issues = rng.random() < quality / 5
+        return order
@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand, CommandError
+from vendors import metrics
+
+
+class Command(BaseCommand):
+    help = 'Rebuild vendor metric aggregates from purchase orders, or check them for drift.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--vendor', type=int, action='append', dest='vendor_ids',
+                            help='Only process this vendor ID (may be repeated).')
+        parser.add_argument('--check', action='store_true',
+                            help='Report drift without writing; exit with an error if any is found.')
+
+    def handle(self, *args, vendor_ids=None, check=False, **options):
+        drift = metrics.find_drift(vendor_ids)
+        for vendor_id, field, stored, expected in drift:
+            self.stdout.write(f'Vendor {vendor_id}: {field} is {stored}, expected {expected}')
+
+        if check:
+            if drift:
+                vendors = len({vendor_id for vendor_id, *_ in drift})
+                raise CommandError(f'Metric aggregates drifted for {vendors} vendor(s).')
+            self.stdout.write(self.style.SUCCESS('Metric aggregates are consistent.'))
+            return
+
+        counters = metrics.rebuild_aggregates(vendor_ids)
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt metric aggregates for {len(counters)} vendor(s).'))
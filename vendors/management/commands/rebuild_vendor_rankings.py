@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+from vendors import rankings
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the precomputed vendor ranking snapshot served by /api/vendors/rankings/.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--metric', action='append', dest='metrics', choices=sorted(rankings.RANKED_METRICS),
+                            help='Only rebuild this metric\'s ranking (may be repeated).')
+
+    def handle(self, *args, metrics=None, **options):
+        for metric, ranked in rankings.rebuild_rankings(metrics).items():
+            self.stdout.write(f'Ranked {ranked} vendor(s) by {metric}.')
@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+from vendors import search
+
+
+class Command(BaseCommand):
+    help = (
+        'Create the vendor search index and its triggers if they are missing and refill the index from the '
+        'vendor table. Only does anything on SQLite; other databases search the vendor table directly.'
+    )
+
+    def handle(self, *args, **options):
+        if not search.uses_fts():
+            self.stdout.write('Not using SQLite; there is no search index to rebuild.')
+            return
+        search.build_index()
+        self.stdout.write(self.style.SUCCESS('Rebuilt the vendor search index.'))
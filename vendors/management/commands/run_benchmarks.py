@@ -0,0 +1,76 @@
+import json
+from django.core.management.base import BaseCommand, CommandError
+from django.test.utils import setup_test_environment, teardown_test_environment
+from vendors import benchmarks
+
+
+class Command(BaseCommand):
+    help = (
+        'Benchmark the API routes against the current database through the Django test client and '
+        'report p50/p95/p99 latency, queries per request and throughput. Generate data first with '
+        'generate_synthetic_data. Write scenarios modify purchase orders in place.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=100, help='Timed requests per scenario (default: 100).')
+        parser.add_argument('--warmup', type=int, default=5, help='Untimed requests per scenario (default: 5).')
+        parser.add_argument('--concurrency', type=int, default=1,
+                            help='Requests in flight at once; above 1, requests go through the ASGI handler '
+                                 '(default: 1).')
+        parser.add_argument('--scenario', action='append', dest='scenarios',
+                            help='Only run this scenario (may be repeated).')
+        parser.add_argument('--serializers', action='store_true',
+                            help='Also compare ModelSerializer and ValuesSerializer throughput.')
+        parser.add_argument('--output', help='Write the results as JSON to this file.')
+        parser.add_argument('--compare', help='Compare against a previous JSON results file.')
+        parser.add_argument('--threshold', type=float, default=0.2,
+                            help='Allowed p95 slowdown as a fraction when comparing (default: 0.2).')
+        parser.add_argument('--check-targets', action='store_true',
+                            help="Fail if a scenario's p95 latency exceeds its target.")
+
+    def handle(self, *args, iterations, warmup, concurrency, scenarios, serializers, output, compare, threshold,
+               check_targets, **options):
+        available = benchmarks.default_scenarios()
+        if not available:
+            raise CommandError('No vendors with purchase orders found; run generate_synthetic_data first.')
+        if scenarios:
+            unknown = set(scenarios) - {scenario.name for scenario in available}
+            if unknown:
+                raise CommandError(f'Unknown scenario(s): {", ".join(sorted(unknown))}.')
+            available = [scenario for scenario in available if scenario.name in scenarios]
+
+        # Lets the test client through ALLOWED_HOSTS.
+        setup_test_environment()
+        try:
+            results = benchmarks.run_benchmarks(available, iterations, warmup, concurrency=concurrency)
+        finally:
+            teardown_test_environment()
+
+        for name, result in results.items():
+            self.stdout.write(
+                f'{name:32} p50={result["p50_ms"]:.2f}ms p95={result["p95_ms"]:.2f}ms '
+                f'p99={result["p99_ms"]:.2f}ms queries={result["queries_per_request"]} '
+                f'rps={result["throughput_rps"]}'
+                + (f' target={result["target_p95_ms"]}ms' if result['target_p95_ms'] is not None else '')
+            )
+        if serializers:
+            for name, result in benchmarks.benchmark_serializers().items():
+                self.stdout.write(
+                    f'{name:32} rows={result["rows"]} '
+                    f'model={result["model_serializer_rows_per_second"]}/s '
+                    f'values={result["values_serializer_rows_per_second"]}/s speedup={result["speedup"]}x'
+                )
+        if output:
+            with open(output, 'w') as fh:
+                json.dump(results, fh, indent=2)
+        if check_targets:
+            missed = benchmarks.missed_targets(results)
+            if missed:
+                raise CommandError('Latency targets missed:\n' + '\n'.join(missed))
+            self.stdout.write(self.style.SUCCESS('All latency targets met.'))
+        if compare:
+            with open(compare) as fh:
+                regressions = benchmarks.compare_results(results, json.load(fh), threshold)
+            if regressions:
+                raise CommandError('Performance regressions:\n' + '\n'.join(regressions))
+            self.stdout.write(self.style.SUCCESS('No regressions against the baseline.'))
@@ -0,0 +1,27 @@
+import time
+from django.core.management.base import BaseCommand
+from vendors import jobs
+
+
+class Command(BaseCommand):
+    help = 'Process queued vendor metric recomputations (VENDOR_METRICS_MODE = "background").'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=100,
+                            help='Maximum number of vendors to recompute per batch (default: 100).')
+        parser.add_argument('--poll-interval', type=float, default=1.0,
+                            help='Seconds to wait when the queue is empty (default: 1).')
+        parser.add_argument('--once', action='store_true',
+                            help='Drain the queue and exit instead of polling forever.')
+
+    def handle(self, *args, batch_size, poll_interval, once, **options):
+        processed = 0
+        while True:
+            count = jobs.process_jobs(batch_size)
+            processed += count
+            if count:
+                continue
+            if once:
+                break
+            time.sleep(poll_interval)
+        self.stdout.write(self.style.SUCCESS(f'Recomputed metrics for {processed} vendor(s).'))
@@ -0,0 +1,50 @@
+import time
+from django.core.management.base import BaseCommand
+from vendors import history, rankings
+from vendors.models import HistoricalPerformance
+
+INTERVALS = {
+    HistoricalPerformance.HOURLY: 60 * 60,
+    HistoricalPerformance.DAILY: 24 * 60 * 60,
+    HistoricalPerformance.MONTHLY: 30 * 24 * 60 * 60,
+}
+
+
+class Command(BaseCommand):
+    help = (
+        'Snapshot every vendor\'s current performance metrics into HistoricalPerformance, '
+        'compact old snapshots and rebuild the vendor rankings. Run once (e.g. from cron) '
+        'or with --loop as a scheduler.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--granularity', choices=sorted(INTERVALS), default=HistoricalPerformance.HOURLY,
+                            help='Granularity recorded on the new snapshots (default: hour).')
+        parser.add_argument('--loop', action='store_true',
+                            help='Keep running, taking a snapshot every --interval seconds.')
+        parser.add_argument('--interval', type=int,
+                            help='Seconds between snapshots with --loop (default: one granularity period).')
+        parser.add_argument('--no-compact', action='store_false', dest='compact',
+                            help='Skip rolling old snapshots up into coarser ones.')
+        parser.add_argument('--no-rankings', action='store_false', dest='rank',
+                            help='Skip rebuilding the vendor ranking snapshot.')
+
+    def handle(self, *args, granularity, loop, interval, compact, rank, **options):
+        interval = interval or INTERVALS[granularity]
+        while True:
+            started = time.monotonic()
+            self.run_once(granularity, compact, rank)
+            if not loop:
+                return
+            time.sleep(max(0, interval - (time.monotonic() - started)))
+
+    def run_once(self, granularity, compact, rank):
+        written = history.snapshot_vendor_performance(granularity)
+        self.stdout.write(f'Recorded {written} {granularity} snapshot(s).')
+        if compact:
+            for rolled_up, removed in history.compact_history().items():
+                if removed:
+                    self.stdout.write(f'Compacted {removed} {rolled_up} snapshot(s).')
+        if rank:
+            ranked = rankings.rebuild_rankings()
+            self.stdout.write(f'Rebuilt vendor rankings for {len(ranked)} metric(s).')
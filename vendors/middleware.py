@@ -0,0 +1,102 @@
+import logging
+import time
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.db import connection
+from . import instrumentation
+
+slow_request_logger = logging.getLogger('vendors.slow_requests')
+
+# Most statements included in a single slow-request log entry.
+SLOW_LOG_MAX_QUERIES = 20
+
+
+class QueryRecorder:
+    """``execute_wrapper`` hook that counts and times queries, optionally keeping the SQL."""
+
+    def __init__(self, keep_sql=False):
+        self.keep_sql = keep_sql
+        self.count = 0
+        self.duration = 0.0
+        self.statements = []
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = time.perf_counter() - start
+            self.count += 1
+            self.duration += elapsed
+            if self.keep_sql:
+                self.statements.append((elapsed, sql))
+
+
+class RequestMetricsMiddleware:
+    """
+    Records, per route and method, the total time, SQL time, query count and
+    response size of every request. Requests slower than
+    ``SLOW_REQUEST_THRESHOLD_MS`` are logged with their slowest statements.
+
+    Works in both sync and async chains, so it does not force async views
+    back onto a thread.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        recorder = self.make_recorder()
+        start = time.perf_counter()
+        with connection.execute_wrapper(recorder):
+            response = self.get_response(request)
+        return self.record(request, response, time.perf_counter() - start, recorder)
+
+    async def __acall__(self, request):
+        recorder = self.make_recorder()
+        start = time.perf_counter()
+        # Queries from async code run on the request's sync thread, so the
+        # wrapper has to be installed on that thread's connection.
+        wrapper = await sync_to_async(self.install_wrapper)(recorder)
+        try:
+            response = await self.get_response(request)
+        finally:
+            await sync_to_async(wrapper.__exit__)(None, None, None)
+        return self.record(request, response, time.perf_counter() - start, recorder)
+
+    def make_recorder(self):
+        return QueryRecorder(keep_sql=getattr(settings, 'SLOW_REQUEST_THRESHOLD_MS', None) is not None)
+
+    def install_wrapper(self, recorder):
+        wrapper = connection.execute_wrapper(recorder)
+        wrapper.__enter__()
+        return wrapper
+
+    def record(self, request, response, duration, recorder):
+        threshold = getattr(settings, 'SLOW_REQUEST_THRESHOLD_MS', None)
+        match = getattr(request, 'resolver_match', None)
+        labels = {'route': match.view_name if match else 'unmatched', 'method': request.method}
+        instrumentation.observe('vms_request_duration_seconds', duration, **labels)
+        instrumentation.observe('vms_request_sql_duration_seconds', recorder.duration, **labels)
+        instrumentation.observe('vms_request_queries', recorder.count, **labels)
+        if not response.streaming:
+            instrumentation.observe('vms_response_size_bytes', len(response.content), **labels)
+
+        if threshold is not None and duration * 1000 >= threshold:
+            self.log_slow_request(request, response, labels['route'], duration, recorder)
+        return response
+
+    def log_slow_request(self, request, response, route, duration, recorder):
+        slowest = sorted(recorder.statements, key=lambda statement: statement[0], reverse=True)
+        lines = [
+            f'Slow request: {request.method} {request.get_full_path()} ({route}) -> {response.status_code} '
+            f'in {duration * 1000:.1f}ms, {recorder.count} queries, {recorder.duration * 1000:.1f}ms SQL'
+        ]
+        lines.extend(f'  {elapsed * 1000:.1f}ms {sql}' for elapsed, sql in slowest[:SLOW_LOG_MAX_QUERIES])
+        slow_request_logger.warning('\n'.join(lines))
@@ -0,0 +1,28 @@
+# Generated by Django 5.0.4 on 2026-10-18 19:15
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('vendors', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='VendorMetricAggregate',
+            fields=[
+                ('vendor', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='metric_aggregate', serialize=False, to='vendors.vendor')),
+                ('total_count', models.IntegerField(default=0)),
+                ('completed_count', models.IntegerField(default=0)),
+                ('on_time_count', models.IntegerField(default=0)),
+                ('rated_count', models.IntegerField(default=0)),
+                ('quality_rating_sum', models.FloatField(default=0)),
+                ('acknowledged_count', models.IntegerField(default=0)),
+                ('response_time_sum', models.FloatField(default=0)),
+                ('fulfilled_count', models.IntegerField(default=0)),
+            ],
+        ),
+    ]
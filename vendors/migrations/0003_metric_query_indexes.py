@@ -0,0 +1,41 @@
+# Generated by Django 5.0.4 on 2026-10-18 19:21
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('vendors', '0002_vendormetricaggregate'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='historicalperformance',
+            index=models.Index(fields=['vendor', 'date'], name='history_vendor_date_idx'),
+        ),
+        # Shares its leading column with the vendor foreign key's own index,
+        # which is kept: SQLite indexes end with the rowid, so that one is
+        # (vendor_id, id) and answers ?vendor= listings in id (cursor) order
+        # without sorting all of the vendor's orders, which this one cannot.
+        migrations.AddIndex(
+            model_name='purchaseorder',
+            index=models.Index(fields=['vendor', 'status'], name='po_vendor_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='purchaseorder',
+            index=models.Index(fields=['status'], name='po_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='purchaseorder',
+            index=models.Index(condition=models.Q(('status', 'completed')), fields=['vendor', 'fulfilled_without_issues', 'delivery_date'], name='po_completed_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='purchaseorder',
+            index=models.Index(condition=models.Q(('quality_rating__isnull', False), ('status', 'completed')), fields=['vendor', 'quality_rating'], name='po_completed_rated_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='purchaseorder',
+            index=models.Index(condition=models.Q(('acknowledgment_date__isnull', False), ('status', 'completed')), fields=['vendor', 'acknowledgment_date', 'issue_date'], name='po_completed_ack_idx'),
+        ),
+    ]
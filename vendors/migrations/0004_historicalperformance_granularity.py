@@ -0,0 +1,28 @@
+# Generated by Django 5.0.4 on 2026-10-18 19:22
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('vendors', '0003_metric_query_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='historicalperformance',
+            name='granularity',
+            field=models.CharField(choices=[('hour', 'Hourly'), ('day', 'Daily'), ('month', 'Monthly')], default='hour', max_length=10),
+        ),
+        migrations.AlterField(
+            model_name='historicalperformance',
+            name='date',
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+        migrations.AddIndex(
+            model_name='historicalperformance',
+            index=models.Index(fields=['granularity', 'date'], name='history_granularity_date_idx'),
+        ),
+    ]
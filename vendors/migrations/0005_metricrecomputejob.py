@@ -0,0 +1,22 @@
+# Generated by Django 5.0.4 on 2026-10-18 19:23
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('vendors', '0004_historicalperformance_granularity'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MetricRecomputeJob',
+            fields=[
+                ('vendor', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='+', serialize=False, to='vendors.vendor')),
+                ('enqueued_at', models.DateTimeField(db_index=True, default=django.utils.timezone.now)),
+            ],
+        ),
+    ]
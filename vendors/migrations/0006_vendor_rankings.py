@@ -0,0 +1,50 @@
+# Generated by Django 5.0.4 on 2026-10-18 19:27
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('vendors', '0005_metricrecomputejob'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='VendorRanking',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('metric', models.CharField(choices=[('on_time_delivery_rate', 'On-time delivery rate'), ('quality_rating_avg', 'Quality rating average'), ('average_response_time', 'Average response time'), ('fulfillment_rate', 'Fulfillment rate')], max_length=50)),
+                ('rank', models.PositiveIntegerField()),
+                ('value', models.FloatField()),
+                ('total_orders', models.IntegerField()),
+                ('generated_at', models.DateTimeField()),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='vendor',
+            index=models.Index(fields=['on_time_delivery_rate', 'id'], name='vendor_on_time_rank_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='vendor',
+            index=models.Index(fields=['quality_rating_avg', 'id'], name='vendor_quality_rank_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='vendor',
+            index=models.Index(fields=['average_response_time', 'id'], name='vendor_response_rank_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='vendor',
+            index=models.Index(fields=['fulfillment_rate', 'id'], name='vendor_fulfillment_rank_idx'),
+        ),
+        migrations.AddField(
+            model_name='vendorranking',
+            name='vendor',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='vendors.vendor'),
+        ),
+        migrations.AddConstraint(
+            model_name='vendorranking',
+            constraint=models.UniqueConstraint(fields=('metric', 'rank'), name='ranking_metric_rank_unique'),
+        ),
+    ]
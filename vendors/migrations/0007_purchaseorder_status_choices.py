@@ -0,0 +1,18 @@
+# Generated by Django 5.0.4 on 2026-10-18 19:46
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('vendors', '0006_vendor_rankings'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='purchaseorder',
+            name='status',
+            field=models.CharField(choices=[('pending', 'Pending'), ('acknowledged', 'Acknowledged'), ('completed', 'Completed'), ('canceled', 'Canceled')], max_length=50),
+        ),
+    ]
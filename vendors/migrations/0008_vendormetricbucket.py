@@ -0,0 +1,34 @@
+# Generated by Django 5.0.4 on 2026-10-18 19:50
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('vendors', '0007_purchaseorder_status_choices'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='VendorMetricBucket',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('total_count', models.IntegerField(default=0)),
+                ('completed_count', models.IntegerField(default=0)),
+                ('on_time_count', models.IntegerField(default=0)),
+                ('rated_count', models.IntegerField(default=0)),
+                ('quality_rating_sum', models.FloatField(default=0)),
+                ('acknowledged_count', models.IntegerField(default=0)),
+                ('response_time_sum', models.FloatField(default=0)),
+                ('fulfilled_count', models.IntegerField(default=0)),
+                ('day', models.DateField()),
+                ('vendor', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='metric_buckets', to='vendors.vendor')),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='vendormetricbucket',
+            constraint=models.UniqueConstraint(fields=('vendor', 'day'), name='metric_bucket_vendor_day_unique'),
+        ),
+    ]
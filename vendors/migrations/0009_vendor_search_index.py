@@ -0,0 +1,55 @@
+from django.db import migrations
+
+# The DDL as it stood when this migration was written; it is inlined so that
+# later changes to vendors.search cannot change what this migration does.
+CREATE_INDEX_SQL = [
+    "CREATE VIRTUAL TABLE IF NOT EXISTS vendors_vendor_search USING fts5("
+    "name, vendor_code, contact_details, address, content='vendors_vendor', content_rowid='id', "
+    "prefix='2 3', tokenize='unicode61 remove_diacritics 2')",
+    "CREATE TRIGGER IF NOT EXISTS vendors_vendor_search_insert AFTER INSERT ON vendors_vendor BEGIN "
+    "INSERT INTO vendors_vendor_search(rowid, name, vendor_code, contact_details, address) "
+    "VALUES (new.id, new.name, new.vendor_code, new.contact_details, new.address); END",
+    "CREATE TRIGGER IF NOT EXISTS vendors_vendor_search_delete AFTER DELETE ON vendors_vendor BEGIN "
+    "INSERT INTO vendors_vendor_search(vendors_vendor_search, rowid, name, vendor_code, contact_details, address) "
+    "VALUES ('delete', old.id, old.name, old.vendor_code, old.contact_details, old.address); END",
+    "CREATE TRIGGER IF NOT EXISTS vendors_vendor_search_update "
+    "AFTER UPDATE OF name, vendor_code, contact_details, address ON vendors_vendor BEGIN "
+    "INSERT INTO vendors_vendor_search(vendors_vendor_search, rowid, name, vendor_code, contact_details, address) "
+    "VALUES ('delete', old.id, old.name, old.vendor_code, old.contact_details, old.address); "
+    "INSERT INTO vendors_vendor_search(rowid, name, vendor_code, contact_details, address) "
+    "VALUES (new.id, new.name, new.vendor_code, new.contact_details, new.address); END",
+    "INSERT INTO vendors_vendor_search(vendors_vendor_search) VALUES ('rebuild')",
+]
+DROP_INDEX_SQL = [
+    'DROP TRIGGER IF EXISTS vendors_vendor_search_insert',
+    'DROP TRIGGER IF EXISTS vendors_vendor_search_delete',
+    'DROP TRIGGER IF EXISTS vendors_vendor_search_update',
+    'DROP TABLE IF EXISTS vendors_vendor_search',
+]
+
+
+def run_on_sqlite(statements):
+    def run(apps, schema_editor):
+        if schema_editor.connection.vendor != 'sqlite':
+            return
+        for statement in statements:
+            schema_editor.execute(statement, params=None)
+    return run
+
+
+class Migration(migrations.Migration):
+    """
+    SQLite-only FTS5 index over the vendor table (see ``vendors.search``).
+
+    SQLite rebuilds a table to alter it, which drops its triggers; run the
+    ``rebuild_vendor_search_index`` command after any later migration that
+    alters ``vendors_vendor``.
+    """
+
+    dependencies = [
+        ('vendors', '0008_vendormetricbucket'),
+    ]
+
+    operations = [
+        migrations.RunPython(run_on_sqlite(CREATE_INDEX_SQL), run_on_sqlite(DROP_INDEX_SQL)),
+    ]
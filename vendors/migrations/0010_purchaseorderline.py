@@ -0,0 +1,32 @@
+# Generated by Django 5.0.4 on 2026-10-18 20:08
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('vendors', '0009_vendor_search_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PurchaseOrderLine',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('position', models.PositiveIntegerField()),
+                ('name', models.CharField(max_length=255)),
+                ('quantity', models.IntegerField(default=0)),
+                ('purchase_order', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='lines', to='vendors.purchaseorder')),
+                ('vendor', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='vendors.vendor')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['vendor', 'name'], name='po_line_vendor_name_idx'), models.Index(fields=['name', 'vendor'], name='po_line_name_vendor_idx')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='purchaseorderline',
+            constraint=models.UniqueConstraint(fields=('purchase_order', 'position'), name='po_line_order_position_unique'),
+        ),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 5.0.4 on 2026-10-18 20:54
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('vendors', '0010_purchaseorderline'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='vendor',
+            name='vendor_on_time_rank_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='vendor',
+            name='vendor_quality_rank_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='vendor',
+            name='vendor_fulfillment_rank_idx',
+        ),
+        migrations.AddIndex(
+            model_name='vendor',
+            index=models.Index(fields=['-on_time_delivery_rate', 'id'], name='vendor_on_time_rank_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='vendor',
+            index=models.Index(fields=['-quality_rating_avg', 'id'], name='vendor_quality_rank_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='vendor',
+            index=models.Index(fields=['-fulfillment_rate', 'id'], name='vendor_fulfillment_rank_idx'),
+        ),
+    ]
@@ -1,7 +1,61 @@
-from django.db import models
+import copy
+from django.db import models, transaction
+from django.db.models import Q
+from django.utils import timezone
 from django.core.validators import MinValueValidator, MaxValueValidator
 
-class Vendor(models.Model):
+class DirtyFieldsMixin(models.Model):
+    """
+    Remembers the field values an instance was loaded or last saved with.
+
+    Saving an existing instance without ``update_fields`` only writes the
+    columns that changed since then; if nothing changed, nothing is written
+    and no save signals are sent.
+    """
+    class Meta:
+        abstract = True
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance.snapshot_fields()
+        return instance
+
+    def snapshot_fields(self, fields=None):
+        """Record the current value of ``fields`` (default: all loaded fields) as clean."""
+        if fields is None or not hasattr(self, '_loaded_values'):
+            self._loaded_values = {}
+        for field in self._meta.concrete_fields:
+            if field.attname in self.__dict__ and (fields is None or field.attname in fields or field.name in fields):
+                # Copy so in-place changes to JSON values are still detected.
+                self._loaded_values[field.attname] = copy.deepcopy(self.__dict__[field.attname])
+
+    @property
+    def loaded_values(self):
+        return getattr(self, '_loaded_values', {})
+
+    def get_dirty_fields(self):
+        """Return the names of loaded or assigned fields that differ from the snapshot."""
+        loaded = self.loaded_values
+        return [
+            field.name
+            for field in self._meta.concrete_fields
+            if not field.primary_key
+            and field.attname in self.__dict__
+            and (field.attname not in loaded or loaded[field.attname] != self.__dict__[field.attname])
+        ]
+
+    def save(self, *args, **kwargs):
+        if not self._state.adding and not args and kwargs.get('update_fields') is None and self.loaded_values:
+            kwargs['update_fields'] = self.get_dirty_fields()
+        super().save(*args, **kwargs)
+        self.snapshot_fields(kwargs.get('update_fields'))
+
+    def refresh_from_db(self, using=None, fields=None, **kwargs):
+        super().refresh_from_db(using=using, fields=fields, **kwargs)
+        self.snapshot_fields(fields)
+
+class Vendor(DirtyFieldsMixin, models.Model):
     name = models.CharField(max_length=255)
     contact_details = models.TextField(blank=True)
     address = models.TextField(blank=True)
@@ -11,23 +65,211 @@ class Vendor(models.Model):
     average_response_time = models.FloatField(default=0, validators=[MinValueValidator(0)])
     fulfillment_rate = models.FloatField(default=0, validators=[MinValueValidator(0), MaxValueValidator(100)])
 
-class PurchaseOrder(models.Model):
+    class Meta:
+        indexes = [
+            # Ordered scans for the ranking snapshot, in the order of
+            # rankings.ranked_vendors (best first, then id) so no sort is needed.
+            models.Index(fields=['-on_time_delivery_rate', 'id'], name='vendor_on_time_rank_idx'),
+            models.Index(fields=['-quality_rating_avg', 'id'], name='vendor_quality_rank_idx'),
+            models.Index(fields=['average_response_time', 'id'], name='vendor_response_rank_idx'),
+            models.Index(fields=['-fulfillment_rate', 'id'], name='vendor_fulfillment_rank_idx'),
+        ]
+
+class PurchaseOrder(DirtyFieldsMixin, models.Model):
+    PENDING = 'pending'
+    ACKNOWLEDGED = 'acknowledged'
+    COMPLETED = 'completed'
+    CANCELED = 'canceled'
+    STATUS_CHOICES = [
+        (PENDING, 'Pending'),
+        (ACKNOWLEDGED, 'Acknowledged'),
+        (COMPLETED, 'Completed'),
+        (CANCELED, 'Canceled'),
+    ]
+    # Allowed status changes, each with the vendor metrics it can affect.
+    # Only completed orders count towards the rates (besides the order total
+    # behind fulfillment_rate), so completing an order is the only transition
+    # that touches them.
+    TRANSITIONS = {
+        (PENDING, ACKNOWLEDGED): (),
+        (PENDING, CANCELED): (),
+        (ACKNOWLEDGED, COMPLETED): (
+            'on_time_delivery_rate', 'quality_rating_avg', 'average_response_time', 'fulfillment_rate',
+        ),
+        (ACKNOWLEDGED, CANCELED): (),
+    }
+
     po_number = models.CharField(max_length=50, unique=True)
     vendor = models.ForeignKey(Vendor, on_delete=models.CASCADE)
     order_date = models.DateTimeField(auto_now_add=True)
     delivery_date = models.DateTimeField()
     items = models.JSONField()
     quantity = models.IntegerField(validators=[MinValueValidator(1)])
-    status = models.CharField(max_length=50)
+    status = models.CharField(max_length=50, choices=STATUS_CHOICES)
     quality_rating = models.FloatField(null=True, blank=True, validators=[MinValueValidator(0), MaxValueValidator(5)])
     issue_date = models.DateTimeField(auto_now_add=True)
     acknowledgment_date = models.DateTimeField(null=True, blank=True)
     fulfilled_without_issues = models.BooleanField(default=False)
 
+    class Meta:
+        indexes = [
+            # Listing filters (?vendor=&status=) and the per-vendor metric scans.
+            # The vendor foreign key keeps its own index too: it is effectively
+            # (vendor_id, id), which serves ?vendor= listings in id order.
+            models.Index(fields=['vendor', 'status'], name='po_vendor_status_idx'),
+            models.Index(fields=['status'], name='po_status_idx'),
+            # Partial indexes covering the completed-order metric aggregates.
+            models.Index(
+                fields=['vendor', 'fulfilled_without_issues', 'delivery_date'],
+                condition=Q(status='completed'),
+                name='po_completed_idx',
+            ),
+            models.Index(
+                fields=['vendor', 'quality_rating'],
+                condition=Q(status='completed', quality_rating__isnull=False),
+                name='po_completed_rated_idx',
+            ),
+            models.Index(
+                fields=['vendor', 'acknowledgment_date', 'issue_date'],
+                condition=Q(status='completed', acknowledgment_date__isnull=False),
+                name='po_completed_ack_idx',
+            ),
+        ]
+
+    def save(self, *args, **kwargs):
+        # The metric signal handlers read the stored row (locked) before the
+        # write and apply the difference after it; both happen in one
+        # transaction so no other write lands in between.
+        with transaction.atomic(using=kwargs.get('using'), savepoint=False):
+            super().save(*args, **kwargs)
+
+    @classmethod
+    def can_transition(cls, old_status, new_status):
+        return old_status == new_status or (old_status, new_status) in cls.TRANSITIONS
+
+class PurchaseOrderLine(models.Model):
+    """
+    One entry of a purchase order's ``items``, kept in sync by
+    ``vendors.lines`` so that item-level volumes are a ``GROUP BY`` away
+    instead of a scan of every order's JSON. The order's vendor is copied onto
+    the line so per-vendor aggregates read a single index.
+    """
+    purchase_order = models.ForeignKey(PurchaseOrder, on_delete=models.CASCADE, related_name='lines', db_index=False)
+    position = models.PositiveIntegerField()
+    vendor = models.ForeignKey(Vendor, on_delete=models.CASCADE, related_name='+', db_index=False)
+    name = models.CharField(max_length=255)
+    quantity = models.IntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            # Also serves the lookups by purchase order when lines are replaced.
+            models.UniqueConstraint(fields=['purchase_order', 'position'], name='po_line_order_position_unique'),
+        ]
+        indexes = [
+            # Per-vendor item volumes, grouped by name straight off the index.
+            models.Index(fields=['vendor', 'name'], name='po_line_vendor_name_idx'),
+            # One item across all vendors.
+            models.Index(fields=['name', 'vendor'], name='po_line_name_vendor_idx'),
+        ]
+
 class HistoricalPerformance(models.Model):
+    HOURLY = 'hour'
+    DAILY = 'day'
+    MONTHLY = 'month'
+    GRANULARITY_CHOICES = [
+        (HOURLY, 'Hourly'),
+        (DAILY, 'Daily'),
+        (MONTHLY, 'Monthly'),
+    ]
+
     vendor = models.ForeignKey(Vendor, on_delete=models.CASCADE)
-    date = models.DateTimeField(auto_now_add=True)
+    date = models.DateTimeField(default=timezone.now)
+    granularity = models.CharField(max_length=10, choices=GRANULARITY_CHOICES, default=HOURLY)
     on_time_delivery_rate = models.FloatField()
     quality_rating_avg = models.FloatField()
     average_response_time = models.FloatField()
-    fulfillment_rate = models.FloatField()
\ No newline at end of file
+    fulfillment_rate = models.FloatField()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['vendor', 'date'], name='history_vendor_date_idx'),
+            # Compaction selects old rows of one granularity across all vendors.
+            models.Index(fields=['granularity', 'date'], name='history_granularity_date_idx'),
+        ]
+
+
+class MetricCounters(models.Model):
+    """The counters purchase orders contribute to; see ``vendors.metrics``."""
+    total_count = models.IntegerField(default=0)
+    completed_count = models.IntegerField(default=0)
+    on_time_count = models.IntegerField(default=0)
+    rated_count = models.IntegerField(default=0)
+    quality_rating_sum = models.FloatField(default=0)
+    acknowledged_count = models.IntegerField(default=0)
+    response_time_sum = models.FloatField(default=0)
+    fulfilled_count = models.IntegerField(default=0)
+
+    class Meta:
+        abstract = True
+
+
+class VendorMetricAggregate(MetricCounters):
+    """
+    Running counters behind a vendor's performance metrics.
+
+    Each purchase order contributes to these counters; saving or deleting an
+    order applies only the difference between its old and new contribution.
+    """
+    vendor = models.OneToOneField(Vendor, on_delete=models.CASCADE, primary_key=True, related_name='metric_aggregate')
+
+
+class VendorMetricBucket(MetricCounters):
+    """
+    The counters contributed by a vendor's purchase orders issued on one day.
+
+    Kept up to date like ``VendorMetricAggregate``, so the metrics of a time
+    window are the sum of at most one row per day in it.
+    """
+    vendor = models.ForeignKey(Vendor, on_delete=models.CASCADE, related_name='metric_buckets')
+    day = models.DateField()
+
+    class Meta:
+        constraints = [
+            # Also serves the per-vendor day range scans of windowed metrics.
+            models.UniqueConstraint(fields=['vendor', 'day'], name='metric_bucket_vendor_day_unique'),
+        ]
+
+
+class MetricRecomputeJob(models.Model):
+    """
+    A pending metric recomputation for a vendor, processed by the
+    ``run_metric_worker`` command. There is at most one job per vendor, so a
+    burst of writes to the same vendor is merged into a single recompute.
+    """
+    vendor = models.OneToOneField(Vendor, on_delete=models.CASCADE, primary_key=True, related_name='+')
+    enqueued_at = models.DateTimeField(default=timezone.now, db_index=True)
+
+
+class VendorRanking(models.Model):
+    """
+    A precomputed position of a vendor in the ranking for one metric, rebuilt
+    by ``rebuild_vendor_rankings`` so that pages of a ranking are cheap reads.
+    """
+    METRIC_CHOICES = [
+        ('on_time_delivery_rate', 'On-time delivery rate'),
+        ('quality_rating_avg', 'Quality rating average'),
+        ('average_response_time', 'Average response time'),
+        ('fulfillment_rate', 'Fulfillment rate'),
+    ]
+
+    metric = models.CharField(max_length=50, choices=METRIC_CHOICES)
+    rank = models.PositiveIntegerField()
+    vendor = models.ForeignKey(Vendor, on_delete=models.CASCADE, related_name='+')
+    value = models.FloatField()
+    total_orders = models.IntegerField()
+    generated_at = models.DateTimeField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['metric', 'rank'], name='ranking_metric_rank_unique'),
+        ]
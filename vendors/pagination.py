@@ -0,0 +1,83 @@
+from django.db.models import Q
+from rest_framework.pagination import CursorPagination
+
+
+class IdCursorPagination(CursorPagination):
+    """
+    Cursor pagination over the primary key, which is indexed and unique, so
+    pages stay stable while rows are being inserted.
+
+    ``paginate_queryset`` is split in two so the async views can fetch the
+    page themselves: ``get_page_queryset`` builds the query and
+    ``set_page`` takes its rows, after which the ``get_*_link`` methods work
+    as usual.
+    """
+    ordering = 'id'
+    page_size_query_param = 'page_size'
+    max_page_size = 1000
+
+    def paginate_queryset(self, queryset, request, view=None):
+        queryset = self.get_page_queryset(queryset, request, view)
+        if queryset is None:
+            return None
+        return self.set_page(list(queryset))
+
+    def get_page_queryset(self, queryset, request, view=None):
+        """The page's rows plus one, or ``None`` when pagination is off."""
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        if not self.page_size:
+            return None
+        self.base_url = request.build_absolute_uri()
+        self.ordering = self.get_ordering(request, queryset, view)
+        self.cursor = self.decode_cursor(request)
+        if self.cursor is None:
+            offset, reverse, position = 0, False, None
+        else:
+            offset, reverse, position = self.cursor
+
+        if reverse:
+            queryset = queryset.order_by(*(o[1:] if o.startswith('-') else f'-{o}' for o in self.ordering))
+        else:
+            queryset = queryset.order_by(*self.ordering)
+        if str(position) != 'None':
+            order = self.ordering[0]
+            is_reversed = order.startswith('-')
+            order_attr = order.lstrip('-')
+            lookup = 'lt' if reverse != is_reversed else 'gt'
+            filter_query = Q(**{f'{order_attr}__{lookup}': position})
+            # Rows with a null position sort last in descending order.
+            if reverse or is_reversed:
+                filter_query |= Q(**{f'{order_attr}__isnull': True})
+            queryset = queryset.filter(filter_query)
+        return queryset[offset:offset + self.page_size + 1]
+
+    def set_page(self, results):
+        """Take the rows of ``get_page_queryset`` and return the page."""
+        if self.cursor is None:
+            offset, reverse, position = 0, False, None
+        else:
+            offset, reverse, position = self.cursor
+        self.page = results[:self.page_size]
+        has_following = len(results) > len(self.page)
+        following = self._get_position_from_instance(results[-1], self.ordering) if has_following else None
+
+        if reverse:
+            self.page.reverse()
+            self.has_next = position is not None or offset > 0
+            self.has_previous = has_following
+            self.next_position, self.previous_position = position, following
+        else:
+            self.has_next = has_following
+            self.has_previous = position is not None or offset > 0
+            self.next_position, self.previous_position = following, position
+        if (self.has_previous or self.has_next) and self.template is not None:
+            self.display_page_controls = True
+        return self.page
+
+
+class RankCursorPagination(CursorPagination):
+    """Keyset pagination over a ranking's rank column."""
+    ordering = 'rank'
+    page_size_query_param = 'page_size'
+    max_page_size = 1000
@@ -0,0 +1,27 @@
+"""
+The ``fields`` query parameter, shared by the DRF views and the async views.
+"""
+from rest_framework.exceptions import ValidationError
+
+
+def parse_fields(raw, serializer_class):
+    """
+    Return the field names listed in the comma-separated ``raw``, or ``None``
+    when it names none. Names unknown to ``serializer_class`` are rejected.
+    """
+    if not raw:
+        return None
+    fields = [name.strip() for name in raw.split(',') if name.strip()]
+    unknown = set(fields) - set(serializer_class().fields)
+    if unknown:
+        raise ValidationError({'fields': [f'Unknown field(s): {", ".join(sorted(unknown))}.']})
+    return fields or None
+
+
+def project(queryset, fields):
+    """Limit ``queryset`` to the columns behind ``fields``."""
+    if not fields:
+        return queryset
+    columns = {field.name for field in queryset.model._meta.concrete_fields}
+    # The primary key is always loaded; pagination orders on it.
+    return queryset.only('id', *(name for name in fields if name in columns))
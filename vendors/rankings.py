@@ -0,0 +1,56 @@
+"""
+Vendor rankings.
+
+``rebuild_rankings`` writes a ``VendorRanking`` row per vendor and metric in
+rank order. Vendors are only ranked on a metric once they have orders that
+count towards it, so a vendor with no acknowledged orders does not top the
+response-time ranking with a zero average.
+"""
+from django.db import transaction
+from django.utils import timezone
+from .models import Vendor, VendorRanking
+
+# metric: (higher is better, aggregate counter that must be non-zero)
+RANKED_METRICS = {
+    'on_time_delivery_rate': (True, 'completed_count'),
+    'quality_rating_avg': (True, 'rated_count'),
+    'average_response_time': (False, 'acknowledged_count'),
+    'fulfillment_rate': (True, 'total_count'),
+}
+
+
+def ranked_vendors(metric):
+    """Vendors eligible for ``metric``, best first, as ``(id, value, total_orders)`` rows."""
+    higher_is_better, counter = RANKED_METRICS[metric]
+    return (
+        Vendor.objects.filter(**{f'metric_aggregate__{counter}__gt': 0})
+        .order_by(f'-{metric}' if higher_is_better else metric, 'id')
+        .values_list('id', metric, 'metric_aggregate__total_count')
+    )
+
+
+def rebuild_rankings(metrics=None, batch_size=1000):
+    """
+    Replace the ranking snapshot for ``metrics`` (default: all of them).
+
+    Each metric is swapped inside one transaction, so readers never see a
+    partially written ranking. Returns a ``{metric: vendors_ranked}`` mapping.
+    """
+    generated_at = timezone.now()
+    counts = {}
+    for metric in metrics or RANKED_METRICS:
+        with transaction.atomic():
+            VendorRanking.objects.filter(metric=metric).delete()
+            batch = []
+            rank = 0
+            for rank, (vendor_id, value, total_orders) in enumerate(ranked_vendors(metric).iterator(), 1):
+                batch.append(VendorRanking(
+                    metric=metric, rank=rank, vendor_id=vendor_id, value=value,
+                    total_orders=total_orders, generated_at=generated_at,
+                ))
+                if len(batch) >= batch_size:
+                    VendorRanking.objects.bulk_create(batch)
+                    batch = []
+            VendorRanking.objects.bulk_create(batch)
+        counts[metric] = rank
+    return counts
@@ -0,0 +1,174 @@
+"""
+Vendor search.
+
+On SQLite, vendors are indexed by an FTS5 table (``vendors_vendor_search``)
+over ``SEARCH_FIELDS``. It is an external-content index on the vendor table,
+kept in sync by triggers, so every write path (including ``bulk_create`` and
+``update()``) maintains it. Matches are ranked with bm25, weighting name and
+vendor code above contact details and address. Other databases fall back to
+case-insensitive lookups on the same columns, ranked by where the terms
+matched.
+
+Query words match whole words, except the last one, which matches as a
+prefix ("acme wid" finds "Acme Widgets"). Expanding every word as a prefix
+would merge the posting lists of every token sharing it (e.g. all the
+``vendorN@...`` addresses for "vendor"), which is many times slower on large
+tables. The fallback matches every word as a substring.
+
+Results come in keyset pages over ``(score, id)``, lower scores first, so a
+page never costs more than ranking the matches once.
+"""
+import base64
+import binascii
+import json
+import re
+from django.db import connection
+from django.db.models import Case, IntegerField, Q, Value, When
+from .models import Vendor
+
+SEARCH_TABLE = 'vendors_vendor_search'
+SEARCH_FIELDS = ('name', 'vendor_code', 'contact_details', 'address')
+# bm25 weight of each of SEARCH_FIELDS.
+FIELD_WEIGHTS = (10.0, 10.0, 1.0, 1.0)
+MAX_TERMS = 10
+
+_columns = ', '.join(SEARCH_FIELDS)
+_new_values = ', '.join(f'new.{field}' for field in SEARCH_FIELDS)
+_old_values = ', '.join(f'old.{field}' for field in SEARCH_FIELDS)
+_delete_old = (
+    f"INSERT INTO {SEARCH_TABLE}({SEARCH_TABLE}, rowid, {_columns}) VALUES ('delete', old.id, {_old_values});"
+)
+_insert_new = f'INSERT INTO {SEARCH_TABLE}(rowid, {_columns}) VALUES (new.id, {_new_values});'
+
+CREATE_INDEX_SQL = [
+    f"CREATE VIRTUAL TABLE IF NOT EXISTS {SEARCH_TABLE} USING fts5({_columns}, content='vendors_vendor', "
+    f"content_rowid='id', prefix='2 3', tokenize='unicode61 remove_diacritics 2')",
+    f'CREATE TRIGGER IF NOT EXISTS {SEARCH_TABLE}_insert AFTER INSERT ON vendors_vendor BEGIN {_insert_new} END',
+    f'CREATE TRIGGER IF NOT EXISTS {SEARCH_TABLE}_delete AFTER DELETE ON vendors_vendor BEGIN {_delete_old} END',
+    # Only fires for the indexed columns, not for metric updates.
+    f'CREATE TRIGGER IF NOT EXISTS {SEARCH_TABLE}_update AFTER UPDATE OF {_columns} ON vendors_vendor '
+    f'BEGIN {_delete_old} {_insert_new} END',
+]
+DROP_INDEX_SQL = [
+    f'DROP TRIGGER IF EXISTS {SEARCH_TABLE}_insert',
+    f'DROP TRIGGER IF EXISTS {SEARCH_TABLE}_delete',
+    f'DROP TRIGGER IF EXISTS {SEARCH_TABLE}_update',
+    f'DROP TABLE IF EXISTS {SEARCH_TABLE}',
+]
+
+_FTS_PAGE_SQL = (
+    f'SELECT score, rowid FROM ('
+    f'SELECT rowid, bm25({SEARCH_TABLE}, {", ".join(map(str, FIELD_WEIGHTS))}) AS score '
+    f'FROM {SEARCH_TABLE} WHERE {SEARCH_TABLE} MATCH %s'
+    f') {{where}} ORDER BY score {{direction}}, rowid {{direction}} LIMIT %s'
+)
+
+
+def uses_fts(conn=connection):
+    return conn.vendor == 'sqlite'
+
+
+def build_index(conn=connection):
+    """Create the search index and its triggers if missing, and (re)fill the index."""
+    if not uses_fts(conn):
+        return
+    with conn.cursor() as cursor:
+        for statement in CREATE_INDEX_SQL:
+            cursor.execute(statement)
+        cursor.execute(f"INSERT INTO {SEARCH_TABLE}({SEARCH_TABLE}) VALUES ('rebuild')")
+
+
+def drop_index(conn=connection):
+    if not uses_fts(conn):
+        return
+    with conn.cursor() as cursor:
+        for statement in DROP_INDEX_SQL:
+            cursor.execute(statement)
+
+
+def search_terms(query):
+    """The words of ``query``, lowercased; at most ``MAX_TERMS``."""
+    return re.findall(r'\w+', query.lower())[:MAX_TERMS]
+
+
+def encode_cursor(score, pk, reverse=False):
+    payload = json.dumps([score, pk, int(reverse)], separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode()).decode()
+
+
+def decode_cursor(cursor):
+    """Return ``(score, pk, reverse)``; raises ``ValueError`` for a malformed cursor."""
+    try:
+        score, pk, reverse = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except (binascii.Error, TypeError, ValueError, UnicodeDecodeError) as exc:
+        raise ValueError('Invalid cursor.') from exc
+    if not isinstance(score, (int, float)) or not isinstance(pk, int):
+        raise ValueError('Invalid cursor.')
+    return score, pk, bool(reverse)
+
+
+def search_page(query, page_size, cursor=None):
+    """
+    Return ``(matches, next_cursor, previous_cursor)`` for ``query``.
+
+    ``matches`` is a list of ``(score, vendor_id)`` pairs, best first.
+    ``cursor`` is a value from a previous call's ``next_cursor`` or
+    ``previous_cursor``.
+    """
+    terms = search_terms(query)
+    if not terms:
+        return [], None, None
+    position, reverse = None, False
+    if cursor is not None:
+        score, pk, reverse = decode_cursor(cursor)
+        position = (score, pk)
+    fetch = _fts_page if uses_fts() else _fallback_page
+    matches = fetch(terms, page_size + 1, position, reverse)
+    has_more = len(matches) > page_size
+    matches = matches[:page_size]
+    if reverse:
+        matches.reverse()
+    if not matches:
+        return [], None, None
+    # Going backwards we came from a later page, and going forwards from an
+    # earlier one (if there was a cursor at all).
+    has_next = has_more if not reverse else True
+    has_previous = has_more if reverse else position is not None
+    next_cursor = encode_cursor(*matches[-1]) if has_next else None
+    previous_cursor = encode_cursor(*matches[0], reverse=True) if has_previous else None
+    return matches, next_cursor, previous_cursor
+
+
+def _fts_page(terms, limit, position, reverse):
+    match = ' '.join([*(f'"{term}"' for term in terms[:-1]), f'"{terms[-1]}"*'])
+    params = [match]
+    where = ''
+    if position is not None:
+        where = f'WHERE (score, rowid) {"<" if reverse else ">"} (%s, %s)'
+        params.extend(position)
+    sql = _FTS_PAGE_SQL.format(where=where, direction='DESC' if reverse else 'ASC')
+    with connection.cursor() as cursor:
+        cursor.execute(sql, [*params, limit])
+        return [(score, pk) for score, pk in cursor.fetchall()]
+
+
+def _fallback_page(terms, limit, position, reverse):
+    vendors = Vendor.objects.all()
+    for term in terms:
+        vendors = vendors.filter(Q(*(Q(**{f'{field}__icontains': term}) for field in SEARCH_FIELDS), _connector=Q.OR))
+    # Name or code starting with the first term, then containing it, then the rest.
+    first = terms[0]
+    vendors = vendors.annotate(score=Case(
+        When(Q(name__istartswith=first) | Q(vendor_code__istartswith=first), then=Value(0)),
+        When(Q(name__icontains=first) | Q(vendor_code__icontains=first), then=Value(1)),
+        default=Value(2),
+        output_field=IntegerField(),
+    ))
+    if position is not None:
+        score, pk = position
+        if reverse:
+            vendors = vendors.filter(Q(score__lt=score) | Q(score=score, pk__lt=pk))
+        else:
+            vendors = vendors.filter(Q(score__gt=score) | Q(score=score, pk__gt=pk))
+    ordering = ('-score', '-pk') if reverse else ('score', 'pk')
+    return list(vendors.order_by(*ordering).values_list('score', 'pk')[:limit])
@@ -1,7 +1,22 @@
+from django.conf import settings
 from rest_framework import serializers
-from .models import Vendor, PurchaseOrder
+from rest_framework.validators import UniqueValidator
+from .models import Vendor, PurchaseOrder, HistoricalPerformance, VendorRanking
+from . import export
+from . import metrics
 
-class VendorSerializer(serializers.ModelSerializer):
+class DynamicFieldsMixin:
+    """
+    Accepts an optional ``fields`` argument limiting which fields are serialized.
+    """
+    def __init__(self, *args, **kwargs):
+        fields = kwargs.pop('fields', None)
+        super().__init__(*args, **kwargs)
+        if fields is not None:
+            for name in set(self.fields) - set(fields):
+                self.fields.pop(name)
+
+class VendorSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     class Meta:
         model = Vendor
         fields = '__all__'
@@ -15,21 +30,125 @@ class VendorSerializer(serializers.ModelSerializer):
         }
 
     def update(self, instance, validated_data):
-        instance.name = validated_data.get('name', instance.name)
-        instance.contact_details = validated_data.get('contact_details', instance.contact_details)
-        instance.address = validated_data.get('address', instance.address)
-        instance.vendor_code = validated_data.get('vendor_code', instance.vendor_code)
-        instance.on_time_delivery_rate = validated_data.get('on_time_delivery_rate', instance.on_time_delivery_rate)
-        instance.quality_rating_avg = validated_data.get('quality_rating_avg', instance.quality_rating_avg)
-        instance.average_response_time = validated_data.get('average_response_time', instance.average_response_time)
-        instance.fulfillment_rate = validated_data.get('fulfillment_rate', instance.fulfillment_rate)
+        # Only assign submitted fields; the model's dirty-field tracking then
+        # writes just the columns that actually changed.
+        for attr, value in validated_data.items():
+            setattr(instance, attr, value)
         instance.save()
         return instance
 
-class PurchaseOrderSerializer(serializers.ModelSerializer):
+class BulkVendorField(serializers.PrimaryKeyRelatedField):
+    """
+    A vendor id, checked for its type only: ``PurchaseOrderListSerializer``
+    looks up the vendors of a whole chunk of rows at once.
+    """
+    def to_internal_value(self, data):
+        if isinstance(data, bool) or not isinstance(data, (int, str)):
+            self.fail('incorrect_type', data_type=type(data).__name__)
+        try:
+            return int(data)
+        except ValueError:
+            self.fail('incorrect_type', data_type=type(data).__name__)
+
+class PurchaseOrderListSerializer(serializers.ListSerializer):
+    """
+    Validates a batch of purchase orders row by row.
+
+    Invalid rows do not fail the batch: their errors are collected in
+    ``row_errors`` (keyed by row index) and ``validated_data`` holds
+    ``(index, data)`` pairs for the rows that passed.
+
+    Rows are checked for an existing vendor and an unused ``po_number`` with
+    one query each per chunk of ``chunk_size`` rows (from the context, default
+    ``PURCHASE_ORDER_BULK_CHUNK_SIZE``), instead of the child's two lookups
+    per row.
+    """
+    def run_child_validation(self, data):
+        try:
+            return self.child.run_validation(data)
+        except serializers.ValidationError as exc:
+            return exc
+
+    def defer_lookups(self):
+        """Replace the child's per-row vendor and ``po_number`` lookups with type checks."""
+        fields = self.child.fields
+        vendor = fields['vendor']
+        fields['vendor'] = BulkVendorField(queryset=vendor.queryset, required=vendor.required)
+        po_number = fields['po_number']
+        unique = [validator for validator in po_number.validators if isinstance(validator, UniqueValidator)]
+        po_number.validators = [validator for validator in po_number.validators if validator not in unique]
+        self.unique_po_number_message = unique[0].message if unique else UniqueValidator.message
+
+    def to_internal_value(self, data):
+        self.defer_lookups()
+        self.row_errors = {}
+        valid_rows = []
+        po_numbers = set()
+        for index, row in enumerate(super().to_internal_value(data)):
+            if isinstance(row, serializers.ValidationError):
+                self.row_errors[index] = row.detail
+                continue
+            po_number = row.get('po_number', '')
+            if po_number in po_numbers:
+                self.row_errors[index] = {'po_number': ['Duplicate po_number within this batch.']}
+                continue
+            po_numbers.add(po_number)
+            valid_rows.append((index, row))
+        chunk_size = self.context.get('chunk_size') or getattr(settings, 'PURCHASE_ORDER_BULK_CHUNK_SIZE', 500)
+        resolved = []
+        for start in range(0, len(valid_rows), chunk_size):
+            resolved.extend(self.resolve_chunk(valid_rows[start:start + chunk_size]))
+        return resolved
+
+    @staticmethod
+    def required_columns():
+        """
+        Fields the child leaves optional but the table cannot store empty
+        (``NOT NULL`` without a default), so rows missing them are rejected
+        here rather than by ``bulk_create``.
+        """
+        return [
+            field.name for field in PurchaseOrder._meta.concrete_fields
+            if not (field.primary_key or field.null or field.has_default() or field.empty_strings_allowed
+                    or getattr(field, 'auto_now_add', False))
+        ]
+
+    def resolve_chunk(self, chunk):
+        vendor_ids = {row['vendor'] for _, row in chunk if row.get('vendor') is not None}
+        vendors = Vendor.objects.only('pk').in_bulk(vendor_ids)
+        taken = set(
+            PurchaseOrder.objects.filter(po_number__in=[row['po_number'] for _, row in chunk if 'po_number' in row])
+            .values_list('po_number', flat=True)
+        )
+        does_not_exist = self.child.fields['vendor'].error_messages['does_not_exist']
+        required = [name for name in self.required_columns() if name in self.child.fields]
+        valid_rows = []
+        for index, row in chunk:
+            errors = {
+                name: [serializers.ErrorDetail(self.child.fields[name].error_messages['required'], code='required')]
+                for name in required if row.get(name) is None
+            }
+            vendor_id = row.get('vendor')
+            if vendor_id is not None:
+                if vendor_id in vendors:
+                    row['vendor'] = vendors[vendor_id]
+                else:
+                    errors['vendor'] = [
+                        serializers.ErrorDetail(does_not_exist.format(pk_value=vendor_id), code='does_not_exist'),
+                    ]
+            if row.get('po_number') in taken:
+                errors['po_number'] = [serializers.ErrorDetail(str(self.unique_po_number_message), code='unique')]
+            if errors:
+                self.row_errors[index] = errors
+            else:
+                valid_rows.append((index, row))
+        return valid_rows
+
+class PurchaseOrderSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     class Meta:
         model = PurchaseOrder
         fields = '__all__'
+        list_serializer_class = PurchaseOrderListSerializer
         extra_kwargs = {
             'quality_rating': {'required': False},
             'acknowledgment_date': {'required': False},
@@ -41,15 +160,109 @@ class PurchaseOrderSerializer(serializers.ModelSerializer):
             'vendor': {'required': False},
         }
 
+    def validate_status(self, value):
+        # New orders may start in any status; existing ones follow PurchaseOrder.TRANSITIONS.
+        if self.instance is not None and not PurchaseOrder.can_transition(self.instance.status, value):
+            raise serializers.ValidationError(
+                f'Cannot change status from {self.instance.status!r} to {value!r}.'
+            )
+        return value
+
     def update(self, instance, validated_data):
-        instance.po_number = validated_data.get('po_number', instance.po_number)
-        instance.vendor = validated_data.get('vendor', instance.vendor)
-        instance.delivery_date = validated_data.get('delivery_date', instance.delivery_date)
-        instance.items = validated_data.get('items', instance.items)
-        instance.quantity = validated_data.get('quantity', instance.quantity)
-        instance.status = validated_data.get('status', instance.status)
-        instance.quality_rating = validated_data.get('quality_rating', instance.quality_rating)
-        instance.acknowledgment_date = validated_data.get('acknowledgment_date', instance.acknowledgment_date)
-        instance.fulfilled_without_issues = validated_data.get('fulfilled_without_issues', instance.fulfilled_without_issues)
+        for attr, value in validated_data.items():
+            setattr(instance, attr, value)
         instance.save()
-        return instance
\ No newline at end of file
+        return instance
+
+class HistoricalPerformanceSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = HistoricalPerformance
+        exclude = ['id', 'vendor']
+
+class HistoryQuerySerializer(serializers.Serializer):
+    start = serializers.DateTimeField(required=False)
+    end = serializers.DateTimeField(required=False)
+    granularity = serializers.ChoiceField(choices=HistoricalPerformance.GRANULARITY_CHOICES, required=False)
+
+    def validate(self, attrs):
+        if 'start' in attrs and 'end' in attrs and attrs['start'] > attrs['end']:
+            raise serializers.ValidationError('start must not be after end.')
+        return attrs
+
+class ItemVolumeQuerySerializer(serializers.Serializer):
+    name = serializers.CharField(max_length=255, required=False)
+    status = serializers.ChoiceField(choices=PurchaseOrder.STATUS_CHOICES, required=False)
+    start = serializers.DateTimeField(required=False)
+    end = serializers.DateTimeField(required=False)
+    limit = serializers.IntegerField(min_value=1, max_value=1000, default=100)
+
+    def validate(self, attrs):
+        if 'start' in attrs and 'end' in attrs and attrs['start'] > attrs['end']:
+            raise serializers.ValidationError('start must not be after end.')
+        return attrs
+
+class ItemVolumeSerializer(serializers.Serializer):
+    name = serializers.CharField()
+    quantity = serializers.IntegerField()
+    order_count = serializers.IntegerField()
+
+class BulkTransitionSerializer(serializers.Serializer):
+    ids = serializers.ListField(child=serializers.IntegerField(), required=False, default=list)
+    po_numbers = serializers.ListField(child=serializers.CharField(max_length=50), required=False, default=list)
+
+    def validate(self, attrs):
+        count = len(attrs['ids']) + len(attrs['po_numbers'])
+        if not count:
+            raise serializers.ValidationError('Provide at least one of ids or po_numbers.')
+        limit = getattr(settings, 'PURCHASE_ORDER_BULK_MAX_ROWS', 10000)
+        if count > limit:
+            raise serializers.ValidationError(f'At most {limit} purchase orders can be referenced at once.')
+        return attrs
+
+class SearchQuerySerializer(serializers.Serializer):
+    q = serializers.CharField(max_length=200)
+    cursor = serializers.CharField(required=False)
+    page_size = serializers.IntegerField(min_value=1, max_value=1000, required=False)
+
+class PerformanceQuerySerializer(serializers.Serializer):
+    window = serializers.ChoiceField(choices=list(metrics.WINDOWS), required=False)
+
+class IdListField(serializers.ListField):
+    """A list of ids, also accepted as comma-separated strings (``?ids=1,2,3``)."""
+    child = serializers.IntegerField(min_value=1)
+
+    def to_internal_value(self, data):
+        if isinstance(data, str):
+            data = [data]
+        if isinstance(data, list):
+            data = [
+                part.strip() if isinstance(part, str) else part
+                for value in data
+                for part in (value.split(',') if isinstance(value, str) else [value])
+                if not isinstance(part, str) or part.strip()
+            ]
+        return super().to_internal_value(data)
+
+class PerformanceBatchSerializer(PerformanceQuerySerializer):
+    ids = IdListField(allow_empty=False)
+
+    def validate_ids(self, value):
+        limit = getattr(settings, 'VENDOR_PERFORMANCE_BATCH_MAX_IDS', 1000)
+        if len(value) > limit:
+            raise serializers.ValidationError(f'At most {limit} vendor ids can be requested at once.')
+        return list(dict.fromkeys(value))
+
+class VendorRankingSerializer(serializers.ModelSerializer):
+    vendor_code = serializers.CharField(source='vendor.vendor_code', read_only=True)
+    name = serializers.CharField(source='vendor.name', read_only=True)
+
+    class Meta:
+        model = VendorRanking
+        fields = ['rank', 'vendor', 'vendor_code', 'name', 'value', 'total_orders', 'generated_at']
+
+class ExportQuerySerializer(serializers.Serializer):
+    output = serializers.ChoiceField(choices=[export.CSV, export.NDJSON], default=export.CSV)
+
+class RankingQuerySerializer(serializers.Serializer):
+    metric = serializers.ChoiceField(choices=VendorRanking.METRIC_CHOICES)
+    min_orders = serializers.IntegerField(min_value=0, default=0)
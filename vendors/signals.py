@@ -1,31 +1,72 @@
-from django.db.models import F
-from django.db.models.signals import post_save
+from django.db.models.signals import pre_save, post_save, pre_delete, post_delete
 from django.dispatch import receiver
-from .models import PurchaseOrder
+from .models import Vendor, PurchaseOrder, VendorMetricAggregate
+from . import jobs
+from . import instrumentation
+from . import lines
+from . import metrics
+from . import cache as performance_cache
+
+@receiver(pre_save, sender=PurchaseOrder)
+def capture_previous_po_state(sender, instance, raw=False, update_fields=None, **kwargs):
+    if instance._state.adding or raw:
+        instance._metric_state = None
+    elif update_fields is None or metrics.affects_metrics(update_fields):
+        instance._metric_state = metrics.previous_po_state(instance)
+
+@receiver(post_save, sender=PurchaseOrder)
+def update_vendor_metrics(sender, instance, raw=False, update_fields=None, **kwargs):
+    if raw or (update_fields is not None and not metrics.affects_metrics(update_fields)):
+        return
+    with instrumentation.observe_signal('update_vendor_metrics'):
+        old_state = getattr(instance, '_metric_state', None)
+        jobs.dispatch_po_change(old_state, metrics.saved_po_state(instance, old_state, update_fields))
+
+@receiver(post_save, sender=PurchaseOrder)
+def sync_purchase_order_lines(sender, instance, created, raw=False, update_fields=None, **kwargs):
+    if raw or (update_fields is not None and not lines.affects_lines(update_fields)):
+        return
+    lines.sync_lines([instance], replace=not created)
+
+def is_vendor_cascade(origin):
+    # Deleting a vendor cascades to its orders; its aggregate goes with it.
+    return isinstance(origin, Vendor) or getattr(origin, 'model', None) is Vendor
+
+@receiver(pre_delete, sender=PurchaseOrder)
+def capture_deleted_po_state(sender, instance, origin=None, **kwargs):
+    # The instance may be stale or carry unsaved edits; what leaves the
+    # aggregates is the stored row, read (locked) in the delete's transaction.
+    if is_vendor_cascade(origin):
+        instance._metric_state = None
+    else:
+        instance._metric_state = metrics.previous_po_state(instance)
+
+@receiver(post_delete, sender=PurchaseOrder)
+def remove_po_from_vendor_metrics(sender, instance, origin=None, **kwargs):
+    old_state = getattr(instance, '_metric_state', None)
+    if is_vendor_cascade(origin) or old_state is None:
+        return
+    with instrumentation.observe_signal('remove_po_from_vendor_metrics'):
+        jobs.dispatch_po_change(old_state, None)
+
+@receiver(post_save, sender=Vendor)
+def create_vendor_metric_aggregate(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        VendorMetricAggregate.objects.create(vendor=instance)
 
 @receiver(post_save, sender=PurchaseOrder)
-def update_vendor_metrics(sender, instance, **kwargs):
-    vendor = instance.vendor
-    
-    # Recalculate on-time delivery rate
-    completed_pos = PurchaseOrder.objects.filter(vendor=vendor, status='completed')
-    on_time_delivery_count = completed_pos.filter(delivery_date__lte=F('delivery_date')).count()
-    vendor.on_time_delivery_rate = on_time_delivery_count / completed_pos.count() if completed_pos else 0
-
-    # Recalculate quality rating average
-    quality_ratings = completed_pos.exclude(quality_rating=None).values_list('quality_rating', flat=True)
-    vendor.quality_rating_avg = sum(quality_ratings) / len(quality_ratings) if quality_ratings else 0
-
-    # Recalculate average response time
-    response_times = []
-    for po in completed_pos:
-        if po.acknowledgment_date:
-            response_time = (po.acknowledgment_date - po.issue_date).total_seconds()
-            response_times.append(response_time)
-    vendor.average_response_time = sum(response_times) / len(response_times) if response_times else 0
-
-    # Recalculate fulfillment rate
-    fulfilled_pos = completed_pos.filter(fulfilled_without_issues=True).count()
-    vendor.fulfillment_rate = fulfilled_pos / vendor.purchaseorder_set.count() if vendor.purchaseorder_set.exists() else 0
-
-    vendor.save()
\ No newline at end of file
+@receiver(post_delete, sender=PurchaseOrder)
+def invalidate_po_vendor_performance(sender, instance, update_fields=None, **kwargs):
+    if update_fields is not None and not metrics.affects_metrics(update_fields):
+        return
+    old_state = getattr(instance, '_metric_state', None)
+    if kwargs.get('signal') is post_save:
+        new_state = metrics.saved_po_state(instance, old_state, update_fields)
+        if not metrics.change_scope(old_state, new_state):
+            return
+    performance_cache.invalidate_vendor_performance(instance.vendor_id, old_state and old_state['vendor_id'])
+
+@receiver(post_save, sender=Vendor)
+@receiver(post_delete, sender=Vendor)
+def invalidate_vendor_performance(sender, instance, **kwargs):
+    performance_cache.invalidate_vendor_performance(instance.pk)
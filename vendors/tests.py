@@ -1,8 +1,42 @@
+import csv
+import gzip
+import json
+import tempfile
+import time
+from datetime import timedelta
+from io import StringIO
+from unittest import mock, skipUnless
+from django.conf import settings
 from django.urls import reverse
+from django.core.management import call_command
+from django.core.exceptions import ImproperlyConfigured
+from django.core.management.base import CommandError
+from django.db import connection, transaction
+from django.db.models import F
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
 from rest_framework import status
+from rest_framework.renderers import JSONRenderer
 from rest_framework.test import APITestCase
+from rest_framework_simplejwt.tokens import RefreshToken
 from django.contrib.auth.models import User
-from .models import Vendor, PurchaseOrder
+from vendor_management import schema as api_schema
+from vendor_management.authentication import TokenCache, token_cache
+from .models import (
+    Vendor, PurchaseOrder, PurchaseOrderLine, VendorMetricAggregate, HistoricalPerformance, MetricRecomputeJob,
+)
+from .fast_serializers import ValuesSerializer
+from .serializers import VendorSerializer, PurchaseOrderSerializer
+from . import benchmarks
+from . import history
+from . import instrumentation
+from . import jobs
+from . import lines
+from . import metrics
+from . import rankings
+from . import search
+from . import cache as performance_cache
 
 class VendorTests(APITestCase):
     def setUp(self):
@@ -27,7 +61,7 @@ class VendorTests(APITestCase):
         url = reverse('vendor-list')
         response = self.client.get(url)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(response.data), 1)
+        self.assertEqual(len(response.data['results']), 1)
 
     def test_get_vendor_detail(self):
         url = reverse('vendor-detail', args=[self.vendor.id])
@@ -75,7 +109,7 @@ class PurchaseOrderTests(APITestCase):
         url = reverse('purchaseorder-list')
         response = self.client.get(url)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(response.data), 1)
+        self.assertEqual(len(response.data['results']), 1)
 
     def test_get_purchase_order_detail(self):
         url = reverse('purchaseorder-detail', args=[self.po.id])
@@ -126,4 +160,1539 @@ class VendorPerformanceTests(APITestCase):
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertEqual(response.data['on_time_delivery_rate'], 1.0)
         self.assertEqual(response.data['quality_rating_avg'], 4.5)
-        self.assertEqual(response.data['fulfillment_rate'], 0.5)
\ No newline at end of file
+        self.assertEqual(response.data['fulfillment_rate'], 0.5)
+
+class VendorMetricAggregateTests(TestCase):
+    def setUp(self):
+        self.vendor = Vendor.objects.create(name='Test Vendor', vendor_code='TEST001')
+        self.other_vendor = Vendor.objects.create(name='Other Vendor', vendor_code='TEST002')
+
+    def create_po(self, po_number, vendor=None, **kwargs):
+        data = {
+            'po_number': po_number, 'vendor': vendor or self.vendor, 'delivery_date': '2023-06-30',
+            'items': [{'name': 'Item 1', 'quantity': 10}], 'quantity': 10, 'status': 'pending',
+        }
+        data.update(kwargs)
+        return PurchaseOrder.objects.create(**data)
+
+    def assertAggregatesConsistent(self):
+        self.assertEqual(metrics.find_drift(), [])
+
+    def test_aggregate_created_with_vendor(self):
+        aggregate = VendorMetricAggregate.objects.get(vendor=self.vendor)
+        self.assertEqual(metrics.aggregate_counters(aggregate), metrics.empty_counters())
+
+    def test_metrics_follow_po_lifecycle(self):
+        po1 = self.create_po('PO001', status='completed', quality_rating=4.0, fulfilled_without_issues=True)
+        self.create_po('PO002')
+        self.vendor.refresh_from_db()
+        self.assertEqual(self.vendor.on_time_delivery_rate, 1.0)
+        self.assertEqual(self.vendor.quality_rating_avg, 4.0)
+        self.assertEqual(self.vendor.fulfillment_rate, 0.5)
+
+        po1.acknowledgment_date = po1.issue_date + timedelta(hours=2)
+        po1.quality_rating = 2.0
+        po1.save()
+        self.vendor.refresh_from_db()
+        self.assertEqual(self.vendor.quality_rating_avg, 2.0)
+        self.assertEqual(self.vendor.average_response_time, 7200)
+        self.assertAggregatesConsistent()
+
+        po1.delete()
+        self.vendor.refresh_from_db()
+        self.assertEqual(self.vendor.quality_rating_avg, 0)
+        self.assertEqual(self.vendor.fulfillment_rate, 0)
+        self.assertAggregatesConsistent()
+
+    def test_deleting_stale_instance(self):
+        po = self.create_po('PO001', fulfilled_without_issues=True)
+        stale = PurchaseOrder.objects.get(pk=po.pk)
+        po.status = 'completed'
+        po.save()
+        stale.quality_rating = 5.0
+        stale.delete()
+        self.vendor.refresh_from_db()
+        self.assertEqual(self.vendor.fulfillment_rate, 0)
+        self.assertAggregatesConsistent()
+
+    def test_moving_po_between_vendors(self):
+        po = self.create_po('PO001', status='completed', fulfilled_without_issues=True)
+        po.vendor = self.other_vendor
+        po.save()
+        self.vendor.refresh_from_db()
+        self.other_vendor.refresh_from_db()
+        self.assertEqual(self.vendor.fulfillment_rate, 0)
+        self.assertEqual(self.other_vendor.fulfillment_rate, 1.0)
+        self.assertAggregatesConsistent()
+
+    def test_missing_aggregate_is_rebuilt(self):
+        self.create_po('PO001', status='completed')
+        VendorMetricAggregate.objects.filter(vendor=self.vendor).delete()
+        self.create_po('PO002', status='completed')
+        self.assertEqual(VendorMetricAggregate.objects.get(vendor=self.vendor).completed_count, 2)
+        self.assertAggregatesConsistent()
+
+    def test_rebuild_command_check_reports_drift(self):
+        self.create_po('PO001', status='completed', quality_rating=3.0)
+        VendorMetricAggregate.objects.filter(vendor=self.vendor).update(completed_count=5)
+        with self.assertRaises(CommandError):
+            call_command('rebuild_vendor_metrics', '--check', stdout=StringIO())
+        call_command('rebuild_vendor_metrics', stdout=StringIO())
+        call_command('rebuild_vendor_metrics', '--check', stdout=StringIO())
+        self.vendor.refresh_from_db()
+        self.assertEqual(self.vendor.on_time_delivery_rate, 1.0)
+
+    def test_deleting_vendor_removes_aggregate(self):
+        self.create_po('PO001', status='completed')
+        self.vendor.delete()
+        self.assertFalse(VendorMetricAggregate.objects.filter(vendor_id=self.vendor.id).exists())
+
+class MetricEngineTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='testuser', password='testpass')
+        self.client.force_authenticate(user=self.user)
+
+        self.vendor = Vendor.objects.create(name='Test Vendor', vendor_code='TEST001')
+        self.empty_vendor = Vendor.objects.create(name='Empty Vendor', vendor_code='TEST002')
+        statuses = ['completed', 'completed', 'pending', 'completed', 'canceled', 'completed']
+        for i, po_status in enumerate(statuses):
+            po = PurchaseOrder.objects.create(
+                po_number=f'PO{i:03}', vendor=self.vendor, delivery_date='2023-06-30',
+                items=[{'name': 'Item', 'quantity': i + 1}], quantity=i + 1, status=po_status,
+                quality_rating=[4.5, None, 3.0, 2.25, None, 5.0][i],
+                fulfilled_without_issues=i % 2 == 0,
+            )
+            if i % 3 != 1:
+                po.acknowledgment_date = po.issue_date + timedelta(minutes=17 * (i + 1), seconds=i)
+                po.save()
+
+    def test_matches_legacy_computation(self):
+        metrics.assert_metrics_match_legacy(self.vendor)
+        metrics.assert_metrics_match_legacy(self.empty_vendor)
+
+    def test_single_query(self):
+        with self.assertNumQueries(1):
+            metrics.compute_vendor_metrics(self.vendor.id)
+
+    def test_missing_vendor(self):
+        self.assertIsNone(metrics.compute_vendor_metrics(0))
+        response = self.client.get(reverse('vendor-performance', args=[0]))
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_counters_match_aggregates(self):
+        self.assertEqual(metrics.find_drift(), [])
+
+    def test_empty_vendor_performance(self):
+        response = self.client.get(reverse('vendor-performance', args=[self.empty_vendor.id]))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['fulfillment_rate'], 0)
+
+class PerformanceCacheTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='testuser', password='testpass')
+        self.client.force_authenticate(user=self.user)
+        performance_cache.get_cache().clear()
+
+        self.vendor = Vendor.objects.create(name='Test Vendor', vendor_code='TEST001')
+        self.po = PurchaseOrder.objects.create(
+            po_number='PO001', vendor=self.vendor, delivery_date='2023-06-30',
+            items=[{'name': 'Item 1', 'quantity': 10}], quantity=10, status='completed',
+            quality_rating=4.0, fulfilled_without_issues=True
+        )
+        self.url = reverse('vendor-performance', args=[self.vendor.id])
+
+    def test_hit_and_miss_counters(self):
+        self.client.get(self.url)
+        with self.assertNumQueries(0):
+            response = self.client.get(self.url)
+        self.assertEqual(response.data['quality_rating_avg'], 4.0)
+        self.assertEqual(performance_cache.cache_stats(), {'hits': 1, 'misses': 1, 'hit_rate': 0.5})
+
+        response = self.client.get(reverse('performance-cache-stats'))
+        self.assertEqual(response.data['hits'], 1)
+
+    def test_conditional_request_returns_not_modified(self):
+        response = self.client.get(self.url)
+        self.assertIn('Last-Modified', response)
+        with self.assertNumQueries(0):
+            response = self.client.get(self.url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_po_change_invalidates_entry(self):
+        etag = self.client.get(self.url)['ETag']
+        self.po.quality_rating = 2.0
+        self.po.save()
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['quality_rating_avg'], 2.0)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_po_delete_invalidates_entry(self):
+        self.client.get(self.url)
+        self.po.delete()
+        response = self.client.get(self.url)
+        self.assertEqual(response.data['fulfillment_rate'], 0)
+
+    def test_vendor_delete_invalidates_entry(self):
+        self.client.get(self.url)
+        self.vendor.delete()
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+class VendorPerformanceBatchTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='testuser', password='testpass')
+        self.client.force_authenticate(user=self.user)
+        performance_cache.get_cache().clear()
+        self.vendors = [Vendor.objects.create(name=f'Vendor {i}', vendor_code=f'TEST{i:03}') for i in range(3)]
+        for i, vendor in enumerate(self.vendors[:2]):
+            PurchaseOrder.objects.create(
+                po_number=f'PO{i:03}', vendor=vendor, delivery_date=timezone.now() + timedelta(days=1),
+                items=[], quantity=1, status='completed', quality_rating=float(i + 3),
+                fulfilled_without_issues=True,
+            )
+        self.ids = [vendor.id for vendor in self.vendors]
+        self.url = reverse('vendor-performance-batch')
+
+    def test_get_matches_single_vendor_endpoint(self):
+        with self.assertNumQueries(1):
+            response = self.client.get(self.url, {'ids': ','.join(map(str, [*self.ids, 9999]))})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['not_found'], [9999])
+        self.assertEqual(list(response.data['results']), [str(pk) for pk in self.ids])
+        self.assertEqual(response.data['results'][str(self.ids[1])]['quality_rating_avg'], 4.0)
+        # Both endpoints share the cache.
+        with self.assertNumQueries(0):
+            single = self.client.get(reverse('vendor-performance', args=[self.ids[1]]))
+            again = self.client.get(f'{self.url}?ids={self.ids[0]}&ids={self.ids[1]}')
+        self.assertEqual(single.data, response.data['results'][str(self.ids[1])])
+        self.assertEqual(list(again.data['results']), [str(pk) for pk in self.ids[:2]])
+        self.assertEqual(performance_cache.cache_stats()['hits'], 3)
+
+    @override_settings(VENDOR_PERFORMANCE_BATCH_CHUNK_SIZE=2)
+    def test_post_with_window_is_chunked(self):
+        with self.assertNumQueries(2):
+            response = self.client.post(self.url, {'ids': self.ids, 'window': '30d'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data['results']), 3)
+        for vendor_id in self.ids:
+            self.assertEqual(
+                response.data['results'][str(vendor_id)],
+                metrics.compute_window_metrics(vendor_id, metrics.WINDOWS['30d']),
+            )
+
+    @override_settings(VENDOR_PERFORMANCE_BATCH_MAX_IDS=2)
+    def test_invalid_requests(self):
+        for params in ({}, {'ids': ''}, {'ids': '1,a'}, {'ids': '1,2,3'}, {'ids': '1', 'window': '7d'}):
+            response = self.client.get(self.url, params)
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST, params)
+        response = self.client.post(self.url, {'ids': 5}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+class PurchaseOrderBulkTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='testuser', password='testpass')
+        self.client.force_authenticate(user=self.user)
+        self.vendor = Vendor.objects.create(name='Test Vendor', vendor_code='TEST001')
+        self.url = reverse('purchaseorder-bulk')
+
+    def po_row(self, po_number, **kwargs):
+        row = {
+            'po_number': po_number, 'vendor': self.vendor.id, 'delivery_date': '2023-06-30T00:00:00Z',
+            'items': [{'name': 'Item 1', 'quantity': 10}], 'quantity': 10, 'status': 'completed',
+            'fulfilled_without_issues': True,
+        }
+        row.update(kwargs)
+        return row
+
+    def test_bulk_create_json(self):
+        rows = [self.po_row(f'PO{i:03}') for i in range(5)]
+        response = self.client.post(self.url, rows, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(len(response.data['created']), 5)
+        self.assertEqual(PurchaseOrder.objects.count(), 5)
+        self.vendor.refresh_from_db()
+        self.assertEqual(self.vendor.fulfillment_rate, 1.0)
+        self.assertEqual(metrics.find_drift(), [])
+
+    def test_bulk_create_ndjson(self):
+        body = '\n'.join(json.dumps(self.po_row(f'PO{i:03}')) for i in range(3)) + '\n'
+        response = self.client.post(self.url, body, content_type='application/x-ndjson')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(PurchaseOrder.objects.count(), 3)
+
+    def test_invalid_rows_are_reported(self):
+        PurchaseOrder.objects.create(
+            po_number='PO000', vendor=self.vendor, delivery_date='2023-06-30',
+            items=[], quantity=1, status='pending',
+        )
+        rows = [
+            self.po_row('PO000'),
+            self.po_row('PO001'),
+            self.po_row('PO002', quantity=0),
+            self.po_row('PO001'),
+            self.po_row('PO003', vendor=0),
+        ]
+        response = self.client.post(self.url, rows, format='json')
+        self.assertEqual(response.status_code, status.HTTP_207_MULTI_STATUS)
+        self.assertEqual([row['index'] for row in response.data['created']], [1])
+        self.assertEqual([row['index'] for row in response.data['errors']], [0, 2, 3, 4])
+        self.assertEqual(PurchaseOrder.objects.count(), 2)
+        self.assertEqual(metrics.find_drift(), [])
+
+    def test_metrics_recomputed_once_per_vendor(self):
+        rows = [self.po_row(f'PO{i:03}') for i in range(50)]
+        with CaptureQueriesContext(connection) as queries:
+            self.client.post(self.url, rows, format='json')
+        vendor_updates = [q for q in queries.captured_queries if q['sql'].startswith('UPDATE "vendors_vendor"')]
+        self.assertEqual(len(vendor_updates), 1)
+
+    def test_validation_queries_do_not_grow_with_rows(self):
+        counts = []
+        for start, size in ((0, 50), (100, 200)):
+            rows = [self.po_row(f'PO{i:03}') for i in range(start, start + size)]
+            rows.append(self.po_row('PO100' if start else 'PO999', vendor=0))
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.post(self.url, rows, format='json')
+            self.assertEqual(len(response.data['created']), size)
+            self.assertEqual(response.data['errors'][0]['errors'], {
+                'po_number': ['Duplicate po_number within this batch.'],
+            } if start else {'vendor': ['Invalid pk "0" - object does not exist.']})
+            # Inserts are batched by size; lookups must not be.
+            counts.append(sum(query['sql'].startswith('SELECT') for query in queries.captured_queries))
+        self.assertEqual(counts[0], counts[1])
+        response = self.client.post(self.url, [self.po_row('PO000'), self.po_row('PO999', vendor='x')], format='json')
+        self.assertEqual(
+            [row['errors'] for row in response.data['errors']],
+            [{'po_number': ['purchase order with this po number already exists.']},
+             {'vendor': ['Incorrect type. Expected pk value, received str.']}],
+        )
+
+    def test_rows_missing_required_columns_are_reported(self):
+        row = self.po_row('PO001')
+        del row['vendor'], row['quantity']
+        rows = [row, self.po_row('PO002', delivery_date=None, items=None)]
+        response = self.client.post(self.url, rows, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual([row['errors'] for row in response.data['errors']], [
+            {'vendor': ['This field is required.'], 'quantity': ['This field is required.']},
+            {'delivery_date': ['This field may not be null.'], 'items': ['This field may not be null.']},
+        ])
+        self.assertFalse(PurchaseOrder.objects.exists())
+
+    def test_rejects_non_list_payload(self):
+        response = self.client.post(self.url, self.po_row('PO001'), format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+class PurchaseOrderBulkTransitionTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='testuser', password='testpass')
+        self.client.force_authenticate(user=self.user)
+        self.vendors = [Vendor.objects.create(name=f'Vendor {i}', vendor_code=f'V{i:03}') for i in range(2)]
+        self.pos = [
+            PurchaseOrder.objects.create(
+                po_number=f'PO{i:03}', vendor=self.vendors[i % 2], delivery_date='2023-06-30', items=[],
+                quantity=1, status='pending', fulfilled_without_issues=True,
+            )
+            for i in range(6)
+        ]
+
+    def test_bulk_acknowledge(self):
+        PurchaseOrder.objects.filter(pk=self.pos[1].pk).update(status='acknowledged')
+        PurchaseOrder.objects.filter(pk=self.pos[2].pk).update(status='canceled')
+        ids = [po.id for po in self.pos[:4]] + [0]
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.post(
+                reverse('purchaseorder-bulk-acknowledge'), {'ids': ids, 'po_numbers': ['PO004', 'PO999']},
+                format='json',
+            )
+        self.assertEqual(response.status_code, status.HTTP_207_MULTI_STATUS)
+        self.assertEqual(
+            [result['result'] for result in response.data['results']],
+            ['updated', 'already_acknowledged', 'invalid_transition', 'updated', 'not_found', 'updated', 'not_found'],
+        )
+        self.assertEqual(response.data['results'][4], {'id': 0, 'result': 'not_found'})
+        self.assertEqual(response.data['results'][6], {'po_number': 'PO999', 'result': 'not_found'})
+        # PO000 and PO004 belong to one vendor and PO003 to the other; no metric is affected.
+        updates = [q['sql'] for q in context.captured_queries if q['sql'].startswith('UPDATE')]
+        self.assertEqual(len(updates), 2)
+        self.assertTrue(all(sql.startswith('UPDATE "vendors_purchaseorder"') for sql in updates))
+        acknowledged = PurchaseOrder.objects.filter(status='acknowledged', acknowledgment_date__isnull=False)
+        self.assertEqual(
+            sorted(acknowledged.values_list('po_number', flat=True)), ['PO000', 'PO003', 'PO004'],
+        )
+
+    def test_bulk_complete_recomputes_once_per_vendor(self):
+        self.client.post(
+            reverse('purchaseorder-bulk-acknowledge'), {'ids': [po.id for po in self.pos]}, format='json',
+        )
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.post(
+                reverse('purchaseorder-bulk-complete'), {'po_numbers': ['PO000', 'PO001', 'PO002']}, format='json',
+            )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual({result['status'] for result in response.data['results']}, {'completed'})
+        vendor_updates = [q for q in context.captured_queries if q['sql'].startswith('UPDATE "vendors_vendor"')]
+        self.assertEqual(len(vendor_updates), 2)
+        self.vendors[0].refresh_from_db()
+        self.assertEqual(self.vendors[0].fulfillment_rate, 2 / 3)
+        self.assertEqual(metrics.find_drift(), [])
+        self.assertEqual(metrics.find_bucket_drift(), [])
+
+        # Completing requires an acknowledged order.
+        response = self.client.post(
+            reverse('purchaseorder-bulk-complete'), {'ids': [self.pos[0].id]}, format='json',
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data['results'][0]['result'], 'already_completed')
+
+    def test_requires_references(self):
+        response = self.client.post(reverse('purchaseorder-bulk-complete'), {}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        with override_settings(PURCHASE_ORDER_BULK_MAX_ROWS=2):
+            response = self.client.post(reverse('purchaseorder-bulk-complete'), {'ids': [1, 2, 3]}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+class ListPaginationTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='testuser', password='testpass')
+        self.client.force_authenticate(user=self.user)
+        self.vendor = Vendor.objects.create(name='Test Vendor', vendor_code='TEST001')
+        self.other_vendor = Vendor.objects.create(name='Other Vendor', vendor_code='TEST002')
+        for i in range(7):
+            PurchaseOrder.objects.create(
+                po_number=f'PO{i:03}', vendor=self.vendor if i % 2 else self.other_vendor,
+                delivery_date=f'2023-06-{i + 1:02}', items=[{'name': 'Item', 'quantity': 1}],
+                quantity=1, status='completed' if i < 3 else 'pending',
+            )
+
+    def test_cursor_pagination_walks_all_rows(self):
+        url = reverse('purchaseorder-list') + '?page_size=3'
+        seen = []
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            seen.extend(row['id'] for row in response.data['results'])
+            url = response.data['next']
+        self.assertEqual(seen, sorted(PurchaseOrder.objects.values_list('id', flat=True)))
+
+    def test_field_projection(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('purchaseorder-list'), {'fields': 'po_number,status'})
+        self.assertEqual(set(response.data['results'][0]), {'po_number', 'status'})
+        self.assertNotIn('"items"', queries.captured_queries[-1]['sql'])
+
+        response = self.client.get(reverse('vendor-detail', args=[self.vendor.id]), {'fields': 'name'})
+        self.assertEqual(response.data, {'name': 'Test Vendor'})
+
+    def test_unknown_field(self):
+        response = self.client.get(reverse('purchaseorder-list'), {'fields': 'po_number,bogus'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_filters(self):
+        response = self.client.get(reverse('purchaseorder-list'), {'vendor': self.vendor.id, 'status': 'pending'})
+        self.assertEqual(len(response.data['results']), 2)
+
+        response = self.client.get(reverse('purchaseorder-list'), {
+            'delivery_date_after': '2023-06-02', 'delivery_date_before': '2023-06-04',
+        })
+        self.assertEqual([row['po_number'] for row in response.data['results']], ['PO001', 'PO002', 'PO003'])
+
+        response = self.client.get(reverse('vendor-list'), {'name': 'other'})
+        self.assertEqual([row['vendor_code'] for row in response.data['results']], ['TEST002'])
+
+@skipUnless(connection.vendor == 'sqlite', 'Query plans are checked on SQLite only.')
+class QueryPlanTests(TestCase):
+    """
+    Guards the index plan: the metric and listing query shapes must be
+    answered by index searches rather than scans of a whole table or index.
+    """
+    @classmethod
+    def setUpTestData(cls):
+        vendors = Vendor.objects.bulk_create(
+            Vendor(name=f'Vendor {i}', vendor_code=f'V{i:04}') for i in range(50)
+        )
+        statuses = ['completed', 'pending', 'acknowledged', 'canceled']
+        PurchaseOrder.objects.bulk_create(
+            PurchaseOrder(
+                po_number=f'PO{i:05}', vendor=vendors[i % len(vendors)],
+                delivery_date=timezone.now() + timedelta(days=i % 30), items=[], quantity=1,
+                status=statuses[i % len(statuses)], quality_rating=i % 5 if i % 3 else None,
+                acknowledgment_date=timezone.now() if i % 2 else None, fulfilled_without_issues=i % 4 == 0,
+            )
+            for i in range(2000)
+        )
+        HistoricalPerformance.objects.bulk_create(
+            HistoricalPerformance(
+                vendor=vendors[i % len(vendors)], on_time_delivery_rate=1, quality_rating_avg=1,
+                average_response_time=1, fulfillment_rate=1,
+            )
+            for i in range(500)
+        )
+        cls.vendor = vendors[0]
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+
+    def assertNoFullScan(self, queryset, allowed=()):
+        """
+        Fail if the plan scans a table other than those in ``allowed``, either
+        the table itself or a whole index of it (``SCAN t USING [COVERING]
+        INDEX``).
+        """
+        plan = queryset.explain()
+        scans = []
+        for line in plan.splitlines():
+            detail = line.split(maxsplit=3)[-1].split()
+            if detail[0] == 'SCAN' and detail[1] not in allowed:
+                scans.append(line)
+        self.assertEqual(scans, [], plan)
+
+    def test_index_scans_are_full_scans(self):
+        orders = PurchaseOrder.objects.values('vendor_id', 'status')
+        self.assertIn('USING COVERING INDEX', orders.explain())
+        with self.assertRaises(AssertionError):
+            self.assertNoFullScan(orders)
+        self.assertNoFullScan(orders, allowed=['vendors_purchaseorder'])
+
+    def test_metric_queries_use_indexes(self):
+        self.assertNoFullScan(metrics.counters_queryset(Vendor.objects.filter(pk=self.vendor.pk)))
+        completed = PurchaseOrder.objects.filter(vendor=self.vendor, status='completed')
+        self.assertNoFullScan(completed.filter(fulfilled_without_issues=True).values('id'))
+        self.assertNoFullScan(completed.exclude(quality_rating=None).values('quality_rating'))
+        self.assertNoFullScan(completed.exclude(acknowledgment_date=None).values('acknowledgment_date', 'issue_date'))
+
+    def test_ranking_queries_read_in_rank_order(self):
+        # Ranking every vendor reads a whole rank index, but in order.
+        for metric in rankings.RANKED_METRICS:
+            with self.subTest(metric=metric):
+                plan = rankings.ranked_vendors(metric).explain()
+                self.assertIn('_rank_idx', plan)
+                self.assertNotIn('TEMP B-TREE', plan)
+                self.assertNoFullScan(rankings.ranked_vendors(metric), allowed=['vendors_vendor'])
+
+    def test_listing_queries_use_indexes(self):
+        orders = PurchaseOrder.objects.order_by('id')
+        self.assertNoFullScan(orders.filter(vendor=self.vendor)[:100])
+        # Read in id order off the vendor foreign key's index, not sorted.
+        self.assertNotIn('TEMP B-TREE', orders.filter(vendor=self.vendor)[:100].explain())
+        self.assertNoFullScan(orders.filter(vendor=self.vendor, status='pending')[:100])
+        self.assertNoFullScan(orders.filter(status='pending')[:100])
+        self.assertNoFullScan(
+            HistoricalPerformance.objects.filter(vendor=self.vendor, date__gte=timezone.now() - timedelta(days=1))
+        )
+
+class HistoricalPerformanceTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='testuser', password='testpass')
+        self.client.force_authenticate(user=self.user)
+        self.vendor = Vendor.objects.create(name='Test Vendor', vendor_code='TEST001', fulfillment_rate=0.5)
+        self.other_vendor = Vendor.objects.create(name='Other Vendor', vendor_code='TEST002')
+        self.now = timezone.now().replace(hour=12, minute=0, second=0, microsecond=0)
+
+    def add_snapshot(self, date, granularity='hour', fulfillment_rate=0.0):
+        return HistoricalPerformance.objects.create(
+            vendor=self.vendor, date=date, granularity=granularity, on_time_delivery_rate=1.0,
+            quality_rating_avg=4.0, average_response_time=60.0, fulfillment_rate=fulfillment_rate,
+        )
+
+    def test_snapshot_uses_single_insert(self):
+        with self.assertNumQueries(2):
+            written = history.snapshot_vendor_performance(now=self.now)
+        self.assertEqual(written, 2)
+        snapshot = HistoricalPerformance.objects.get(vendor=self.vendor)
+        self.assertEqual((snapshot.fulfillment_rate, snapshot.granularity), (0.5, 'hour'))
+
+    def test_compaction_rolls_up_old_rows(self):
+        old_day = self.now - timedelta(days=5)
+        self.add_snapshot(old_day.replace(hour=1), fulfillment_rate=0.2)
+        self.add_snapshot(old_day.replace(hour=2), fulfillment_rate=0.4)
+        recent = self.add_snapshot(self.now - timedelta(hours=1))
+        for day in (1, 2):
+            self.add_snapshot((self.now - timedelta(days=200)).replace(day=day), granularity='day', fulfillment_rate=day)
+
+        removed = history.compact_history(now=self.now)
+        self.assertEqual(removed, {'hour': 2, 'day': 2})
+
+        daily = HistoricalPerformance.objects.get(granularity='day')
+        self.assertAlmostEqual(daily.fulfillment_rate, 0.3)
+        self.assertEqual(timezone.localtime(daily.date).date(), timezone.localtime(old_day).date())
+        monthly = HistoricalPerformance.objects.get(granularity='month')
+        self.assertEqual(monthly.fulfillment_rate, 1.5)
+        self.assertTrue(HistoricalPerformance.objects.filter(pk=recent.pk).exists())
+
+    def test_snapshot_command(self):
+        call_command('snapshot_vendor_performance', '--granularity', 'day', stdout=StringIO())
+        self.assertEqual(HistoricalPerformance.objects.filter(granularity='day').count(), 2)
+
+    def test_history_endpoint(self):
+        self.add_snapshot(self.now - timedelta(days=3), granularity='day')
+        self.add_snapshot(self.now - timedelta(hours=2))
+        self.add_snapshot(self.now - timedelta(hours=1))
+        url = reverse('vendor-history', args=[self.vendor.id])
+
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([row['granularity'] for row in response.data], ['day', 'hour', 'hour'])
+
+        response = self.client.get(url, {'start': (self.now - timedelta(hours=90)).isoformat(), 'granularity': 'hour'})
+        self.assertEqual(len(response.data), 2)
+
+        response = self.client.get(url, {'granularity': 'week'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        response = self.client.get(reverse('vendor-history', args=[0]))
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+class MetricRecomputeModeTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='testuser', password='testpass')
+        self.client.force_authenticate(user=self.user)
+        self.vendor = Vendor.objects.create(name='Test Vendor', vendor_code='TEST001')
+
+    def create_po(self, po_number, **kwargs):
+        return PurchaseOrder.objects.create(
+            po_number=po_number, vendor=self.vendor, delivery_date='2023-06-30',
+            items=[], quantity=1, status='completed', fulfilled_without_issues=True, **kwargs
+        )
+
+    @override_settings(VENDOR_METRICS_MODE='background')
+    def test_background_mode_coalesces_jobs(self):
+        po = self.create_po('PO001')
+        self.create_po('PO002', quality_rating=4.0)
+        po.quality_rating = 2.0
+        po.save()
+        self.assertEqual(MetricRecomputeJob.objects.count(), 1)
+        self.vendor.refresh_from_db()
+        self.assertEqual(self.vendor.fulfillment_rate, 0)
+
+        response = self.client.get(reverse('metric-queue-status'))
+        self.assertEqual((response.data['mode'], response.data['depth']), ('background', 1))
+
+        call_command('run_metric_worker', '--once', stdout=StringIO())
+        self.assertFalse(MetricRecomputeJob.objects.exists())
+        self.vendor.refresh_from_db()
+        self.assertEqual(self.vendor.fulfillment_rate, 1.0)
+        self.assertEqual(self.vendor.quality_rating_avg, 3.0)
+        self.assertEqual(metrics.find_drift(), [])
+
+    @override_settings(VENDOR_METRICS_MODE='on_commit')
+    def test_on_commit_mode_recomputes_after_commit(self):
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            self.create_po('PO001')
+            self.create_po('PO002')
+            self.vendor.refresh_from_db()
+            self.assertEqual(self.vendor.fulfillment_rate, 0)
+        # One recompute for the transaction, plus the cache invalidation it registers.
+        self.assertEqual(len(callbacks), 2)
+        self.vendor.refresh_from_db()
+        self.assertEqual(self.vendor.fulfillment_rate, 1.0)
+        self.assertEqual(metrics.find_drift(), [])
+
+    @override_settings(VENDOR_METRICS_MODE='background')
+    def test_background_mode_refreshes_cached_windows(self):
+        performance_cache.get_cache().clear()
+        url = reverse('vendor-performance', args=[self.vendor.id])
+        self.create_po('PO001')
+        # Read before the worker ran: cached from the old buckets.
+        self.assertEqual(self.client.get(url, {'window': '30d'}).data['fulfillment_rate'], 0)
+        with self.captureOnCommitCallbacks(execute=True):
+            call_command('run_metric_worker', '--once', stdout=StringIO())
+        self.assertEqual(self.client.get(url, {'window': '30d'}).data['fulfillment_rate'], 1.0)
+        self.assertEqual(self.client.get(url).data['fulfillment_rate'], 1.0)
+
+    @override_settings(VENDOR_METRICS_MODE='on_commit')
+    def test_on_commit_mode_forgets_rolled_back_changes(self):
+        other = Vendor.objects.create(name='Other Vendor', vendor_code='TEST002')
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            with self.assertRaises(RuntimeError), transaction.atomic():
+                self.create_po('PO001')
+                raise RuntimeError
+        self.assertEqual(callbacks, [])
+        with mock.patch.object(metrics, 'rebuild_aggregates', wraps=metrics.rebuild_aggregates) as rebuild:
+            with self.captureOnCommitCallbacks(execute=True):
+                PurchaseOrder.objects.create(
+                    po_number='PO002', vendor=other, delivery_date='2023-06-30', items=[], quantity=1,
+                    status='completed',
+                )
+        rebuild.assert_called_once_with({other.id})
+        self.assertEqual(metrics.find_drift(), [])
+
+    @override_settings(VENDOR_METRICS_MODE='eventually')
+    def test_invalid_mode(self):
+        with self.assertRaises(ImproperlyConfigured):
+            jobs.get_mode()
+
+class DirtyFieldTrackingTests(TestCase):
+    def setUp(self):
+        self.vendor = Vendor.objects.create(name='Test Vendor', vendor_code='TEST001')
+        PurchaseOrder.objects.create(
+            po_number='PO001', vendor=self.vendor, delivery_date='2023-06-30',
+            items=[{'name': 'Item 1', 'quantity': 10}], quantity=10, status='pending',
+        )
+        self.po = PurchaseOrder.objects.get(po_number='PO001')
+
+    def test_only_changed_columns_are_written(self):
+        self.po.quantity = 20
+        self.assertEqual(self.po.get_dirty_fields(), ['quantity'])
+        with CaptureQueriesContext(connection) as queries:
+            self.po.save()
+        self.assertEqual(len(queries), 1)
+        self.assertIn('SET "quantity" = 20 WHERE', queries[0]['sql'])
+        self.assertEqual(self.po.get_dirty_fields(), [])
+
+    def test_unchanged_save_writes_nothing(self):
+        with self.assertNumQueries(0):
+            self.po.save()
+
+    def test_in_place_json_change_is_detected(self):
+        self.po.items.append({'name': 'Item 2', 'quantity': 1})
+        self.assertEqual(self.po.get_dirty_fields(), ['items'])
+
+    def test_metric_fields_trigger_recompute_from_stored_row(self):
+        self.po.status = 'completed'
+        with self.assertNumQueries(9):
+            # Locked read of the stored row, UPDATE, then aggregate
+            # read/write, vendor update and daily bucket read/write in a
+            # savepoint.
+            self.po.save()
+        self.vendor.refresh_from_db()
+        self.assertEqual(self.vendor.on_time_delivery_rate, 1.0)
+        self.assertEqual(metrics.find_drift(), [])
+
+    def test_stale_instances_do_not_drift(self):
+        # Each instance writes only its own change; the delta of the second
+        # write is taken against the row the first one left.
+        for mode in ('sync', 'on_commit'):
+            with self.subTest(mode=mode), override_settings(VENDOR_METRICS_MODE=mode):
+                with self.captureOnCommitCallbacks(execute=True):
+                    po = PurchaseOrder.objects.create(
+                        po_number=f'PO-{mode}', vendor=self.vendor, delivery_date='2023-06-30', items=[],
+                        quantity=1, status='pending',
+                    )
+                other = PurchaseOrder.objects.get(pk=po.pk)
+                stale = PurchaseOrder.objects.get(pk=po.pk)
+                with self.captureOnCommitCallbacks(execute=True):
+                    po.status = 'completed'
+                    po.save()
+                    other.quality_rating = 4.0
+                    other.save()
+                other.refresh_from_db()
+                self.assertEqual((other.status, other.quality_rating), ('completed', 4.0))
+                self.assertEqual(metrics.find_drift(), [])
+                self.assertEqual(metrics.find_bucket_drift(), [])
+                self.vendor.refresh_from_db()
+                self.assertEqual(self.vendor.quality_rating_avg, 4.0)
+
+                with self.captureOnCommitCallbacks(execute=True):
+                    stale.quality_rating = 1.0
+                    stale.delete()
+                self.assertEqual(metrics.find_drift(), [])
+                self.assertEqual(metrics.find_bucket_drift(), [])
+                self.vendor.refresh_from_db()
+                self.assertEqual(self.vendor.quality_rating_avg, 0)
+
+    def test_refresh_resets_snapshot(self):
+        PurchaseOrder.objects.filter(pk=self.po.pk).update(status='completed')
+        self.po.refresh_from_db()
+        self.assertEqual(self.po.get_dirty_fields(), [])
+
+class QueryBudgetTests(APITestCase):
+    """
+    Locks in the number of queries each endpoint makes. If one of these fails
+    after a change, either the change added a query it should not have, or the
+    budget needs to be deliberately updated.
+    """
+    def setUp(self):
+        self.user = User.objects.create_user(username='testuser', password='testpass')
+        self.client.force_authenticate(user=self.user)
+        performance_cache.get_cache().clear()
+        self.vendor = Vendor.objects.create(name='Test Vendor', vendor_code='TEST001')
+        self.po = PurchaseOrder.objects.create(
+            po_number='PO001', vendor=self.vendor, delivery_date='2023-06-30',
+            items=[{'name': 'Item 1', 'quantity': 10}], quantity=10, status='pending',
+        )
+
+    def test_vendor_endpoints(self):
+        with self.assertNumQueries(1):
+            self.client.get(reverse('vendor-list'))
+        with self.assertNumQueries(1):
+            self.client.get(reverse('vendor-detail', args=[self.vendor.id]))
+        with self.assertNumQueries(3):
+            self.client.post(reverse('vendor-list'), {'name': 'New Vendor', 'vendor_code': 'TEST002'}, format='json')
+        with self.assertNumQueries(2):
+            self.client.patch(reverse('vendor-detail', args=[self.vendor.id]), {'name': 'Renamed'}, format='json')
+        with self.assertNumQueries(1):
+            self.client.patch(reverse('vendor-detail', args=[self.vendor.id]), {'name': 'Renamed'}, format='json')
+
+    def test_purchase_order_read_endpoints(self):
+        with self.assertNumQueries(1):
+            self.client.get(reverse('purchaseorder-list'))
+        with self.assertNumQueries(1):
+            self.client.get(reverse('purchaseorder-detail', args=[self.po.id]))
+
+    def test_purchase_order_write_endpoints(self):
+        url = reverse('purchaseorder-detail', args=[self.po.id])
+        data = {
+            'po_number': 'PO002', 'vendor': self.vendor.id, 'delivery_date': '2023-06-30T00:00:00Z',
+            'items': [], 'quantity': 1, 'status': 'pending',
+        }
+        with self.assertNumQueries(10):
+            self.client.post(reverse('purchaseorder-list'), data, format='json')
+        # Fields that cannot affect metrics skip the recompute entirely; new
+        # items only replace the order's lines.
+        with self.assertNumQueries(4):
+            self.client.patch(url, {'items': [{'name': 'Item 2', 'quantity': 5}]}, format='json')
+        # Acknowledging affects no metric, so only the order itself is read
+        # (locked) and written.
+        with self.assertNumQueries(5):
+            self.client.post(reverse('acknowledge-purchase-order', args=[self.po.id]))
+        with self.assertNumQueries(10):
+            self.client.patch(url, {'status': 'completed'}, format='json')
+        # Includes the locked read of the stored row and the cascade to the
+        # order's lines.
+        with self.assertNumQueries(11):
+            self.client.delete(url)
+
+    def test_performance_endpoints(self):
+        url = reverse('vendor-performance', args=[self.vendor.id])
+        with self.assertNumQueries(1):
+            self.client.get(url)
+        with self.assertNumQueries(0):
+            self.client.get(url)
+        with self.assertNumQueries(2):
+            self.client.get(reverse('vendor-history', args=[self.vendor.id]))
+
+class PurchaseOrderStatusTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='testuser', password='testpass')
+        self.client.force_authenticate(user=self.user)
+        performance_cache.get_cache().clear()
+        self.vendor = Vendor.objects.create(name='Test Vendor', vendor_code='TEST001')
+        self.po = PurchaseOrder.objects.create(
+            po_number='PO001', vendor=self.vendor, delivery_date=timezone.now() + timedelta(days=1),
+            items=[], quantity=1, status='pending', quality_rating=4.0, fulfilled_without_issues=True,
+        )
+        self.url = reverse('purchaseorder-detail', args=[self.po.id])
+        self.acknowledge_url = reverse('acknowledge-purchase-order', args=[self.po.id])
+
+    def test_invalid_transition_is_rejected_before_any_write(self):
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.patch(self.url, {'status': 'completed'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('status', response.data)
+        self.assertFalse([q for q in context.captured_queries if not q['sql'].startswith('SELECT')])
+        self.po.refresh_from_db()
+        self.assertEqual(self.po.status, 'pending')
+
+        response = self.client.patch(self.url, {'status': 'shipped'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_acknowledge_only_pending_orders(self):
+        response = self.client.post(self.acknowledge_url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.po.refresh_from_db()
+        self.assertEqual(self.po.status, 'acknowledged')
+        self.assertIsNotNone(self.po.acknowledgment_date)
+
+        response = self.client.post(self.acknowledge_url)
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('status', response.data)
+
+    def test_acknowledge_leaves_metrics_and_cache_alone(self):
+        performance_url = reverse('vendor-performance', args=[self.vendor.id])
+        etag = self.client.get(performance_url)['ETag']
+        with CaptureQueriesContext(connection) as context:
+            self.client.post(self.acknowledge_url)
+        self.assertFalse([q for q in context.captured_queries if 'vendormetricaggregate' in q['sql']])
+        with self.assertNumQueries(0):
+            response = self.client.get(performance_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_completion_updates_metrics(self):
+        self.client.post(self.acknowledge_url)
+        response = self.client.patch(self.url, {'status': 'completed'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.vendor.refresh_from_db()
+        self.assertEqual(self.vendor.on_time_delivery_rate, 1.0)
+        self.assertEqual(self.vendor.quality_rating_avg, 4.0)
+        self.assertEqual(self.vendor.fulfillment_rate, 1.0)
+        self.assertEqual(metrics.find_drift(), [])
+
+    def test_transition_scopes_cover_their_deltas(self):
+        state = metrics.po_state(self.po)
+        state['acknowledgment_date'] = state['issue_date'] + timedelta(hours=1)
+        for old_status, new_status in PurchaseOrder.TRANSITIONS:
+            old_state = {**state, 'status': old_status}
+            new_state = {**state, 'status': new_status}
+            scope = metrics.change_scope(old_state, new_state)
+            changed = {name for name, value in metrics.contribution_deltas(old_state, new_state).get(
+                self.vendor.id, {}).items() if value}
+            covered = {counter for metric in scope for counter in metrics.METRIC_COUNTERS[metric]}
+            self.assertLessEqual(changed, covered, (old_status, new_status))
+
+    def test_field_change_touches_only_its_metric(self):
+        self.po.status = 'completed'
+        self.po.save()
+        self.assertEqual(
+            metrics.change_scope(metrics.po_state(self.po), {**metrics.po_state(self.po), 'quality_rating': 2.0}),
+            ('quality_rating_avg',),
+        )
+        with CaptureQueriesContext(connection) as context:
+            self.client.patch(self.url, {'quality_rating': 2.0}, format='json')
+        updates = [q['sql'] for q in context.captured_queries if q['sql'].startswith('UPDATE "vendors_vendor"')]
+        self.assertEqual(len(updates), 1)
+        self.assertIn('quality_rating_avg', updates[0])
+        self.assertNotIn('fulfillment_rate', updates[0])
+        self.assertEqual(metrics.find_drift(), [])
+
+class MetricWindowTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='testuser', password='testpass')
+        self.client.force_authenticate(user=self.user)
+        performance_cache.get_cache().clear()
+        self.vendor = Vendor.objects.create(name='Test Vendor', vendor_code='TEST001')
+        now = timezone.now()
+        # (days ago, status, quality_rating, fulfilled_without_issues)
+        orders = [(10, 'completed', 5.0, True), (60, 'completed', 3.0, False), (200, 'completed', 1.0, False),
+                  (0, 'pending', None, False)]
+        self.pos = []
+        for i, (days_ago, po_status, rating, fulfilled) in enumerate(orders):
+            po = PurchaseOrder.objects.create(
+                po_number=f'PO{i:03}', vendor=self.vendor, delivery_date=now + timedelta(days=1), items=[],
+                quantity=1, status=po_status, quality_rating=rating, fulfilled_without_issues=fulfilled,
+            )
+            # Backdate without signals, as for orders imported before buckets existed.
+            PurchaseOrder.objects.filter(pk=po.pk).update(issue_date=now - timedelta(days=days_ago))
+            self.pos.append(po)
+        self.url = reverse('vendor-performance', args=[self.vendor.id])
+
+    def backfill(self):
+        out = StringIO()
+        call_command('backfill_metric_buckets', stdout=out)
+        return out.getvalue()
+
+    def test_backfill_and_check(self):
+        with self.assertRaises(CommandError):
+            call_command('backfill_metric_buckets', '--check', stdout=StringIO())
+        self.assertIn('Wrote 4 metric bucket(s)', self.backfill())
+        call_command('backfill_metric_buckets', '--check', stdout=StringIO())
+
+    def test_window_metrics(self):
+        self.backfill()
+        expected = {'30d': (5.0, 1 / 2), '90d': (4.0, 1 / 3), '365d': (3.0, 1 / 4)}
+        for window, (quality, fulfillment) in expected.items():
+            with self.assertNumQueries(1):
+                response = self.client.get(self.url, {'window': window})
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertEqual(response.data['quality_rating_avg'], quality)
+            self.assertAlmostEqual(response.data['fulfillment_rate'], fulfillment)
+            self.assertEqual(response.data['on_time_delivery_rate'], 1.0)
+        self.assertEqual(self.client.get(self.url, {'window': '7d'}).status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(
+            self.client.get(reverse('vendor-performance', args=[0]), {'window': '30d'}).status_code,
+            status.HTTP_404_NOT_FOUND,
+        )
+
+    def test_po_changes_update_buckets_and_cached_windows(self):
+        self.backfill()
+        etag = self.client.get(self.url, {'window': '30d'})['ETag']
+        po = PurchaseOrder.objects.get(pk=self.pos[0].pk)
+        po.quality_rating = 1.0
+        po.save()
+        response = self.client.get(self.url, {'window': '30d'}, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['quality_rating_avg'], 1.0)
+
+        # Moving an order to another day moves its contribution.
+        po.issue_date = timezone.now() - timedelta(days=100)
+        po.save()
+        self.assertEqual(self.client.get(self.url, {'window': '30d'}).data['quality_rating_avg'], 0)
+        PurchaseOrder.objects.get(pk=self.pos[3].pk).delete()
+        self.assertEqual(metrics.find_bucket_drift(), [])
+        self.assertEqual(metrics.find_drift(), [])
+
+    def test_window_entries_expire_with_the_day(self):
+        self.client.get(self.url, {'window': '30d'})
+        entry = performance_cache.get_cache().get(performance_cache.performance_key(self.vendor.id, '30d'))
+        entry['day'] = '2000-01-01'
+        performance_cache.get_cache().set(performance_cache.performance_key(self.vendor.id, '30d'), entry)
+        with self.assertNumQueries(1):
+            self.client.get(self.url, {'window': '30d'})
+
+class PurchaseOrderLineTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='testuser', password='testpass')
+        self.client.force_authenticate(user=self.user)
+        self.vendor = Vendor.objects.create(name='Test Vendor', vendor_code='TEST001')
+        self.other = Vendor.objects.create(name='Other Vendor', vendor_code='TEST002')
+
+    def create_po(self, po_number, items, **kwargs):
+        kwargs.setdefault('vendor', self.vendor)
+        kwargs.setdefault('status', 'completed')
+        return PurchaseOrder.objects.create(
+            po_number=po_number, delivery_date='2023-06-30T00:00:00Z', items=items, quantity=1, **kwargs,
+        )
+
+    def stored_lines(self, po):
+        return list(po.lines.order_by('position').values_list('vendor_id', 'name', 'quantity'))
+
+    def test_lines_follow_items(self):
+        po = self.create_po('PO001', [
+            {'name': 'Bolt', 'quantity': 10}, {'name': 'Nut'}, {'quantity': 3}, 'junk', {'name': 'Bolt', 'quantity': 2},
+        ])
+        self.assertEqual(self.stored_lines(po), [
+            (self.vendor.id, 'Bolt', 10), (self.vendor.id, 'Nut', 0), (self.vendor.id, 'Bolt', 2),
+        ])
+        po.items = [{'name': 'Washer', 'quantity': 4}]
+        po.vendor = self.other
+        po.save()
+        self.assertEqual(self.stored_lines(po), [(self.other.id, 'Washer', 4)])
+        # Saves that leave items and vendor alone do not touch the lines.
+        po.quality_rating = 4.0
+        with CaptureQueriesContext(connection) as queries:
+            po.save()
+        self.assertFalse(any('purchaseorderline' in query['sql'] for query in queries.captured_queries))
+        po.delete()
+        self.assertFalse(PurchaseOrderLine.objects.exists())
+
+    def test_bulk_create_writes_lines(self):
+        rows = [
+            {
+                'po_number': f'PO{i:03}', 'vendor': self.vendor.id, 'delivery_date': '2023-06-30T00:00:00Z',
+                'items': [{'name': 'Bolt', 'quantity': i + 1}], 'quantity': i + 1, 'status': 'pending',
+            }
+            for i in range(3)
+        ]
+        response = self.client.post(reverse('purchaseorder-bulk'), rows, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(PurchaseOrderLine.objects.filter(vendor=self.vendor, name='Bolt').count(), 3)
+        self.assertEqual(lines.find_line_drift(), [])
+
+    def test_backfill_command(self):
+        po = self.create_po('PO001', [{'name': 'Bolt', 'quantity': 10}])
+        self.create_po('PO002', [{'name': 'Nut', 'quantity': 5}], vendor=self.other)
+        PurchaseOrderLine.objects.all().delete()
+        PurchaseOrder.objects.filter(pk=po.pk).update(items=[{'name': 'Washer', 'quantity': 1}])
+        with self.assertRaises(CommandError):
+            call_command('backfill_purchase_order_lines', '--check', stdout=StringIO())
+        call_command('backfill_purchase_order_lines', '--vendor', str(self.vendor.id), stdout=StringIO())
+        self.assertEqual(self.stored_lines(po), [(self.vendor.id, 'Washer', 1)])
+        self.assertEqual(len(lines.find_line_drift()), 1)
+        call_command('backfill_purchase_order_lines', '--chunk-size', '1', stdout=StringIO())
+        call_command('backfill_purchase_order_lines', '--check', stdout=StringIO())
+
+    def test_item_volumes_endpoint(self):
+        self.create_po('PO001', [{'name': 'Bolt', 'quantity': 10}, {'name': 'Nut', 'quantity': 5}])
+        self.create_po('PO002', [{'name': 'Bolt', 'quantity': 7}, {'name': 'Bolt', 'quantity': 1}])
+        self.create_po('PO003', [{'name': 'Nut', 'quantity': 50}], status='pending')
+        self.create_po('PO004', [{'name': 'Bolt', 'quantity': 100}], vendor=self.other)
+        url = reverse('vendor-items', args=[self.vendor.id])
+
+        with self.assertNumQueries(2):
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data, [
+            {'name': 'Nut', 'quantity': 55, 'order_count': 2},
+            {'name': 'Bolt', 'quantity': 18, 'order_count': 2},
+        ])
+        response = self.client.get(url, {'status': 'completed', 'name': 'Nut'})
+        self.assertEqual(response.data, [{'name': 'Nut', 'quantity': 5, 'order_count': 1}])
+        response = self.client.get(url, {'start': '2024-01-01T00:00:00Z'})
+        self.assertEqual(response.data, [])
+        self.assertEqual(len(self.client.get(url, {'limit': 1}).data), 1)
+
+        self.assertEqual(self.client.get(url, {'status': 'shipped'}).status_code, status.HTTP_400_BAD_REQUEST)
+        response = self.client.get(url, {'start': '2024-01-01T00:00:00Z', 'end': '2023-01-01T00:00:00Z'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        response = self.client.get(reverse('vendor-items', args=[9999]))
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+class VendorSearchTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='testuser', password='testpass')
+        self.client.force_authenticate(user=self.user)
+        self.url = reverse('vendor-search')
+        self.acme = Vendor.objects.create(name='Acme Widgets', vendor_code='ACM001', contact_details='sales@acme.test')
+        self.world = Vendor.objects.create(name='Widget World', vendor_code='WW002', address='12 Acme Road')
+        self.zeta = Vendor.objects.create(name='Zeta Supplies', vendor_code='ZET003')
+
+    def names(self, response):
+        return [row['name'] for row in response.data['results']]
+
+    def test_prefix_match_ranked_by_field(self):
+        response = self.client.get(self.url, {'q': 'acm'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(self.names(response), ['Acme Widgets', 'Widget World'])
+        self.assertEqual(self.names(self.client.get(self.url, {'q': 'widget wor'})), ['Widget World'])
+        self.assertEqual(self.names(self.client.get(self.url, {'q': 'zet003'})), ['Zeta Supplies'])
+        self.assertEqual(self.names(self.client.get(self.url, {'q': 'nothing'})), [])
+        response = self.client.get(self.url, {'q': 'acme', 'fields': 'id,vendor_code'})
+        self.assertEqual(response.data['results'][0], {'id': self.acme.id, 'vendor_code': 'ACM001'})
+
+    def test_index_follows_writes(self):
+        self.zeta.name = 'Acme Zeta'
+        self.zeta.save()
+        self.world.delete()
+        Vendor.objects.bulk_create([Vendor(name='Bulk Acme', vendor_code='BLK004')])
+        self.assertEqual(
+            sorted(self.names(self.client.get(self.url, {'q': 'acme'}))), ['Acme Widgets', 'Acme Zeta', 'Bulk Acme'],
+        )
+
+    def test_pagination(self):
+        Vendor.objects.create(name='Acme Extra', vendor_code='EXT004')
+        response = self.client.get(self.url, {'q': 'acme', 'page_size': 1})
+        seen = self.names(response)
+        self.assertIsNone(response.data['previous'])
+        while response.data['next']:
+            response = self.client.get(response.data['next'])
+            seen.extend(self.names(response))
+        self.assertEqual(len(seen), 3)
+        self.assertEqual(len(set(seen)), 3)
+        self.assertEqual(self.names(self.client.get(response.data['previous'])), seen[1:2])
+
+    def test_invalid_requests(self):
+        self.assertEqual(self.client.get(self.url).status_code, status.HTTP_400_BAD_REQUEST)
+        response = self.client.get(self.url, {'q': 'acme', 'cursor': 'bogus'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('cursor', response.data)
+
+    def test_fallback_matches_fts(self):
+        with mock.patch.object(search, 'uses_fts', return_value=False):
+            self.assertEqual(self.names(self.client.get(self.url, {'q': 'acm'})), ['Acme Widgets', 'Widget World'])
+            response = self.client.get(self.url, {'q': 'a', 'page_size': 2})
+            self.assertEqual(len(response.data['results']), 2)
+            self.assertEqual(len(self.client.get(response.data['next']).data['results']), 1)
+
+class VendorRankingTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='testuser', password='testpass')
+        self.client.force_authenticate(user=self.user)
+        self.vendors = [Vendor.objects.create(name=f'Vendor {i}', vendor_code=f'V{i:03}') for i in range(4)]
+        # Vendor i gets i + 1 completed orders rated 5 - i, acknowledged after i + 1 hours.
+        for i, vendor in enumerate(self.vendors[:3]):
+            for j in range(i + 1):
+                po = PurchaseOrder.objects.create(
+                    po_number=f'PO{i}{j}', vendor=vendor, delivery_date='2023-06-30', items=[],
+                    quantity=1, status='completed', quality_rating=5 - i,
+                )
+                po.acknowledgment_date = po.issue_date + timedelta(hours=i + 1)
+                po.save()
+        rankings.rebuild_rankings()
+        self.url = reverse('vendor-rankings')
+
+    def ranked_codes(self, **params):
+        response = self.client.get(self.url, params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [row['vendor_code'] for row in response.data['results']]
+
+    def test_rankings_order(self):
+        self.assertEqual(self.ranked_codes(metric='quality_rating_avg'), ['V000', 'V001', 'V002'])
+        # Lower response time ranks first; vendors without data are not ranked.
+        self.assertEqual(self.ranked_codes(metric='average_response_time'), ['V000', 'V001', 'V002'])
+
+    def test_min_orders_filter(self):
+        self.assertEqual(self.ranked_codes(metric='quality_rating_avg', min_orders=2), ['V001', 'V002'])
+
+    def test_pagination(self):
+        response = self.client.get(self.url, {'metric': 'quality_rating_avg', 'page_size': 2})
+        self.assertEqual([row['rank'] for row in response.data['results']], [1, 2])
+        response = self.client.get(response.data['next'])
+        self.assertEqual([row['rank'] for row in response.data['results']], [3])
+
+    def test_invalid_metric(self):
+        response = self.client.get(self.url, {'metric': 'name'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_rebuild_replaces_snapshot(self):
+        PurchaseOrder.objects.filter(vendor=self.vendors[2]).update(quality_rating=5)
+        call_command('rebuild_vendor_metrics', stdout=StringIO())
+        call_command('rebuild_vendor_rankings', '--metric', 'quality_rating_avg', stdout=StringIO())
+        self.assertEqual(self.ranked_codes(metric='quality_rating_avg'), ['V000', 'V002', 'V001'])
+
+class BenchmarkTests(TestCase):
+    def generate(self, seed=1):
+        call_command('generate_synthetic_data', '--vendors', '5', '--orders', '50', '--seed', str(seed),
+                     '--clear', stdout=StringIO())
+        return list(PurchaseOrder.objects.order_by('po_number').values_list(
+            'po_number', 'vendor__vendor_code', 'status', 'quality_rating',
+        ))
+
+    def test_generator_is_deterministic(self):
+        first = self.generate()
+        self.assertEqual(len(first), 50)
+        self.assertEqual(self.generate(), first)
+        self.assertEqual(metrics.find_drift(), [])
+        self.assertEqual(metrics.find_bucket_drift(), [])
+        orders = PurchaseOrder.objects.all()
+        self.assertGreater(orders.dates('issue_date', 'day').count(), 10)
+        self.assertFalse(orders.filter(issue_date__gt=timezone.now()).exists())
+        self.assertFalse(orders.exclude(order_date=F('issue_date')).exists())
+        self.assertFalse(orders.filter(delivery_date__lte=F('issue_date')).exists())
+        self.assertFalse(orders.filter(acknowledgment_date__lt=F('issue_date')).exists())
+        with self.assertRaises(CommandError):
+            call_command('generate_synthetic_data', '--seed', '1', stdout=StringIO())
+
+    def test_run_and_compare(self):
+        self.generate()
+        results = benchmarks.run_benchmarks(benchmarks.default_scenarios(), iterations=3, warmup=1)
+        self.assertIn('vendor_performance_uncached', results)
+        for result in results.values():
+            self.assertEqual(result['iterations'], 3)
+            self.assertTrue(all(code < 400 for code in result['status_codes']), result)
+            self.assertLessEqual(result['p50_ms'], result['p99_ms'])
+        self.assertEqual(benchmarks.compare_results(results, results), [])
+        slower = {name: dict(result, p95_ms=result['p95_ms'] * 2 + 1) for name, result in results.items()}
+        self.assertEqual(len(benchmarks.compare_results(slower, results)), len(results))
+        self.assertEqual(benchmarks.percentile([5, 1, 4, 2, 3], 50), 3)
+        slow_search = dict(results['vendor_search'], p95_ms=results['vendor_search']['target_p95_ms'] + 1)
+        self.assertEqual(len(benchmarks.missed_targets({'vendor_search': slow_search})), 1)
+
+class DatabaseConfigurationTests(TestCase):
+    def test_new_connections_are_tuned(self):
+        with connection.cursor() as cursor:
+            for pragma, expected in (('synchronous', 1), ('cache_size', -65536), ('busy_timeout', 5000)):
+                cursor.execute(f'PRAGMA {pragma}')
+                self.assertEqual(cursor.fetchone()[0], expected, pragma)
+        self.assertEqual(connection.transaction_mode, 'IMMEDIATE')
+        self.assertEqual(connection.settings_dict['CONN_MAX_AGE'], 600)
+        self.assertTrue(connection.settings_dict['CONN_HEALTH_CHECKS'])
+
+    def test_invalid_transaction_mode(self):
+        wrapper = connection.copy()
+        wrapper.settings_dict = {**wrapper.settings_dict, 'OPTIONS': {'transaction_mode': 'LAZY'}}
+        with self.assertRaises(ImproperlyConfigured):
+            wrapper.get_connection_params()
+
+    def test_concurrency_benchmark(self):
+        results = benchmarks.benchmark_database_concurrency(readers=2, writers=2, duration=0.2)
+        self.assertEqual(set(results), {'defaults', 'configured'})
+        self.assertEqual(results['defaults']['journal_mode'], 'delete')
+        configured = results['configured']
+        self.assertEqual(configured['journal_mode'], 'wal')
+        self.assertEqual(configured['lock_errors'], 0)
+        self.assertGreater(configured['writes_per_second'], 0)
+        self.assertGreater(configured['reads_per_second'], 0)
+
+class WorkerRoleTests(TestCase):
+    def test_api_role_skips_docs_stack(self):
+        results = benchmarks.benchmark_startup(roles=['api', 'full'], repeat=1, path=reverse('prometheus-metrics'), headers={})
+        self.assertEqual(results['api']['status_codes'], [200])
+        self.assertEqual(results['full']['status_codes'], [200])
+        self.assertNotIn('drf_yasg', results['api']['loaded'])
+        self.assertNotIn('django.contrib.sessions', results['api']['loaded'])
+        self.assertIn('drf_yasg', results['full']['loaded'])
+        self.assertLess(results['api']['modules'], results['full']['modules'])
+        self.assertGreater(results['api']['import_ms'], 0)
+
+    def test_import_time_total(self):
+        output = (
+            'import time: self [us] | cumulative | imported package\n'
+            'import time:       120 |        120 | os\n'
+            'import time:      2380 |       2500 | django\n'
+        )
+        self.assertEqual(benchmarks.import_time_ms(output), 2.5)
+
+class InstrumentationTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='testuser', password='testpass')
+        self.client.force_authenticate(user=self.user)
+        self.vendor = Vendor.objects.create(name='Test Vendor', vendor_code='TEST001')
+        instrumentation.reset()
+
+    def test_metrics_endpoint(self):
+        self.client.get(reverse('vendor-list'))
+        PurchaseOrder.objects.create(
+            po_number='PO001', vendor=self.vendor, delivery_date='2023-06-30', items=[], quantity=1,
+        )
+        response = self.client.get(reverse('prometheus-metrics'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response['Content-Type'].startswith('text/plain'))
+        body = response.content.decode()
+        self.assertIn('# TYPE vms_request_duration_seconds histogram', body)
+        self.assertIn('vms_request_queries_count{method="GET",route="vendor-list"} 1', body)
+        self.assertIn('vms_request_queries_bucket{method="GET",route="vendor-list",le="+Inf"} 1', body)
+        self.assertIn('vms_signal_duration_seconds_count{handler="update_vendor_metrics"} 1', body)
+
+    def test_series_are_bounded(self):
+        for i in range(instrumentation.MAX_SERIES + 10):
+            instrumentation.observe('vms_request_queries', 1, route=f'route-{i}', method='GET')
+        body = instrumentation.render_prometheus()
+        self.assertIn('vms_request_queries_count{overflow="true"} 10', body)
+
+    @override_settings(SLOW_REQUEST_THRESHOLD_MS=0)
+    def test_slow_request_log(self):
+        with self.assertLogs('vendors.slow_requests', level='WARNING') as logs:
+            self.client.get(reverse('vendor-detail', args=[self.vendor.id]))
+        self.assertIn('(vendor-detail)', logs.output[0])
+        self.assertIn('SELECT', logs.output[0])
+
+class ExportTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='testuser', password='testpass')
+        self.client.force_authenticate(user=self.user)
+        self.vendors = [Vendor.objects.create(name=f'Vendor {i}', vendor_code=f'V{i:03}') for i in range(2)]
+        for i in range(5):
+            PurchaseOrder.objects.create(
+                po_number=f'PO{i:03}', vendor=self.vendors[i % 2], delivery_date='2023-06-30',
+                items=[{'name': 'Item, "quoted"', 'quantity': i}], quantity=i,
+                status='completed' if i < 3 else 'pending',
+            )
+
+    def read(self, response):
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.streaming)
+        return b''.join(response.streaming_content)
+
+    def test_csv_export_applies_filters(self):
+        response = self.client.get(reverse('purchaseorder-export'), {'vendor': self.vendors[0].id})
+        self.assertEqual(response['Content-Type'], 'text/csv; charset=utf-8')
+        self.assertIn('purchase_orders.csv', response['Content-Disposition'])
+        rows = list(csv.DictReader(StringIO(self.read(response).decode())))
+        self.assertEqual([row['po_number'] for row in rows], ['PO000', 'PO002', 'PO004'])
+        self.assertEqual(json.loads(rows[0]['items']), [{'name': 'Item, "quoted"', 'quantity': 0}])
+        self.assertEqual(rows[0]['vendor'], str(self.vendors[0].id))
+
+    def test_ndjson_export_with_fields(self):
+        response = self.client.get(reverse('vendor-export'), {'output': 'ndjson', 'fields': 'vendor_code,name'})
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        rows = [json.loads(line) for line in self.read(response).decode().splitlines()]
+        self.assertEqual(rows, [{'vendor_code': 'V000', 'name': 'Vendor 0'}, {'vendor_code': 'V001', 'name': 'Vendor 1'}])
+
+    def test_gzip_export(self):
+        response = self.client.get(
+            reverse('purchaseorder-export'), {'output': 'ndjson', 'status': 'pending'}, HTTP_ACCEPT_ENCODING='gzip',
+        )
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertIn('Accept-Encoding', response['Vary'])
+        lines = gzip.decompress(self.read(response)).decode().splitlines()
+        self.assertEqual([json.loads(line)['po_number'] for line in lines], ['PO003', 'PO004'])
+
+    def test_gzip_refused_by_q_value(self):
+        for accept_encoding in ('gzip;q=0', 'br, gzip; q=0.0', 'identity', '*;q=0', 'gzip;q=0, *'):
+            with self.subTest(accept_encoding):
+                response = self.client.get(reverse('vendor-export'), HTTP_ACCEPT_ENCODING=accept_encoding)
+                self.assertNotIn('Content-Encoding', response)
+                self.assertIn('Accept-Encoding', response['Vary'])
+                self.assertTrue(self.read(response).startswith(b'id,'))
+        for accept_encoding in ('gzip;q=0.5, br', 'deflate, *'):
+            with self.subTest(accept_encoding):
+                response = self.client.get(reverse('vendor-export'), HTTP_ACCEPT_ENCODING=accept_encoding)
+                self.assertEqual(response['Content-Encoding'], 'gzip')
+
+    def test_invalid_output(self):
+        response = self.client.get(reverse('vendor-export'), {'output': 'xml'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+class AsyncReadEndpointTests(TestCase):
+    def setUp(self):
+        performance_cache.get_cache().clear()
+        self.user = User.objects.create_user(username='testuser', password='testpass')
+        self.headers = {'Authorization': f'Bearer {RefreshToken.for_user(self.user).access_token}'}
+        self.vendors = [Vendor.objects.create(name=f'Vendor {i}', vendor_code=f'V{i:03}') for i in range(3)]
+        for i in range(3):
+            PurchaseOrder.objects.create(
+                po_number=f'PO{i:03}', vendor=self.vendors[0], delivery_date='2023-06-30', items=[], quantity=1,
+                status='completed', quality_rating=i + 3,
+            )
+
+    async def test_requires_authentication(self):
+        response = await self.async_client.get(reverse('async-vendor-list'))
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+        response = await self.async_client.get(reverse('async-vendor-list'), headers={'Authorization': 'Bearer bad'})
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    async def test_list_matches_sync_endpoint(self):
+        url = reverse('async-vendor-list')
+        response = await self.async_client.get(url, {'page_size': 2}, headers=self.headers)
+        self.assertEqual([row['vendor_code'] for row in response.json()['results']], ['V000', 'V001'])
+        self.assertIsNone(response.json()['previous'])
+        # Cursors are interchangeable with the DRF endpoint's.
+        response = await self.async_client.get(response.json()['next'].replace(url, reverse('vendor-list')),
+                                               headers=self.headers)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([row['vendor_code'] for row in response.data['results']], ['V002'])
+        response = await self.async_client.get(response.data['previous'].replace(reverse('vendor-list'), url),
+                                               headers=self.headers)
+        self.assertEqual([row['vendor_code'] for row in response.json()['results']], ['V000', 'V001'])
+
+    async def test_list_serializes_like_sync_endpoint(self):
+        for name, serializer_class in (('vendor', VendorSerializer), ('purchaseorder', PurchaseOrderSerializer)):
+            for params in ({}, {'fields': 'id,vendor_code' if name == 'vendor' else 'po_number,issue_date'}):
+                with self.subTest(name, **params):
+                    with mock.patch.object(serializer_class, 'to_representation') as to_representation:
+                        response = await self.async_client.get(reverse(f'async-{name}-list'), params,
+                                                               headers=self.headers)
+                    # Served from .values() rows, like the DRF list.
+                    to_representation.assert_not_called()
+                    expected = await self.async_client.get(reverse(f'{name}-list'), params, headers=self.headers)
+                    self.assertEqual(response.json()['results'], expected.json()['results'])
+
+    async def test_filters_fields_and_detail(self):
+        response = await self.async_client.get(
+            reverse('async-purchaseorder-list'), {'vendor': self.vendors[0].id, 'fields': 'po_number,quality_rating'},
+            headers=self.headers,
+        )
+        self.assertEqual(response.json()['results'][2], {'po_number': 'PO002', 'quality_rating': 5.0})
+        response = await self.async_client.get(reverse('async-vendor-detail', args=[self.vendors[1].id]),
+                                               headers=self.headers)
+        self.assertEqual(response.json()['vendor_code'], 'V001')
+        response = await self.async_client.get(reverse('async-purchaseorder-detail', args=[999]), headers=self.headers)
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    async def test_performance(self):
+        url = reverse('async-vendor-performance', args=[self.vendors[0].id])
+        response = await self.async_client.get(url, headers=self.headers)
+        self.assertEqual(response.json()['quality_rating_avg'], 4.0)
+        response = await self.async_client.get(url, headers={**self.headers, 'If-None-Match': response['ETag']})
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_concurrent_benchmark(self):
+        scenarios = [s for s in benchmarks.default_scenarios() if s.name in ('vendor_detail', 'vendor_detail_async')]
+        results = benchmarks.run_benchmarks(scenarios, iterations=4, warmup=1, concurrency=2)
+        self.assertEqual(results['vendor_detail_async']['status_codes'], [200])
+        self.assertEqual(results['vendor_detail_async']['concurrency'], 2)
+
+class OpenAPISchemaTests(TestCase):
+    def setUp(self):
+        api_schema.load_schema.cache_clear()
+        self.addCleanup(api_schema.load_schema.cache_clear)
+
+    def test_committed_schema_matches_code(self):
+        # Fails after an API change until generate_openapi_schema is rerun.
+        call_command('generate_openapi_schema', '--check', stdout=StringIO())
+
+    def test_check_reports_drift(self):
+        with open(settings.OPENAPI_SCHEMA_PATH, 'rb') as fh:
+            stale = json.loads(fh.read())
+        stale['paths'].pop('/vendors/')
+        with tempfile.NamedTemporaryFile('w', suffix='.json') as fh:
+            json.dump(stale, fh)
+            fh.flush()
+            with self.assertRaises(CommandError):
+                call_command('generate_openapi_schema', '--check', '--output', fh.name, stdout=StringIO())
+
+    def test_schema_is_served_by_digest(self):
+        content, digest = api_schema.load_schema()
+        response = self.client.get(reverse('openapi-schema'))
+        self.assertEqual(response.status_code, status.HTTP_302_FOUND)
+        self.assertIn('no-cache', response['Cache-Control'])
+        url = reverse('openapi-schema-digest', args=[digest])
+        self.assertEqual(response['Location'], url)
+
+        with self.assertNumQueries(0):
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.content, content)
+        self.assertIn('immutable', response['Cache-Control'])
+        self.assertIn('/vendors/{vendor_id}/performance/', json.loads(response.content)['paths'])
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        response = self.client.get(reverse('openapi-schema-digest', args=['0123456789abcdef']))
+        self.assertEqual(response['Location'], url)
+
+    def test_docs_pages_use_the_generated_schema(self):
+        with mock.patch.object(api_schema, 'generate_schema') as generate:
+            for name in ('schema-swagger-ui', 'schema-redoc'):
+                response = self.client.get(reverse(name))
+                self.assertEqual(response.status_code, status.HTTP_200_OK)
+                self.assertContains(response, reverse('openapi-schema'))
+                response = self.client.get(reverse(name), {'format': 'openapi'})
+                self.assertRedirects(response, reverse('openapi-schema'), fetch_redirect_response=False)
+        generate.assert_not_called()
+
+class CachedJWTAuthenticationTests(APITestCase):
+    def setUp(self):
+        token_cache.clear()
+        self.user = User.objects.create_user(username='testuser', password='testpass')
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {RefreshToken.for_user(self.user).access_token}')
+        self.vendor = Vendor.objects.create(name='Test Vendor', vendor_code='TEST001')
+        self.url = reverse('vendor-detail', args=[self.vendor.id])
+
+    def test_repeated_token_skips_user_query(self):
+        with self.assertNumQueries(2):
+            self.assertEqual(self.client.get(self.url).status_code, status.HTTP_200_OK)
+        with self.assertNumQueries(1):
+            self.assertEqual(self.client.get(self.url).status_code, status.HTTP_200_OK)
+
+    def test_deactivation_invalidates(self):
+        self.client.get(self.url)
+        self.user.is_active = False
+        self.user.save()
+        self.assertEqual(self.client.get(self.url).status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_password_change_invalidates(self):
+        self.client.get(self.url)
+        self.user.set_password('newpass')
+        self.user.save()
+        with self.assertNumQueries(2):
+            self.client.get(self.url)
+
+    @override_settings(JWT_AUTH_CACHE_TTL=0)
+    def test_cache_can_be_disabled(self):
+        self.client.get(self.url)
+        with self.assertNumQueries(2):
+            self.client.get(self.url)
+
+    @override_settings(JWT_CLAIMS_ONLY_READS=True)
+    def test_claims_only_reads(self):
+        with self.assertNumQueries(1):
+            self.assertEqual(self.client.get(self.url).status_code, status.HTTP_200_OK)
+        # Writes still load (and check) the user.
+        self.user.is_active = False
+        self.user.save()
+        response = self.client.patch(self.url, {'name': 'Renamed'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_cache_is_bounded(self):
+        cache = TokenCache(max_size=2)
+        for i in range(3):
+            cache.set(f'token-{i}', self.user.id, i, time.time() + 60)
+        self.assertEqual(len(cache), 2)
+        self.assertIsNone(cache.get('token-0'))
+        cache.set('expired', self.user.id, 'value', time.time() - 1)
+        self.assertIsNone(cache.get('expired'))
+        cache.invalidate_user(self.user.id)
+        self.assertEqual(len(cache), 0)
+
+class ValuesSerializerTests(APITestCase):
+    def setUp(self):
+        self.vendor = Vendor.objects.create(
+            name='Vendor "Ü"', vendor_code='V001', contact_details='', address='1 Street',
+            on_time_delivery_rate=0.5, quality_rating_avg=4.25,
+        )
+        self.rated = PurchaseOrder.objects.create(
+            po_number='PO001', vendor=self.vendor, delivery_date='2023-06-30T12:34:56.789012Z',
+            items=[{'name': 'Item "1"', 'quantity': 3, 'price': 1.5}], quantity=3, status='completed',
+            quality_rating=4, fulfilled_without_issues=True,
+        )
+        self.rated.acknowledgment_date = timezone.now()
+        self.rated.save()
+        PurchaseOrder.objects.create(
+            po_number='PO002', vendor=self.vendor, delivery_date='2023-07-01', items={}, quantity=1, status='pending',
+        )
+
+    def assertParity(self, serializer_class, fields=None):
+        queryset = serializer_class.Meta.model.objects.order_by('id')
+        kwargs = {'fields': fields} if fields else {}
+        expected = JSONRenderer().render(serializer_class(queryset, many=True, **kwargs).data)
+        values_serializer = ValuesSerializer(serializer_class, fields=fields)
+        actual = JSONRenderer().render(values_serializer.serialize(queryset.values(*values_serializer.columns)))
+        self.assertEqual(actual, expected)
+
+    def test_output_is_identical(self):
+        self.assertParity(VendorSerializer)
+        self.assertParity(PurchaseOrderSerializer)
+        self.assertParity(PurchaseOrderSerializer, fields=['items', 'vendor', 'acknowledgment_date'])
+
+    def test_list_endpoint_uses_values_rows(self):
+        user = User.objects.create_user(username='testuser', password='testpass')
+        self.client.force_authenticate(user=user)
+        response = self.client.get(reverse('purchaseorder-list'), {'fields': 'po_number', 'page_size': 1})
+        self.assertEqual(response.data['results'], [{'po_number': 'PO001'}])
+        response = self.client.get(response.data['next'])
+        self.assertEqual(response.data['results'], [{'po_number': 'PO002'}])
+        response = self.client.get(reverse('purchaseorder-detail', args=[self.rated.id]))
+        self.assertEqual(
+            self.client.get(reverse('purchaseorder-list')).data['results'][0], response.data,
+        )
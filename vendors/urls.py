@@ -1,13 +1,29 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import VendorViewSet, PurchaseOrderViewSet, vendor_performance, acknowledge_purchase_order
+from . import async_views
+from .views import (
+    VendorViewSet, PurchaseOrderViewSet, vendor_performance, vendor_performance_batch, vendor_history,
+    vendor_items, acknowledge_purchase_order, performance_cache_stats, metric_queue_status,
+)
 
 router = DefaultRouter()
 router.register(r'vendors', VendorViewSet)
 router.register(r'purchase_orders', PurchaseOrderViewSet)
 
 urlpatterns = [
+    # Ahead of the router, whose vendor detail route would take 'performance' for a pk.
+    path('vendors/performance/', vendor_performance_batch, name='vendor-performance-batch'),
+    path('vendors/performance/cache-stats/', performance_cache_stats, name='performance-cache-stats'),
     path('', include(router.urls)),
     path('vendors/<int:vendor_id>/performance/', vendor_performance, name='vendor-performance'),
+    path('vendors/<int:vendor_id>/history/', vendor_history, name='vendor-history'),
+    path('vendors/<int:vendor_id>/items/', vendor_items, name='vendor-items'),
     path('purchase_orders/<int:po_id>/acknowledge/', acknowledge_purchase_order, name='acknowledge-purchase-order'),
+    path('metrics/queue/', metric_queue_status, name='metric-queue-status'),
+    path('async/vendors/', async_views.vendor_list, name='async-vendor-list'),
+    path('async/vendors/<int:pk>/', async_views.vendor_detail, name='async-vendor-detail'),
+    path('async/vendors/<int:vendor_id>/performance/', async_views.vendor_performance,
+         name='async-vendor-performance'),
+    path('async/purchase_orders/', async_views.purchase_order_list, name='async-purchaseorder-list'),
+    path('async/purchase_orders/<int:pk>/', async_views.purchase_order_detail, name='async-purchaseorder-detail'),
 ]
\ No newline at end of file
@@ -1,28 +1,137 @@
 from rest_framework import viewsets
-from django.db.models import F
-from rest_framework.decorators import api_view
+from django.http import Http404, HttpResponse, StreamingHttpResponse
+from django.views.decorators.http import require_GET
+from django.utils.cache import get_conditional_response
+from django.utils.cache import patch_vary_headers
+from django.utils.http import http_date
+from rest_framework import status
+from rest_framework.exceptions import ValidationError
+from rest_framework.decorators import action, api_view
+from rest_framework.parsers import JSONParser
 from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import replace_query_param
+from django.db import transaction
 from django.utils import timezone
-from .models import Vendor, PurchaseOrder
-from .serializers import VendorSerializer, PurchaseOrderSerializer
+from .models import Vendor, PurchaseOrder, HistoricalPerformance, VendorRanking
+from .serializers import (
+    VendorSerializer, PurchaseOrderSerializer, HistoricalPerformanceSerializer, HistoryQuerySerializer,
+    VendorRankingSerializer, RankingQuerySerializer, ExportQuerySerializer, PerformanceQuerySerializer,
+    BulkTransitionSerializer, SearchQuerySerializer, ItemVolumeQuerySerializer, ItemVolumeSerializer,
+    PerformanceBatchSerializer,
+)
+from .pagination import RankCursorPagination
+from .fast_serializers import ValuesSerializer
+from .filters import VendorFilter, PurchaseOrderFilter
+from .parsers import NDJSONParser
+from .bulk import ingest_purchase_orders, transition_purchase_orders, UPDATED
+from . import cache as performance_cache
+from . import export
+from . import jobs
+from . import instrumentation
+from . import lines
+from . import projection
+from . import search
 from rest_framework.permissions import IsAuthenticated
-from rest_framework_simplejwt.authentication import JWTAuthentication
+from vendor_management.authentication import CachedJWTAuthentication
 from rest_framework.decorators import api_view, authentication_classes, permission_classes
-from drf_yasg.utils import swagger_auto_schema
-from drf_yasg import openapi
+from .docs import openapi, swagger_auto_schema
+
+fields_parameter = openapi.Parameter(
+    'fields', openapi.IN_QUERY, 'Comma-separated list of fields to return', type=openapi.TYPE_STRING,
+)
+
+class FieldProjectionMixin:
+    """
+    Supports a ``fields`` query parameter on read requests, limiting both the
+    columns loaded from the database and the serialized output.
+    """
+    def get_requested_fields(self):
+        if not hasattr(self, '_requested_fields'):
+            request = getattr(self, 'request', None)
+            raw = request.query_params.get('fields') if request is not None and request.method == 'GET' else None
+            self._requested_fields = projection.parse_fields(raw, self.get_serializer_class())
+        return self._requested_fields
+
+    def get_queryset(self):
+        return projection.project(super().get_queryset(), self.get_requested_fields())
+
+    def get_serializer(self, *args, **kwargs):
+        fields = self.get_requested_fields()
+        if fields:
+            kwargs.setdefault('fields', fields)
+        return super().get_serializer(*args, **kwargs)
+
+    def get_values_serializer(self):
+        return ValuesSerializer(self.get_serializer_class(), fields=self.get_requested_fields())
+
+class ValuesListMixin:
+    """
+    Serves ``list`` from ``.values()`` rows through a ``ValuesSerializer``,
+    skipping model instantiation and DRF's per-field machinery. The response
+    is the same as the regular serializer's.
+    """
+    def list(self, request, *args, **kwargs):
+        serializer = self.get_values_serializer()
+        # The cursor is taken from the id column, whether or not it is output.
+        queryset = self.filter_queryset(self.get_queryset()).values(*{'id', *serializer.columns})
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            return self.get_paginated_response(serializer.serialize(page))
+        return Response(serializer.serialize(queryset))
+
+class ExportMixin:
+    """
+    Adds an ``export`` action streaming every row matching the list filters
+    as CSV or NDJSON (``?output=``), gzip-compressed when the client accepts it.
+    ``?fields=`` limits the exported columns. Values are formatted as in
+    the API's JSON responses.
+    """
+    export_filename = 'export'
 
-class VendorViewSet(viewsets.ModelViewSet):
+    @swagger_auto_schema(
+        method='get',
+        operation_summary='Export as CSV or NDJSON',
+        operation_description=(
+            'Streams every row matching the list filters, ordered by ID, without pagination. '
+            'The response is gzip-compressed when the Accept-Encoding header allows gzip with a non-zero q-value.'
+        ),
+        query_serializer=ExportQuerySerializer,
+        manual_parameters=[fields_parameter],
+        responses={200: 'CSV or NDJSON stream'}
+    )
+    @action(detail=False, methods=['get'], pagination_class=None)
+    def export(self, request):
+        query = ExportQuerySerializer(data=request.query_params)
+        query.is_valid(raise_exception=True)
+        output = query.validated_data['output']
+        queryset = self.filter_queryset(self.get_queryset()).order_by('id')
+        compress = export.accepts_gzip(request.META.get('HTTP_ACCEPT_ENCODING', ''))
+        response = StreamingHttpResponse(
+            export.export_queryset(queryset, self.get_values_serializer(), output, gzip=compress),
+            content_type=export.CONTENT_TYPES[output],
+        )
+        response['Content-Disposition'] = f'attachment; filename="{self.export_filename}.{output}"'
+        if compress:
+            response['Content-Encoding'] = 'gzip'
+        patch_vary_headers(response, ['Accept-Encoding'])
+        return response
+
+class VendorViewSet(ExportMixin, ValuesListMixin, FieldProjectionMixin, viewsets.ModelViewSet):
     """
     Vendor API endpoints.
     """
     queryset = Vendor.objects.all()
     serializer_class = VendorSerializer
-    authentication_classes = [JWTAuthentication]
+    export_filename = 'vendors'
+    filterset_class = VendorFilter
+    authentication_classes = [CachedJWTAuthentication]
     permission_classes = [IsAuthenticated]
 
     @swagger_auto_schema(
         operation_summary='List all vendors',
-        operation_description='Returns a paginated list of all vendors.',
+        operation_description='Returns a cursor-paginated list of vendors ordered by ID.',
+        manual_parameters=[fields_parameter],
         responses={200: VendorSerializer(many=True)}
     )
     def list(self, request, *args, **kwargs):
@@ -31,6 +140,7 @@ class VendorViewSet(viewsets.ModelViewSet):
     @swagger_auto_schema(
         operation_summary='Retrieve a vendor',
         operation_description='Returns the details of a specific vendor.',
+        manual_parameters=[fields_parameter],
         responses={200: VendorSerializer()}
     )
     def retrieve(self, request, *args, **kwargs):
@@ -71,18 +181,84 @@ class VendorViewSet(viewsets.ModelViewSet):
     def destroy(self, request, *args, **kwargs):
         return super().destroy(request, *args, **kwargs)
 
-class PurchaseOrderViewSet(viewsets.ModelViewSet):
+    @swagger_auto_schema(
+        method='get',
+        operation_summary='Search vendors',
+        operation_description=(
+            'Returns vendors matching every word of q as a prefix of a word in their name, vendor code, '
+            'contact details or address, best matches first, in cursor-paginated pages.'
+        ),
+        query_serializer=SearchQuerySerializer,
+        manual_parameters=[fields_parameter],
+        responses={200: VendorSerializer(many=True)}
+    )
+    @action(detail=False, methods=['get'], pagination_class=None)
+    def search(self, request):
+        """
+        Search vendors.
+
+        Every word of ``q`` must match the start of a word in the vendor's
+        name, vendor code, contact details or address. Matches in the name or
+        vendor code rank higher. The response has the same shape as the list
+        endpoint; follow ``next`` and ``previous`` to page through the results.
+        """
+        query = SearchQuerySerializer(data=request.query_params)
+        query.is_valid(raise_exception=True)
+        try:
+            matches, next_cursor, previous_cursor = search.search_page(
+                query.validated_data['q'],
+                query.validated_data.get('page_size', api_settings.PAGE_SIZE),
+                query.validated_data.get('cursor'),
+            )
+        except ValueError as exc:
+            raise ValidationError({'cursor': [str(exc)]})
+        serializer = self.get_values_serializer()
+        ids = [pk for _, pk in matches]
+        rows = {row['id']: row for row in Vendor.objects.filter(pk__in=ids).values(*{'id', *serializer.columns})}
+        url = request.build_absolute_uri()
+        return Response({
+            'next': next_cursor and replace_query_param(url, 'cursor', next_cursor),
+            'previous': previous_cursor and replace_query_param(url, 'cursor', previous_cursor),
+            # A vendor deleted since it was ranked is skipped.
+            'results': serializer.serialize(rows[pk] for pk in ids if pk in rows),
+        })
+
+    @swagger_auto_schema(
+        method='get',
+        operation_summary='Rank vendors by a performance metric',
+        operation_description=(
+            'Returns vendors ordered best-first by the given metric (lowest first for average_response_time), '
+            'optionally limited to vendors with at least min_orders purchase orders. Served from the ranking '
+            'snapshot built by the rebuild_vendor_rankings command; generated_at tells how fresh it is.'
+        ),
+        query_serializer=RankingQuerySerializer,
+        responses={200: VendorRankingSerializer(many=True)}
+    )
+    @action(detail=False, methods=['get'], pagination_class=RankCursorPagination)
+    def rankings(self, request):
+        query = RankingQuerySerializer(data=request.query_params)
+        query.is_valid(raise_exception=True)
+        rankings = VendorRanking.objects.filter(
+            metric=query.validated_data['metric'], total_orders__gte=query.validated_data['min_orders'],
+        ).select_related('vendor')
+        page = self.paginate_queryset(rankings)
+        return self.get_paginated_response(VendorRankingSerializer(page, many=True).data)
+
+class PurchaseOrderViewSet(ExportMixin, ValuesListMixin, FieldProjectionMixin, viewsets.ModelViewSet):
     """
     Purchase Order API endpoints.
     """
     queryset = PurchaseOrder.objects.all()
     serializer_class = PurchaseOrderSerializer
-    authentication_classes = [JWTAuthentication]
+    export_filename = 'purchase_orders'
+    filterset_class = PurchaseOrderFilter
+    authentication_classes = [CachedJWTAuthentication]
     permission_classes = [IsAuthenticated]
 
     @swagger_auto_schema(
         operation_summary='List all purchase orders',
-        operation_description='Returns a paginated list of all purchase orders.',
+        operation_description='Returns a cursor-paginated list of purchase orders ordered by ID.',
+        manual_parameters=[fields_parameter],
         responses={200: PurchaseOrderSerializer(many=True)}
     )
     def list(self, request, *args, **kwargs):
@@ -91,6 +267,7 @@ class PurchaseOrderViewSet(viewsets.ModelViewSet):
     @swagger_auto_schema(
         operation_summary='Retrieve a purchase order',
         operation_description='Returns the details of a specific purchase order.',
+        manual_parameters=[fields_parameter],
         responses={200: PurchaseOrderSerializer()}
     )
     def retrieve(self, request, *args, **kwargs):
@@ -131,14 +308,110 @@ class PurchaseOrderViewSet(viewsets.ModelViewSet):
     def destroy(self, request, *args, **kwargs):
         return super().destroy(request, *args, **kwargs)
 
+    @swagger_auto_schema(
+        method='post',
+        operation_summary='Bulk create purchase orders',
+        operation_description=(
+            'Creates purchase orders from a JSON array or an NDJSON stream (Content-Type: application/x-ndjson). '
+            'Invalid rows are reported by index without aborting the rest of the batch, and vendor metrics are '
+            'recomputed once per affected vendor.'
+        ),
+        request_body=PurchaseOrderSerializer(many=True),
+        responses={
+            201: openapi.Response('All purchase orders created'),
+            207: openapi.Response('Some purchase orders created; see errors'),
+            400: openapi.Response('No purchase orders created'),
+        }
+    )
+    @action(detail=False, methods=['post'], parser_classes=[JSONParser, NDJSONParser])
+    def bulk(self, request):
+        created, errors = ingest_purchase_orders(request.data)
+        data = {
+            'created': [{'index': index, 'id': po.id, 'po_number': po.po_number} for index, po in created],
+            'errors': [{'index': index, 'errors': errors[index]} for index in sorted(errors)],
+        }
+        if not errors:
+            response_status = status.HTTP_201_CREATED
+        elif created:
+            response_status = status.HTTP_207_MULTI_STATUS
+        else:
+            response_status = status.HTTP_400_BAD_REQUEST
+        return Response(data, status=response_status)
+
+    def transition(self, request, new_status):
+        query = BulkTransitionSerializer(data=request.data)
+        query.is_valid(raise_exception=True)
+        results = transition_purchase_orders(new_status, **query.validated_data)
+        updated = sum(result['result'] == UPDATED for result in results)
+        if updated == len(results):
+            response_status = status.HTTP_200_OK
+        elif updated:
+            response_status = status.HTTP_207_MULTI_STATUS
+        else:
+            response_status = status.HTTP_400_BAD_REQUEST
+        return Response({'results': results}, status=response_status)
+
+    @swagger_auto_schema(
+        method='post',
+        operation_summary='Bulk acknowledge purchase orders',
+        operation_description=(
+            'Acknowledges the pending purchase orders referenced by ID or PO number with one update per vendor, '
+            'and reports the outcome for each reference.'
+        ),
+        request_body=BulkTransitionSerializer,
+        responses={
+            200: openapi.Response('All purchase orders acknowledged'),
+            207: openapi.Response('Some purchase orders acknowledged; see results'),
+            400: openapi.Response('No purchase orders acknowledged'),
+        }
+    )
+    @action(detail=False, methods=['post'], url_path='bulk/acknowledge', url_name='bulk-acknowledge')
+    def bulk_acknowledge(self, request):
+        """
+        Acknowledge many purchase orders at once.
+
+        The body references orders by ``ids`` and/or ``po_numbers``. Pending
+        orders move to ``acknowledged`` and get an acknowledgment date; every
+        reference is reported in ``results`` as ``updated``, ``not_found``,
+        ``already_acknowledged`` or ``invalid_transition``. Acknowledging
+        affects no vendor metric, so none are recomputed.
+        """
+        return self.transition(request, PurchaseOrder.ACKNOWLEDGED)
+
+    @swagger_auto_schema(
+        method='post',
+        operation_summary='Bulk complete purchase orders',
+        operation_description=(
+            'Completes the acknowledged purchase orders referenced by ID or PO number with one update per vendor, '
+            'recomputes the metrics of each affected vendor once and reports the outcome for each reference.'
+        ),
+        request_body=BulkTransitionSerializer,
+        responses={
+            200: openapi.Response('All purchase orders completed'),
+            207: openapi.Response('Some purchase orders completed; see results'),
+            400: openapi.Response('No purchase orders completed'),
+        }
+    )
+    @action(detail=False, methods=['post'], url_path='bulk/complete', url_name='bulk-complete')
+    def bulk_complete(self, request):
+        """
+        Complete many purchase orders at once.
+
+        Like ``bulk_acknowledge``, for acknowledged orders moving to
+        ``completed``. The metrics of every vendor with a completed order are
+        recomputed once, according to ``VENDOR_METRICS_MODE``.
+        """
+        return self.transition(request, PurchaseOrder.COMPLETED)
+
 
 @swagger_auto_schema(
     method='get',
     operation_summary='Retrieve vendor performance metrics',
-    operation_description='Returns the performance metrics for a specific vendor.',
+    operation_description='Returns the performance metrics for a specific vendor, over its whole history or a recent time window.',
     manual_parameters=[
         openapi.Parameter('vendor_id', openapi.IN_PATH, 'The ID of the vendor', type=openapi.TYPE_INTEGER),
     ],
+    query_serializer=PerformanceQuerySerializer,
     responses={200: openapi.Response('Vendor performance metrics', schema=openapi.Schema(
         type=openapi.TYPE_OBJECT,
         properties={
@@ -147,10 +420,13 @@ class PurchaseOrderViewSet(viewsets.ModelViewSet):
             'average_response_time': openapi.Schema(type=openapi.TYPE_NUMBER),
             'fulfillment_rate': openapi.Schema(type=openapi.TYPE_NUMBER),
         }
-    ))}
+    )),
+        400: openapi.Response('Invalid window'),
+        404: openapi.Response('Vendor not found'),
+    }
 )
 @api_view(['GET'])
-@authentication_classes([JWTAuthentication])
+@authentication_classes([CachedJWTAuthentication])
 @permission_classes([IsAuthenticated])
 def vendor_performance(request, vendor_id):
     """
@@ -164,70 +440,245 @@ def vendor_performance(request, vendor_id):
 
     Parameters:
     - vendor_id (integer): The ID of the vendor.
+    - window (string, optional): Only count the orders issued in the last
+      30, 90 or 365 days (``30d``, ``90d`` or ``365d``), today included.
+      Answered from the vendor's daily metric buckets, so the cost does not
+      depend on how many orders fall into the window.
 
     Returns:
     - 200 OK: A JSON object containing the vendor's performance metrics.
+    - 304 Not Modified: If the request's If-None-Match/If-Modified-Since
+      headers match the cached metrics.
+    - 400 Bad Request: If the window is not one of the above.
     - 404 Not Found: If the vendor with the specified ID does not exist.
 
+    Responses are served from a per-vendor cache that is invalidated whenever
+    the vendor or one of its purchase orders changes, and carry ETag and
+    Last-Modified headers for conditional requests.
+
     Authentication:
     - JWT authentication required. Include the access token in the Authorization header as "Bearer {access_token}".
 
     Permissions:
     - User must be authenticated to access this endpoint.
     """
-    vendor = Vendor.objects.get(id=vendor_id)
-    completed_pos = PurchaseOrder.objects.filter(vendor=vendor, status='completed')
+    query = PerformanceQuerySerializer(data=request.query_params)
+    query.is_valid(raise_exception=True)
+    entry = performance_cache.get_vendor_performance(vendor_id, query.validated_data.get('window'))
+    if entry is None:
+        raise Http404
+    response = Response(entry['data'])
+    response['ETag'] = entry['etag']
+    response['Last-Modified'] = http_date(entry['last_modified'])
+    return get_conditional_response(
+        request, etag=entry['etag'], last_modified=entry['last_modified'], response=response,
+    )
 
-    on_time_delivery_count = completed_pos.filter(delivery_date__lte=F('delivery_date')).count()
-    on_time_delivery_rate = on_time_delivery_count / completed_pos.count() if completed_pos else 0
+performance_metrics_schema = openapi.Schema(
+    type=openapi.TYPE_OBJECT,
+    properties={
+        'on_time_delivery_rate': openapi.Schema(type=openapi.TYPE_NUMBER),
+        'quality_rating_avg': openapi.Schema(type=openapi.TYPE_NUMBER),
+        'average_response_time': openapi.Schema(type=openapi.TYPE_NUMBER),
+        'fulfillment_rate': openapi.Schema(type=openapi.TYPE_NUMBER),
+    }
+)
+performance_batch_responses = {
+    200: openapi.Response('Performance metrics keyed by vendor id', schema=openapi.Schema(
+        type=openapi.TYPE_OBJECT,
+        properties={
+            'results': openapi.Schema(type=openapi.TYPE_OBJECT, additional_properties=performance_metrics_schema),
+            'not_found': openapi.Schema(type=openapi.TYPE_ARRAY, items=openapi.Schema(type=openapi.TYPE_INTEGER)),
+        }
+    )),
+    400: openapi.Response('Missing, invalid or too many ids, or an invalid window'),
+}
 
-    quality_ratings = completed_pos.exclude(quality_rating=None).values_list('quality_rating', flat=True)
-    quality_rating_avg = sum(quality_ratings) / len(quality_ratings) if quality_ratings else 0
+@swagger_auto_schema(
+    method='get',
+    operation_summary='Retrieve performance metrics of several vendors',
+    operation_description='Returns the performance metrics of the vendors in ?ids=1,2,3, keyed by vendor id.',
+    query_serializer=PerformanceBatchSerializer,
+    responses=performance_batch_responses,
+)
+@swagger_auto_schema(
+    method='post',
+    operation_summary='Retrieve performance metrics of several vendors',
+    operation_description='Like the GET variant, for id lists too long for a URL.',
+    request_body=PerformanceBatchSerializer,
+    responses=performance_batch_responses,
+)
+@api_view(['GET', 'POST'])
+@authentication_classes([CachedJWTAuthentication])
+@permission_classes([IsAuthenticated])
+def vendor_performance_batch(request):
+    """
+    Retrieve performance metrics of several vendors.
+
+    The batch version of the vendor performance endpoint, e.g. for a
+    scorecard page. Cached vendors are served from the performance cache in
+    one lookup; the others are computed with one grouped query per chunk of
+    ``VENDOR_PERFORMANCE_BATCH_CHUNK_SIZE`` vendors.
 
-    response_times = []
-    for po in completed_pos:
-        if po.acknowledgment_date:
-            response_time = (po.acknowledgment_date - po.issue_date).total_seconds()
-            response_times.append(response_time)
-    average_response_time = sum(response_times) / len(response_times) if response_times else 0
+    Parameters (query string for GET, JSON body for POST):
+    - ids (list of integers): The vendor IDs, at most
+      ``VENDOR_PERFORMANCE_BATCH_MAX_IDS``. GET takes them comma-separated
+      (``?ids=1,2,3``) or repeated (``?ids=1&ids=2``).
+    - window (string, optional): ``30d``, ``90d`` or ``365d``, as for a single vendor.
 
-    fulfilled_pos = completed_pos.filter(fulfilled_without_issues=True).count()
-    fulfillment_rate = fulfilled_pos / vendor.purchaseorder_set.count() if vendor.purchaseorder_set.exists() else 0
+    Returns:
+    - 200 OK: ``{"results": {vendor_id: metrics}, "not_found": [vendor_id, ...]}``.
+    - 400 Bad Request: If ids is missing, invalid or too long, or the window is invalid.
+
+    Authentication:
+    - JWT authentication required. Include the access token in the Authorization header as "Bearer {access_token}".
+
+    Permissions:
+    - User must be authenticated to access this endpoint.
+    """
+    query = PerformanceBatchSerializer(data=request.query_params if request.method == 'GET' else request.data)
+    query.is_valid(raise_exception=True)
+    vendor_ids = query.validated_data['ids']
+    entries = performance_cache.get_many_vendor_performance(vendor_ids, query.validated_data.get('window'))
+    return Response({
+        'results': {str(vendor_id): entry['data'] for vendor_id, entry in entries.items()},
+        'not_found': [vendor_id for vendor_id in vendor_ids if vendor_id not in entries],
+    })
 
-    data = {
-        'on_time_delivery_rate': on_time_delivery_rate,
-        'quality_rating_avg': quality_rating_avg,
-        'average_response_time': average_response_time,
-        'fulfillment_rate': fulfillment_rate,
+@swagger_auto_schema(
+    method='get',
+    operation_summary='Retrieve vendor performance history',
+    operation_description='Returns historical performance snapshots for a specific vendor, oldest first.',
+    manual_parameters=[
+        openapi.Parameter('vendor_id', openapi.IN_PATH, 'The ID of the vendor', type=openapi.TYPE_INTEGER),
+    ],
+    query_serializer=HistoryQuerySerializer,
+    responses={
+        200: HistoricalPerformanceSerializer(many=True),
+        404: openapi.Response('Vendor not found'),
     }
-    return Response(data)
+)
+@api_view(['GET'])
+@authentication_classes([CachedJWTAuthentication])
+@permission_classes([IsAuthenticated])
+def vendor_history(request, vendor_id):
+    """
+    Retrieve vendor performance history.
+
+    Returns the vendor's performance snapshots in chronological order. Recent
+    snapshots are hourly; older ones are compacted into daily and then monthly
+    averages by the snapshot_vendor_performance command.
+
+    Parameters:
+    - vendor_id (integer): The ID of the vendor.
+    - start, end (datetime, optional): Only return snapshots within this range.
+    - granularity (hour, day or month, optional): Only return snapshots of this granularity.
+
+    Returns:
+    - 200 OK: A JSON list of snapshots.
+    - 400 Bad Request: If the query parameters are invalid.
+    - 404 Not Found: If the vendor with the specified ID does not exist.
+
+    Authentication:
+    - JWT authentication required. Include the access token in the Authorization header as "Bearer {access_token}".
+
+    Permissions:
+    - User must be authenticated to access this endpoint.
+    """
+    query = HistoryQuerySerializer(data=request.query_params)
+    query.is_valid(raise_exception=True)
+    if not Vendor.objects.filter(pk=vendor_id).exists():
+        raise Http404
+    snapshots = HistoricalPerformance.objects.filter(vendor_id=vendor_id)
+    if 'start' in query.validated_data:
+        snapshots = snapshots.filter(date__gte=query.validated_data['start'])
+    if 'end' in query.validated_data:
+        snapshots = snapshots.filter(date__lte=query.validated_data['end'])
+    if 'granularity' in query.validated_data:
+        snapshots = snapshots.filter(granularity=query.validated_data['granularity'])
+    return Response(HistoricalPerformanceSerializer(snapshots.order_by('date'), many=True).data)
+
+@swagger_auto_schema(
+    method='get',
+    operation_summary='Retrieve item volumes of a vendor',
+    operation_description='Returns the units ordered and the number of orders per item name for a specific vendor.',
+    manual_parameters=[
+        openapi.Parameter('vendor_id', openapi.IN_PATH, 'The ID of the vendor', type=openapi.TYPE_INTEGER),
+    ],
+    query_serializer=ItemVolumeQuerySerializer,
+    responses={
+        200: ItemVolumeSerializer(many=True),
+        400: openapi.Response('Invalid query parameters'),
+        404: openapi.Response('Vendor not found'),
+    }
+)
+@api_view(['GET'])
+@authentication_classes([CachedJWTAuthentication])
+@permission_classes([IsAuthenticated])
+def vendor_items(request, vendor_id):
+    """
+    Retrieve item volumes of a vendor.
+
+    Returns one entry per item name across the vendor's purchase orders, with
+    the total quantity and the number of orders it appears on, largest
+    quantity first. Answered by grouping the indexed purchase order lines, not
+    by reading the orders' items.
+
+    Parameters:
+    - vendor_id (integer): The ID of the vendor.
+    - name (string, optional): Only report this item.
+    - status (string, optional): Only count orders with this status, e.g.
+      ``completed`` for what the vendor shipped.
+    - start, end (datetime, optional): Only count orders with a delivery date within this range.
+    - limit (integer, optional): Return at most this many items (1-1000, default 100).
+
+    Returns:
+    - 200 OK: A JSON list of ``{name, quantity, order_count}`` objects.
+    - 400 Bad Request: If the query parameters are invalid.
+    - 404 Not Found: If the vendor with the specified ID does not exist.
+
+    Authentication:
+    - JWT authentication required. Include the access token in the Authorization header as "Bearer {access_token}".
+
+    Permissions:
+    - User must be authenticated to access this endpoint.
+    """
+    query = ItemVolumeQuerySerializer(data=request.query_params)
+    query.is_valid(raise_exception=True)
+    if not Vendor.objects.filter(pk=vendor_id).exists():
+        raise Http404
+    volumes = lines.item_volumes(vendor_id, **query.validated_data)
+    return Response(ItemVolumeSerializer(volumes, many=True).data)
 
 @swagger_auto_schema(
     method='post',
     operation_summary='Acknowledge a purchase order',
-    operation_description='Updates the acknowledgment date of a specific purchase order.',
+    operation_description='Moves a pending purchase order to acknowledged and records the acknowledgment date.',
     manual_parameters=[
         openapi.Parameter('po_id', openapi.IN_PATH, 'The ID of the purchase order to acknowledge', type=openapi.TYPE_INTEGER),
     ],
     responses={
         200: openapi.Response('Purchase order acknowledged successfully'),
+        400: openapi.Response('Purchase order is not pending'),
         404: openapi.Response('Purchase order not found'),
     }
 )
 @api_view(['POST'])
-@authentication_classes([JWTAuthentication])
+@authentication_classes([CachedJWTAuthentication])
 @permission_classes([IsAuthenticated])
 def acknowledge_purchase_order(request, po_id):
     """
     Acknowledge a purchase order.
 
-    Updates the acknowledgment date of a specific purchase order.
+    Moves a pending purchase order to ``acknowledged`` and records the
+    acknowledgment date. Orders in any other status are left untouched.
 
     Parameters:
     - po_id (integer): The ID of the purchase order to acknowledge.
 
     Returns:
     - 200 OK: If the purchase order is successfully acknowledged.
+    - 400 Bad Request: If the purchase order cannot move to ``acknowledged`` from its current status.
     - 404 Not Found: If the purchase order with the specified ID does not exist.
 
     Authentication:
@@ -237,9 +688,90 @@ def acknowledge_purchase_order(request, po_id):
     - User must be authenticated to access this endpoint.
     """
     try:
-        po = PurchaseOrder.objects.get(id=po_id)
-        po.acknowledgment_date = timezone.now()
-        po.save()
+        with transaction.atomic():
+            po = PurchaseOrder.objects.select_for_update().get(id=po_id)
+            if (po.status, PurchaseOrder.ACKNOWLEDGED) not in PurchaseOrder.TRANSITIONS:
+                return Response(
+                    {'status': [f'Cannot acknowledge a purchase order with status {po.status!r}.']}, status=400,
+                )
+            po.status = PurchaseOrder.ACKNOWLEDGED
+            po.acknowledgment_date = timezone.now()
+            po.save()
         return Response({'message': 'PO acknowledged successfully.'})
     except PurchaseOrder.DoesNotExist:
-        return Response({'message': 'PO not found.'}, status=404)
\ No newline at end of file
+        return Response({'message': 'PO not found.'}, status=404)
+
+@swagger_auto_schema(
+    method='get',
+    operation_summary='Retrieve vendor performance cache statistics',
+    operation_description='Returns hit/miss counters for the vendor performance cache.',
+    responses={200: openapi.Response('Cache statistics', schema=openapi.Schema(
+        type=openapi.TYPE_OBJECT,
+        properties={
+            'hits': openapi.Schema(type=openapi.TYPE_INTEGER),
+            'misses': openapi.Schema(type=openapi.TYPE_INTEGER),
+            'hit_rate': openapi.Schema(type=openapi.TYPE_NUMBER),
+        }
+    ))}
+)
+@api_view(['GET'])
+@authentication_classes([CachedJWTAuthentication])
+@permission_classes([IsAuthenticated])
+def performance_cache_stats(request):
+    """
+    Retrieve vendor performance cache statistics.
+
+    Returns:
+    - 200 OK: A JSON object with the number of cache hits, misses and the hit rate.
+
+    Authentication:
+    - JWT authentication required. Include the access token in the Authorization header as "Bearer {access_token}".
+
+    Permissions:
+    - User must be authenticated to access this endpoint.
+    """
+    return Response(performance_cache.cache_stats())
+
+@swagger_auto_schema(
+    method='get',
+    operation_summary='Retrieve metric recomputation queue status',
+    operation_description='Returns the metrics mode and the depth and lag of the background recomputation queue.',
+    responses={200: openapi.Response('Queue status', schema=openapi.Schema(
+        type=openapi.TYPE_OBJECT,
+        properties={
+            'mode': openapi.Schema(type=openapi.TYPE_STRING),
+            'depth': openapi.Schema(type=openapi.TYPE_INTEGER),
+            'oldest_enqueued_at': openapi.Schema(type=openapi.TYPE_STRING, format=openapi.FORMAT_DATETIME),
+            'lag_seconds': openapi.Schema(type=openapi.TYPE_NUMBER),
+        }
+    ))}
+)
+@api_view(['GET'])
+@authentication_classes([CachedJWTAuthentication])
+@permission_classes([IsAuthenticated])
+def metric_queue_status(request):
+    """
+    Retrieve metric recomputation queue status.
+
+    Returns:
+    - 200 OK: A JSON object with the configured metrics mode, the number of
+      vendors waiting to be recomputed, when the oldest of them was queued and
+      how many seconds ago that was.
+
+    Authentication:
+    - JWT authentication required. Include the access token in the Authorization header as "Bearer {access_token}".
+
+    Permissions:
+    - User must be authenticated to access this endpoint.
+    """
+    return Response(jobs.queue_status())
+
+@require_GET
+def prometheus_metrics(request):
+    """
+    Expose request and signal instrumentation in the Prometheus text format.
+
+    The histograms are per process. This endpoint is meant for a scraper and
+    is not authenticated, so restrict access to it at the proxy.
+    """
+    return HttpResponse(instrumentation.render_prometheus(), content_type='text/plain; version=0.0.4; charset=utf-8')